@@ -0,0 +1,86 @@
+# *******************************************************
+# 简介：该模块测量各仿真器每个实例的内存占用，以及折算到每个
+#      仿真字节(仿真内存的字节数)的占用。测量方法：在tracemalloc
+#      下连续构建多个实例并保持引用，取分配量的增量求平均，共享的
+#      类与模块只在第一次导入时分配，不计入实例。
+#      TARGETS为每个仿真字节的占用上限，超出时以非0状态退出。
+#      命令行用法(在仓库根目录下)：
+#         python -m benchmarks.footprint [-n 实例数]
+# *******************************************************
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # 仓库根目录
+
+TARGETS = {
+    'project1': 20.0,
+    'assignment1': 20.0,
+    'cardiac': 8.0,
+}  # 仿真器名称 -> 每个仿真字节的占用上限(字节)
+
+
+def make_project1():
+    from project1.project1 import CPU
+    return CPU(address_len=256, verbose=False), 256
+
+
+def make_assignment1():
+    from project1.assignment1 import Simulation
+    return Simulation(), 256
+
+
+def make_cardiac():
+    sys.path.insert(0, ROOT)  # test.py位于仓库根目录
+    from test import Cardiac
+    return Cardiac(), 100 * 2  # 100个3位十进制单元，按每单元2字节计
+
+
+FACTORIES = {
+    'project1': make_project1,
+    'assignment1': make_assignment1,
+    'cardiac': make_cardiac,
+}  # 仿真器名称 -> 构建函数，返回 (实例, 仿真字节数)
+
+
+def measure(name, count=100):
+    """测量一个仿真器每个实例的平均占用"""
+    factory = FACTORIES[name]
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        factory()  # 预先导入模块并完成一次性初始化
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        instances = [factory() for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    per_instance = (after - before) / count
+    simulated_bytes = instances[0][1]
+    return {
+        'simulator': name,
+        'bytes_per_instance': per_instance,
+        'simulated_bytes': simulated_bytes,
+        'bytes_per_simulated_byte': per_instance / simulated_bytes,
+        'target': TARGETS.get(name),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.footprint',
+                                     description='Measure memory per simulator instance.')
+    parser.add_argument('-s', '--simulator', action='append', choices=sorted(FACTORIES),
+                        help='simulator to measure (repeatable, default: all)')
+    parser.add_argument('-n', '--count', type=int, default=100, help='number of instances to keep alive')
+    args = parser.parse_args(argv)
+    results = [measure(name, args.count) for name in args.simulator or FACTORIES]
+    print(json.dumps(results, indent=2))
+    over = [item for item in results if item['target'] is not None
+            and item['bytes_per_simulated_byte'] > item['target']]
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+# *******************************************************
+# 简介：该模块实现了仿真器的基准测试。每一组(仿真器, 负载)在独立的
+#      子进程中运行，以便分别测量：
+#         startup_seconds         导入仿真器模块并构建第一个实例的时间
+#         compile_seconds         计时前先执行一遍预热，JIT/AOT在这一遍完成
+#                                 编译；按预热一遍与之后平均一遍的耗时之差估算
+#         instructions_per_second 预热之后重复执行负载程序达到目标指令数的速度
+#         peak_rss_kb             子进程的峰值常驻内存(resource模块)
+#      结果以JSON输出。指定--baseline时与之前保存的结果比较，任意一组
+#      的指令速度下降超过--tolerance时以非0状态退出，可用于发布前检查。
+#      命令行用法(在仓库根目录下)：
+#         python -m benchmarks [-s 仿真器 ...] [-l 负载 ...] [-n 指令数]
+#                              [-o 结果.json] [--baseline 旧结果.json]
+# *******************************************************
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # resource模块只在类Unix系统上可用
+    resource = None
+
+from benchmarks import workloads
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # 仓库根目录
+DEFAULT_INSTRUCTIONS = 50000  # 默认的目标指令数
+
+
+def peak_rss_kb():
+    """当前进程的峰值常驻内存(KB)，不支持时返回None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # macOS以字节为单位
+
+
+def repeat_count(instructions, per_run):
+    """达到目标指令数需要执行程序的次数"""
+    return max(1, -(-instructions // max(1, per_run)))
+
+
+def timed_runs(run_once, runs):
+    """
+    执行一遍预热后计时执行runs遍
+    :return: (编译时间, 执行时间)，编译时间为预热一遍比之后平均一遍多用的时间
+    """
+    start = time.perf_counter()
+    run_once()
+    warmup = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(runs):
+        run_once()
+    elapsed = time.perf_counter() - start
+    return max(0.0, warmup - elapsed / runs), elapsed
+
+
+# ---------------- 各仿真器的测试函数：返回(启动时间, 编译时间, 执行时间, 执行指令数) ----------------
+
+def bench_project1(workload, instructions, jit=False):
+    source, length, data = workloads.PROJECT1_WORKLOADS[workload](min(instructions, 2000))
+    start = time.perf_counter()
+    module = importlib.import_module('project1.project1')
+    address_len = workloads.PROJECT1_DATA_WORDS * 4 + length * 4
+    cpu = module.create_cpu(address_len=address_len)
+    startup = time.perf_counter() - start
+    for address, value in data.items():
+        cpu.memory.write_word(address, value)
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write(source)
+    try:
+        cpu.load_program(f.name)
+    finally:
+        os.remove(f.name)
+    execute = cpu.execute
+    if jit:
+        from project1.jit import BlockEngine
+        execute = BlockEngine(cpu, hot_threshold=0).run  # 预热一遍即翻译全部代码，计时的是翻译后的速度
+
+    def run_once():
+        cpu.PC_instruction_init()
+        execute()
+
+    runs = repeat_count(instructions, length)
+    compile_seconds, elapsed = timed_runs(run_once, runs)
+    return startup, compile_seconds, elapsed, runs * length
+
+
+def bench_project1_jit(workload, instructions):
+    return bench_project1(workload, instructions, jit=True)
+
+
+def bench_assignment1(workload, instructions):
+    codes, length = workloads.ASSIGNMENT1_WORKLOADS[workload](instructions)
+    start = time.perf_counter()
+    module = importlib.import_module('project1.assignment1')
+    sim = module.Simulation(verbose=False)
+    startup = time.perf_counter() - start
+    sim.initialize()
+    for offset, code in enumerate(codes):
+        sim.MM.write(int(code, 2), workloads.ASSIGNMENT1_CODE_BASE + offset * 4)
+
+    def run_once():
+        sim.PC.pulse(workloads.ASSIGNMENT1_CODE_BASE)
+        sim.run(length)
+
+    runs = repeat_count(instructions, length)
+    compile_seconds, elapsed = timed_runs(run_once, runs)
+    return startup, compile_seconds, elapsed, runs * length
+
+
+def bench_cardiac(workload, instructions, compiled=False):
+    cards, length = workloads.CARDIAC_WORKLOADS[workload](instructions)
+    sys.path.insert(0, ROOT)  # test.py位于仓库根目录
+    start = time.perf_counter()
+    module = importlib.import_module('test')
+    cardiac = module.Cardiac()
+    startup = time.perf_counter() - start
+    cardiac.read_deck(cards)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        cardiac.run()  # 引导程序载入卡片并执行一遍，不计时
+        runs = repeat_count(instructions, length)
+        compile_seconds, elapsed = timed_runs(
+            lambda: cardiac.run(workloads.CARDIAC_CODE_BASE, compiled=compiled), runs)
+    return startup, compile_seconds, elapsed, runs * length
+
+
+def bench_cardiac_aot(workload, instructions):
+    return bench_cardiac(workload, instructions, compiled=True)
+
+
+SIMULATORS = {
+    'project1': (bench_project1, workloads.PROJECT1_WORKLOADS),
+    'project1-jit': (bench_project1_jit, workloads.PROJECT1_WORKLOADS),
+    'assignment1': (bench_assignment1, workloads.ASSIGNMENT1_WORKLOADS),
+    'cardiac': (bench_cardiac, workloads.CARDIAC_WORKLOADS),
+    'cardiac-aot': (bench_cardiac_aot, workloads.CARDIAC_WORKLOADS),
+}  # 仿真器名称 -> (测试函数, 支持的负载)
+
+
+def run_one(simulator, workload, instructions):
+    """在当前进程内测试一组(仿真器, 负载)，返回结果字典"""
+    bench, _ = SIMULATORS[simulator]
+    startup, compile_seconds, elapsed, executed = bench(workload, instructions)
+    return {
+        'simulator': simulator,
+        'workload': workload,
+        'instructions': executed,
+        'seconds': elapsed,
+        'instructions_per_second': executed / elapsed if elapsed else 0.0,
+        'startup_seconds': startup,
+        'compile_seconds': compile_seconds,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def run_isolated(simulator, workload, instructions):
+    """在子进程中测试一组(仿真器, 负载)"""
+    output = subprocess.run([sys.executable, '-m', 'benchmarks', '--child', simulator, workload, str(instructions)],
+                            cwd=ROOT, stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_suite(simulators=None, workload_names=None, instructions=DEFAULT_INSTRUCTIONS):
+    """测试所有指定的仿真器与负载的组合，跳过仿真器不支持的负载"""
+    results = []
+    for simulator in simulators or SIMULATORS:
+        _, supported = SIMULATORS[simulator]
+        for workload in workload_names or supported:
+            if workload in supported:
+                results.append(run_isolated(simulator, workload, instructions))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """与基线比较，返回速度下降超过tolerance的组合列表"""
+    previous = {(item['simulator'], item['workload']): item for item in baseline}
+    regressions = []
+    for item in results:
+        old = previous.get((item['simulator'], item['workload']))
+        if old is None or not old['instructions_per_second']:
+            continue
+        ratio = item['instructions_per_second'] / old['instructions_per_second']
+        if ratio < 1 - tolerance:
+            regressions.append({'simulator': item['simulator'], 'workload': item['workload'], 'ratio': ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark the simulators.')
+    parser.add_argument('-s', '--simulator', action='append', choices=sorted(SIMULATORS),
+                        help='simulator to benchmark (repeatable, default: all)')
+    parser.add_argument('-l', '--workload', action='append', help='workload to run (repeatable, default: all)')
+    parser.add_argument('-n', '--instructions', type=int, default=DEFAULT_INSTRUCTIONS,
+                        help='target number of executed instructions per benchmark')
+    parser.add_argument('-o', '--output', help='write the JSON results to this file')
+    parser.add_argument('--baseline', help='previous JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='allowed relative slowdown before a benchmark counts as a regression')
+    parser.add_argument('--child', nargs=3, metavar=('SIMULATOR', 'WORKLOAD', 'INSTRUCTIONS'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        simulator, workload, instructions = args.child
+        print(json.dumps(run_one(simulator, workload, int(instructions))))
+        return 0
+    report = {'python': sys.version.split()[0], 'platform': sys.platform,
+              'results': run_suite(args.simulator, args.workload, args.instructions)}
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        report['regressions'] = compare(report['results'], baseline['results'], args.tolerance)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+    return 1 if report.get('regressions') else 0
@@ -0,0 +1,106 @@
+# *******************************************************
+# 简介：该模块测量project1的启动开销。每一轮在新的子进程中依次计时：
+#         import_package   import project1(不应导入任何子模块)
+#         import_core      导入project1.project1
+#         create_cpu       用工厂函数构建第一个CPU
+#         load_program     汇编并载入示例程序codes.txt
+#      并记录子进程从启动到退出的总时间，以及空解释器(python -c pass)
+#      的同类时间作为对照。各项取多轮的中位数。另外在当前进程内测量
+#      模块已导入后每次create_cpu的平均时间。
+#      指定--max-ms时，导入与首次构建的时间之和超出上限则以非0状态退出。
+#      命令行用法(在仓库根目录下)：
+#         python -m benchmarks.startup [-n 轮数] [--max-ms 毫秒]
+# *******************************************************
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # 仓库根目录
+CODES = os.path.join(ROOT, 'project1', 'codes.txt')  # 示例程序
+STAGES = ('import_package', 'import_core', 'create_cpu', 'load_program')  # 子进程中依次计时的阶段
+
+
+def child():
+    """在子进程中执行：依次完成各阶段并输出每阶段的秒数"""
+    timings = {}
+    start = time.perf_counter()
+    import project1
+    timings['import_package'] = time.perf_counter() - start
+    loaded = sorted(name for name in sys.modules if name.startswith('project1.'))
+    start = time.perf_counter()
+    import project1.project1
+    timings['import_core'] = time.perf_counter() - start
+    start = time.perf_counter()
+    cpu = project1.create_cpu()
+    timings['create_cpu'] = time.perf_counter() - start
+    start = time.perf_counter()
+    cpu.load_program(CODES)
+    timings['load_program'] = time.perf_counter() - start
+    timings['package_submodules'] = loaded  # import project1之后已导入的子模块，应为空
+    print(json.dumps(timings))
+
+
+def run_process(arguments):
+    """运行一个子进程，返回 (总时间, 标准输出)"""
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable] + arguments, cwd=ROOT, stdout=subprocess.PIPE, check=True,
+                            universal_newlines=True).stdout
+    return time.perf_counter() - start, output
+
+
+def measure(rounds=10):
+    """测量启动开销，返回结果字典，时间单位为毫秒"""
+    stages = {name: [] for name in STAGES}
+    totals, baselines, submodules = [], [], []
+    for _ in range(rounds):
+        baselines.append(run_process(['-c', 'pass'])[0])
+        total, output = run_process(['-m', 'benchmarks.startup', '--child'])
+        timings = json.loads(output.strip().splitlines()[-1])
+        totals.append(total)
+        for name in STAGES:
+            stages[name].append(timings[name])
+        submodules = timings['package_submodules']
+    sys.path.insert(0, ROOT)
+    from project1.project1 import create_cpu
+    count = 1000
+    steady = timeit.timeit(create_cpu, number=count) / count
+
+    def median_ms(values):
+        return statistics.median(values) * 1e3
+    result = {'rounds': rounds, 'python': sys.version.split()[0]}
+    result.update({name + '_ms': median_ms(values) for name, values in stages.items()})
+    result['startup_ms'] = sum(result[name + '_ms'] for name in STAGES[:3])
+    result['process_ms'] = median_ms(totals)
+    result['interpreter_ms'] = median_ms(baselines)
+    result['create_cpu_steady_us'] = steady * 1e6
+    result['package_submodules'] = submodules
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.startup',
+                                     description='Measure project1 import and construction time.')
+    parser.add_argument('-n', '--rounds', type=int, default=10, help='number of fresh processes')
+    parser.add_argument('--max-ms', type=float, help='fail if import plus first construction exceeds this')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child()
+        return 0
+    result = measure(args.rounds)
+    print(json.dumps(result, indent=2))
+    if result['package_submodules']:
+        return 1
+    if args.max_ms is not None and result['startup_ms'] > args.max_ms:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
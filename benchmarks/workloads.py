@@ -0,0 +1,148 @@
+# *******************************************************
+# 简介：该模块为各个仿真器生成基准测试用的程序(负载)。
+#      同一种负载在不同仿真器上的含义相同：
+#         alu_chain   长串的ALU运算，每条指令依赖上一条的结果
+#         load_store  内存读写交替的数据流
+#         loop        计数循环，只有支持跳转的仿真器才有该负载
+#      每个生成函数返回程序本身以及程序执行一遍的指令数，
+#      由基准测试按目标指令数重复执行；project1的程序另外给出执行前
+#      需要写入的数据区(字地址 -> 数值)。
+# *******************************************************
+
+# ---------------- project1.project1.CPU：汇编源码 ----------------
+
+PROJECT1_DATA_WORDS = 256  # Load/Store的地址为8位，数据区为前256个字
+
+
+def project1_alu_chain(length):
+    """project1的ALU链：r1 <- r1 op r2，循环使用各种ALU指令"""
+    operations = ('Add', 'Sub', 'Xor', 'And', 'Or', 'Shl', 'Shr')
+    lines = ['Load r1, #0', 'Load r2, #1']
+    for i in range(length - 2):
+        lines.append('%s r1, r1, r2' % operations[i % len(operations)])
+    return '\n'.join(lines) + '\n', length, {}
+
+
+def project1_load_store(length):
+    """project1的读写流：依次读入一个字、累加后写到另一个地址"""
+    lines = []
+    for i in range(length // 3):
+        address = i % (PROJECT1_DATA_WORDS // 2)
+        lines.append('Load r1, #%d' % address)
+        lines.append('Add r2, r2, r1')
+        lines.append('Store r2, #%d' % (address + PROJECT1_DATA_WORDS // 2))
+    return '\n'.join(lines) + '\n', len(lines), {}
+
+
+def project1_loop(length):
+    """project1的计数循环：计数器从N减到0，每轮4条指令，以Cmp/Bne回跳"""
+    count = max(1, (length - 3) // 4)
+    lines = ['Load r1, #0',  # 计数器 <- N
+             'Load r2, #1',  # 步长1
+             'Xor r4, r4, r4',  # 比较用的0
+             'loop: Add r3, r3, r1',
+             'Sub r1, r1, r2',
+             'Cmp r1, r4',
+             'Bne #loop']
+    return '\n'.join(lines) + '\n', 3 + 4 * count, {0: count, 1: 1}
+
+
+PROJECT1_WORKLOADS = {
+    'alu_chain': project1_alu_chain,
+    'load_store': project1_load_store,
+    'loop': project1_loop,
+}  # 负载名称 -> 生成函数(指令数) -> (源码, 指令数, 数据区)
+
+# ---------------- project1.assignment1.Simulation：机器码 ----------------
+
+ASSIGNMENT1_CODE_BASE = 16  # 代码段的字节地址，与Simulation.initialize一致
+ASSIGNMENT1_MAX_LENGTH = (256 - ASSIGNMENT1_CODE_BASE) // 4  # 256字节内存中最多能放下的指令数
+
+
+def assignment1_alu_chain(length):
+    """assignment1的ALU链(只有Add)：r1 <- r1 + r2"""
+    length = min(length, ASSIGNMENT1_MAX_LENGTH)
+    codes = ['00000010' + '0' * 8 + '00000001' + '00000000',
+             '00000010' + '0' * 8 + '00000010' + '00000100']
+    codes += ['00000100' + '00000001' + '00000001' + '00000010'] * (length - 2)
+    return codes, length
+
+
+def assignment1_load_store(length):
+    """assignment1的读写流，数据区为代码段之前的16字节"""
+    length = min(length, ASSIGNMENT1_MAX_LENGTH)
+    codes = []
+    for i in range(length // 3):
+        address = (i % 2) * 4
+        codes.append('00000010' + '0' * 8 + '00000001' + '{:08b}'.format(address))
+        codes.append('00000100' + '00000010' + '00000010' + '00000001')
+        codes.append('00000011' + '0' * 8 + '00000010' + '{:08b}'.format(address + 8))
+    return codes, len(codes)
+
+
+ASSIGNMENT1_WORKLOADS = {
+    'alu_chain': assignment1_alu_chain,
+    'load_store': assignment1_load_store,
+}  # 负载名称 -> 生成函数(指令数) -> (32位机器码字符串列表, 指令数)
+
+# ---------------- test.Cardiac：卡片(deck) ----------------
+
+CARDIAC_CODE_BASE = 10  # 程序的起始地址
+CARDIAC_DATA_BASE = 90  # 数据区的起始地址
+CARDIAC_MAX_LENGTH = CARDIAC_DATA_BASE - CARDIAC_CODE_BASE  # 代码区最多能放下的指令数
+
+
+def cardiac_deck(program, data):
+    """
+    生成Cardiac的卡片：先由0号单元的引导程序逐条载入程序和数据，最后跳转到程序入口
+    :param program: 指令列表，从CARDIAC_CODE_BASE开始存放
+    :param data: 数据区，地址 -> 数值
+    """
+    cards = ['002', '800']  # 引导程序：01号单元为 INP 02，02号单元为 JMP 00
+    for address, instruction in enumerate(program, CARDIAC_CODE_BASE):
+        cards += ['0%02d' % address, instruction]
+    for address, value in sorted(data.items()):
+        cards += ['0%02d' % address, '%03d' % value]
+    cards.append('8%02d' % CARDIAC_CODE_BASE)
+    return cards
+
+
+def cardiac_alu_chain(length):
+    """Cardiac的ALU链：acc交替加减1"""
+    length = min(length, CARDIAC_MAX_LENGTH)
+    program = ['1%02d' % CARDIAC_DATA_BASE]
+    program += ['2%02d' % (CARDIAC_DATA_BASE + 1) if i % 2 == 0 else '7%02d' % (CARDIAC_DATA_BASE + 1)
+                for i in range(length - 2)]
+    program.append('900')
+    return cardiac_deck(program, {CARDIAC_DATA_BASE: 0, CARDIAC_DATA_BASE + 1: 1}), length
+
+
+def cardiac_load_store(length):
+    """Cardiac的读写流：在两个单元之间来回复制"""
+    length = min(length, CARDIAC_MAX_LENGTH)
+    program = []
+    for i in range((length - 1) // 2):
+        program.append('1%02d' % (CARDIAC_DATA_BASE + i % 2))
+        program.append('6%02d' % (CARDIAC_DATA_BASE + 1 - i % 2))
+    program.append('900')
+    return cardiac_deck(program, {CARDIAC_DATA_BASE: 123, CARDIAC_DATA_BASE + 1: 456}), len(program)
+
+
+def cardiac_loop(length):
+    """Cardiac的计数循环：计数器从N减到-1，每轮5条指令"""
+    count = max(0, min(999, (length - 3) // 5))
+    counter, initial, one = CARDIAC_DATA_BASE, CARDIAC_DATA_BASE + 1, CARDIAC_DATA_BASE + 2
+    loop, end = CARDIAC_CODE_BASE + 2, CARDIAC_CODE_BASE + 7
+    program = ['1%02d' % initial, '6%02d' % counter,  # 计数器 <- N
+               '1%02d' % counter, '7%02d' % one, '6%02d' % counter,  # 计数器减1
+               '3%02d' % end, '8%02d' % loop,  # 小于0时结束
+               '900']
+    instructions = 2 + 4 * (count + 1) + count + 1
+    return cardiac_deck(program, {initial: count, one: 1}), instructions
+
+
+CARDIAC_WORKLOADS = {
+    'alu_chain': cardiac_alu_chain,
+    'load_store': cardiac_load_store,
+    'loop': cardiac_loop,
+}  # 负载名称 -> 生成函数(指令数) -> (卡片列表, 指令数)
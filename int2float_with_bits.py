@@ -1,60 +1,138 @@
-# int转32位float
-def int2float(num, bits=32, accuracy=6):
-    # 判断是否为浮点数
-    if num == int(num):
-        return
+# IEEE-754 单精度(float32)/双精度(float64) 编码与解码
+# 编码结果为位模式对应的无符号整数，例如 int2float(176.0625) == 0x43301000
+# 所有运算都在整数上完成，舍入方式为就近舍入、偶数优先(round-to-nearest-even)，
+# 支持0、非规格化数、无穷大与NaN
+import struct
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy为可选依赖，只有批量转换NumPy数组时需要
+    np = None
+
+_double = struct.Struct('<d')
+_single = struct.Struct('<f')
+_uint64 = struct.Struct('<Q')
+_uint32 = struct.Struct('<I')
+
+FLOAT32_EXPONENT_BIAS = 127
+FLOAT64_EXPONENT_BIAS = 1023
+FLOAT32_MANTISSA_BITS = 23
+FLOAT64_MANTISSA_BITS = 52
+
+
+# float64的位模式
+def float64_bits(num):
+    return _uint64.unpack(_double.pack(num))[0]
+
+
+# 由位模式得到float64
+def float64_from_bits(bits):
+    return _double.unpack(_uint64.pack(bits & 0xFFFFFFFFFFFFFFFF))[0]
+
+
+# 将float64的位模式就近舍入(偶数优先)为float32的位模式
+def float32_bits(num):
+    bits = float64_bits(num)
+    sign = (bits >> 63) << 31
+    exponent = (bits >> FLOAT64_MANTISSA_BITS) & 0x7FF
+    mantissa = bits & ((1 << FLOAT64_MANTISSA_BITS) - 1)
+    if exponent == 0x7FF:
+        # 无穷大或NaN，NaN保留高位载荷并置为quiet NaN
+        if mantissa:
+            return sign | 0x7FC00000 | (mantissa >> (FLOAT64_MANTISSA_BITS - FLOAT32_MANTISSA_BITS))
+        return sign | 0x7F800000
+    if exponent == 0:
+        # float64的0和非规格化数远小于float32能表示的最小值
+        return sign
+    exponent += FLOAT32_EXPONENT_BIAS - FLOAT64_EXPONENT_BIAS
+    significand = mantissa | (1 << FLOAT64_MANTISSA_BITS)  # 补上隐含的1
+    shift = FLOAT64_MANTISSA_BITS - FLOAT32_MANTISSA_BITS
+    if exponent < 1:
+        # 非规格化数：以2^-149为单位，舍入后进位到2^23时恰好成为最小的规格化数
+        shift += 1 - exponent
+        exponent = 0
+    # 就近舍入，恰好在中间时向偶数舍入
+    result = significand >> shift
+    remainder = significand & ((1 << shift) - 1)
+    half = 1 << (shift - 1)
+    if remainder > half or (remainder == half and result & 1):
+        result += 1
+    if exponent == 0:
+        return sign | result
+    if result >> (FLOAT32_MANTISSA_BITS + 1):
+        # 尾数进位溢出，指数加1
+        result >>= 1
+        exponent += 1
+    if exponent >= 0xFF:
+        return sign | 0x7F800000  # 上溢为无穷大
+    return sign | (exponent << FLOAT32_MANTISSA_BITS) | (result & ((1 << FLOAT32_MANTISSA_BITS) - 1))
+
+
+# 由位模式得到float32(以Python的float返回，转换是精确的)
+def float32_from_bits(bits):
+    return _single.unpack(_uint32.pack(bits & 0xFFFFFFFF))[0]
+
+
+# 浮点数转32位或64位IEEE-754位模式
+def int2float(num, bits=32):
+    if bits == 32:
+        return float32_bits(num)
+    if bits == 64:
+        return float64_bits(num)
+    raise ValueError('bits must be 32 or 64')
+
+
+# IEEE-754位模式转浮点数
+def float2int(data, bits=32):
     if bits == 32:
-        ex_num = 127
-        ex_bits = 8
-    else:
-        ex_num = 1023
-        ex_bits = 11
-    # 判断正负
-    f = '0'
-    if num < 0:
-        f = '1'
-    # 若为浮点数
-    # 取整数部分
-    integer = int(num)
-    # 取小数部分
-    flo = num - integer
-    # 整数部分进制转换
-    integercom = str(bin(integer))
-    integercom = integercom[2:]
-    # 小数部分进制转换
-    tem = flo
-    tmpflo = []
-    for i in range(accuracy):
-        tem *= 2
-        tmpflo += str(int(tem))
-        tem -= int(tem)
-    flocom = tmpflo
-    flocom = ''.join(flocom)
-
-    # 取指数
-    if len(integercom) > 1:
-        ex = bin(ex_num + len(integercom) - 1)[2:]
-        ex = '0' * (ex_bits - len(ex)) + ex
-        data = f + ex + integercom[1:] + flocom
-    elif integercom == '1':
-        ex = bin(ex_num)[2:]
-        ex = '0' * (ex_bits - len(ex)) + ex
-        data = f + ex + flocom
-    else:
-        # 负指数
-        ex = 0
-        for i in flocom:
-            if i == '1':
-                pass
-            else:
-                ex -= 1
-        flocom = flocom[-ex:]
-        ex = bin(ex_num + ex)[2:]
-        ex = '0' * (ex_bits - len(ex)) + ex
-        data = f + ex + flocom
-    if len(data) > bits:
-        data = data[:bits]
-    else:
-        data += '0' * (bits - len(data))
-    # return data
-    return int(data, 2)
+        return float32_from_bits(data)
+    if bits == 64:
+        return float64_from_bits(data)
+    raise ValueError('bits must be 32 or 64')
+
+
+# 批量编码：NumPy数组返回uint32/uint64数组，其他序列(如array('d'))返回array('I')/array('Q')
+# NumPy与array模块的float64到float32转换同样是就近舍入、偶数优先，整批转换只做一次
+def encode_array(values, bits=32):
+    if bits not in (32, 64):
+        raise ValueError('bits must be 32 or 64')
+    if np is not None and isinstance(values, np.ndarray):
+        return np.asarray(values, dtype=np.float32 if bits == 32 else np.float64).view(
+            np.uint32 if bits == 32 else np.uint64)
+    floats = array('f' if bits == 32 else 'd', values)
+    words = array(_word_typecode(bits))
+    words.frombytes(floats.tobytes())
+    return words
+
+
+# 批量解码：encode_array的逆运算，NumPy数组返回float32/float64数组，其他序列返回array('f')/array('d')
+def decode_array(words, bits=32):
+    if bits not in (32, 64):
+        raise ValueError('bits must be 32 or 64')
+    if np is not None and isinstance(words, np.ndarray):
+        return np.asarray(words, dtype=np.uint32 if bits == 32 else np.uint64).view(
+            np.float32 if bits == 32 else np.float64)
+    integers = array(_word_typecode(bits), words)
+    floats = array('f' if bits == 32 else 'd')
+    floats.frombytes(integers.tobytes())
+    return floats
+
+
+# 批量编码为小端序字节串，可直接用MyMemory.write_bytes写入仿真器内存
+def encode_bytes(values, bits=32):
+    if np is not None and isinstance(values, np.ndarray):
+        return np.asarray(values, dtype='<f4' if bits == 32 else '<f8').tobytes()
+    words = encode_array(values, bits)
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words.tobytes()
+
+
+# 与位数相同的无符号整数类型码
+def _word_typecode(bits):
+    for typecode in ('I', 'L', 'Q'):
+        if array(typecode).itemsize * 8 == bits:
+            return typecode
+    raise ValueError('no %d-bit unsigned array type on this platform' % bits)
@@ -1,11 +1,7 @@
-from project1.project1 import CPU
+from project1.project1 import CPU, TRACE_VERBOSE
 
 if __name__ == '__main__':
 
     cpu = CPU()
-    with open('project1/codes.txt', 'r') as f:
-        lines = f.readlines()
-
-    for code in lines:
-        cpu.run_code(code)
+    cpu.run('project1/codes.txt', trace=TRACE_VERBOSE)
     cpu.show_memory()
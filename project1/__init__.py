@@ -0,0 +1,29 @@
+# *******************************************************
+# 简介：project1包。导入包本身不导入任何子模块、不做任何初始化，
+#      常用名称在第一次访问时才从对应子模块导入：
+#         import project1
+#         cpu = project1.create_cpu(program='project1/codes.txt')
+#         cpu.execute()
+# *******************************************************
+
+_exports = {
+    'CPU': 'project1.project1',
+    'create_cpu': 'project1.project1',
+    'register_instruction': 'project1.project1',
+    'TRACE_QUIET': 'project1.project1',
+    'TRACE_VERBOSE': 'project1.project1',
+    'assemble': 'project1.objfile',
+    'assemble_cached': 'project1.objfile',
+    'make_predictor': 'project1.predictor',
+}  # 名称 -> 所在子模块
+
+__all__ = sorted(_exports)
+
+
+def __getattr__(name):
+    module_name = _exports.get(name)
+    if module_name is None:
+        raise AttributeError(r"module 'project1' has no attribute %r" % name)
+    value = getattr(__import__(module_name, fromlist=(name,)), name)  # 内置的__import__，不额外导入importlib
+    globals()[name] = value  # 之后的访问不再经过__getattr__
+    return value
@@ -0,0 +1,136 @@
+# *******************************************************
+# 简介：该模块实现了32位算术逻辑单元(ALU)。所有运算均在掩码后的
+#      32位无符号整数上完成，运算结果按2^32回绕，与原先按位实现的
+#      加法器完全一致。每次运算都会更新标志位：
+#         carry    进位/借位（减法借位时置1）
+#         overflow 有符号溢出
+#         zero     结果为0
+#         negative 结果最高位为1
+#      跳转指令的条件判断也由ALU根据标志位完成，有符号比较按
+#      Cmp(a - b)之后 negative != overflow 即 a < b 判断。
+# *******************************************************
+
+WORD_BITS = 32  # 字长
+WORD_MASK = 0xFFFFFFFF  # 32位掩码
+SIGN_BIT = 0x80000000  # 符号位
+
+
+def to_signed(value):
+    """将32位无符号整数解释为有符号整数"""
+    return value - (1 << WORD_BITS) if value & SIGN_BIT else value
+
+
+class ALU:
+    """算术逻辑单元类，运算结果通过返回值给出，标志位保存在实例属性中"""
+
+    __slots__ = ('carry', 'overflow', 'zero', 'negative')
+
+    def __init__(self):
+        self.carry = False  # 进位标志
+        self.overflow = False  # 溢出标志
+        self.zero = False  # 零标志
+        self.negative = False  # 负数标志
+
+    def set_result_flags(self, result):
+        """根据运算结果设置零标志和负数标志"""
+        self.zero = result == 0
+        self.negative = bool(result & SIGN_BIT)
+
+    def add(self, a, b):
+        """加法：a + b"""
+        result = a + b
+        self.carry = result > WORD_MASK
+        result &= WORD_MASK
+        self.overflow = bool(~(a ^ b) & (a ^ result) & SIGN_BIT)  # 同号相加结果变号即为溢出
+        self.set_result_flags(result)
+        return result
+
+    def sub(self, a, b):
+        """减法：a - b，carry表示借位"""
+        result = (a - b) & WORD_MASK
+        self.carry = a < b
+        self.overflow = bool((a ^ b) & (a ^ result) & SIGN_BIT)  # 异号相减结果与被减数变号即为溢出
+        self.set_result_flags(result)
+        return result
+
+    def compare(self, a, b):
+        """比较：按a - b设置标志位，不返回结果"""
+        self.sub(a, b)
+
+    def and_(self, a, b):
+        """按位与"""
+        result = a & b
+        self.carry = self.overflow = False
+        self.set_result_flags(result)
+        return result
+
+    def or_(self, a, b):
+        """按位或"""
+        result = a | b
+        self.carry = self.overflow = False
+        self.set_result_flags(result)
+        return result
+
+    def xor(self, a, b):
+        """按位异或"""
+        result = a ^ b
+        self.carry = self.overflow = False
+        self.set_result_flags(result)
+        return result
+
+    def shl(self, a, n):
+        """逻辑左移，移位数取低5位，carry为最后移出的一位"""
+        n &= WORD_BITS - 1
+        self.carry = bool(n) and bool((a >> (WORD_BITS - n)) & 1)
+        result = (a << n) & WORD_MASK
+        self.overflow = False
+        self.set_result_flags(result)
+        return result
+
+    def shr(self, a, n):
+        """逻辑右移，移位数取低5位，carry为最后移出的一位"""
+        n &= WORD_BITS - 1
+        self.carry = bool(n) and bool((a >> (n - 1)) & 1)
+        result = a >> n
+        self.overflow = False
+        self.set_result_flags(result)
+        return result
+
+    def sar(self, a, n):
+        """算术右移，移位数取低5位，carry为最后移出的一位"""
+        n &= WORD_BITS - 1
+        self.carry = bool(n) and bool((a >> (n - 1)) & 1)
+        result = (to_signed(a) >> n) & WORD_MASK
+        self.overflow = False
+        self.set_result_flags(result)
+        return result
+
+    # ---------------- 条件判断，供跳转指令使用 ----------------
+
+    def always(self):
+        """无条件"""
+        return True
+
+    def equal(self):
+        """a == b"""
+        return self.zero
+
+    def not_equal(self):
+        """a != b"""
+        return not self.zero
+
+    def less(self):
+        """有符号 a < b"""
+        return self.negative != self.overflow
+
+    def greater_equal(self):
+        """有符号 a >= b"""
+        return self.negative == self.overflow
+
+    def greater(self):
+        """有符号 a > b"""
+        return not self.zero and self.negative == self.overflow
+
+    def less_equal(self):
+        """有符号 a <= b"""
+        return self.zero or self.negative != self.overflow
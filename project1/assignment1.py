@@ -3,6 +3,18 @@
     Update: 2019/11/2
 """
 
+import struct
+
+# opcodes (the highest byte of an instruction)
+OP_HALT = 0b00000000
+OP_LOAD = 0b00000010
+OP_STORE = 0b00000011
+OP_ADD = 0b00000100
+
+WORD_MASK = 0xFFFFFFFF
+# a word in memory is 4 cells, small endian
+_word = struct.Struct('<I')
+
 
 # converting BIN to DEC
 # input: bit list (char list)
@@ -15,205 +27,252 @@ def bin_to_dec(bits_list):
 # input: int
 # output: bit list (char list)
 def dec_to_bin(num):
-    bits = bin(num)[2:]
-    bits = '0' * max(0, 32 - len(bits)) + bits
-    bits = list(bits)
-    return bits
+    return list(format(num, '032b'))
 
 
 class Register(object):
-    def __init__(self, name='default'):
-        # the num of bits
-        self.bits = 32
+    # slotted; the value is kept as one int, bits are only built for display
+    __slots__ = ('value', 'name', 'verbose')
+    # the num of bits
+    bits = 32
+
+    def __init__(self, name='default', verbose=True):
         # 32-bit store
-        self.store = ['0' for _ in range(self.bits)]
+        self.value = 0
         # then name of the register
         self.name = name
+        # print every update
+        self.verbose = verbose
 
-    def pulse(self, input_bits):
-        assert len(input_bits) == self.bits
-        for i in range(self.bits):
-            self.store[i] = input_bits[i]
-        print('<register %s has been updated>' % self.name)
+    def pulse(self, value):
+        self.value = value & WORD_MASK
+        if self.verbose:
+            print('<register %s has been updated>' % self.name)
 
     def get_register_bits(self):
-        output_bit = [bit for bit in self.store]
-        return output_bit
+        return dec_to_bin(self.value)
 
 
 class Memory(object):
-    class Cell(object):
-        def __init__(self):
-            # 8-bit cell
-            self.bits = 8
-            self.store = ['0' for _ in range(self.bits)]
-
-        def read(self):
-            output_bits = [bit for bit in self.store]
-            return output_bits
-
-        def write(self, input_bits):
-            assert len(input_bits) == self.bits
-            self.store = [bit for bit in input_bits]
-
-    def __init__(self, cell_num=256):
+    def __init__(self, cell_num=256, verbose=True):
         # the num of memory cells
         # regard of cost, the real cell num is 2^8
         self.cell_num = cell_num
-        # the imitation of memory: a list of cells
-        self.cell_list = [Memory.Cell() for _ in range(cell_num)]
-
-    # read value from memory cells pointed by MAR value
-    # mar_bits：value from MAR(binary)
-    def read(self, mar_bits):
-        mar_trans = bin_to_dec(mar_bits)
-        assert mar_trans < self.cell_num
-        # read the data from memory cell
-        # ATTENTION: in normal situation, we should read 4 cell(Byte)
-        output_bits_1 = self.cell_list[mar_trans].read()
-        output_bits_2 = self.cell_list[mar_trans + 1].read()
-        output_bits_3 = self.cell_list[mar_trans + 2].read()
-        output_bits_4 = self.cell_list[mar_trans + 3].read()
-        print('Read Data from Cell %d-%d' % (mar_trans, (mar_trans + 3)))
+        # the imitation of memory: one byte per 8-bit cell
+        self.cells = bytearray(cell_num)
+        # print every access
+        self.verbose = verbose
+
+    def check(self, address):
+        # a word takes 4 cells
+        if not 0 <= address <= self.cell_num - 4:
+            raise IndexError('Memory address out of range: %d' % address)
+
+    # read a word from memory cells pointed by MAR value
+    # address: value from MAR
+    def read(self, address):
+        self.check(address)
+        if self.verbose:
+            print('Read Data from Cell %d-%d' % (address, (address + 3)))
         # using small endian
-        output_bits = output_bits_4 + output_bits_3 + output_bits_2 + output_bits_1
-        return output_bits
+        return _word.unpack_from(self.cells, address)[0]
 
     # write value from MDR to memory cells pointed by MAR value
-    # mdr_bits: value from MDR(binary)
-    # mar_bits：value from MAR(binary)
-    def write(self, mdr_bits, mar_bits):
-        mar_trans = bin_to_dec(mar_bits)
-        assert mar_trans < self.cell_num
-        # write the data to memory cell
-        # ATTENTION: in normal situation, we should write 4 cell(Byte)
+    # value: value from MDR
+    # address: value from MAR
+    def write(self, value, address):
+        self.check(address)
         # using small endian
-        byte = 8
-        self.cell_list[mar_trans].write(mdr_bits[byte * 3:byte * 4])
-        self.cell_list[mar_trans + 1].write(mdr_bits[byte * 2:byte * 3])
-        self.cell_list[mar_trans + 2].write(mdr_bits[byte * 1:byte * 2])
-        self.cell_list[mar_trans + 3].write(mdr_bits[byte * 0:byte * 1])
-        print('Write Data to Cell %d - %d' % (mar_trans, (mar_trans + 3)))
+        _word.pack_into(self.cells, address, value & WORD_MASK)
+        if self.verbose:
+            print('Write Data to Cell %d - %d' % (address, (address + 3)))
 
+    # format all rows first and print them in one call
     def show(self):
-        for i in range(self.cell_num // 8):
-            ot = 'ob' + '0' * (8 - len(bin(i)[2:])) + bin(i)[2:]
-            print(ot + '|' + ''.join(self.cell_list[i].read()))
+        print('\n'.join('ob%s|%s' % (format(i, '08b'), format(self.cells[i], '08b'))
+                        for i in range(self.cell_num // 8)))
 
 
 class Simulation(object):
-    def __init__(self):
+    def __init__(self, verbose=True):
+        # print every step, the output is the same as the string based version
+        self.verbose = verbose
         # memory
-        self.MM = Memory()
+        self.MM = Memory(verbose=verbose)
         # program register
-        self.PC = Register('PC')
+        self.PC = Register('PC', verbose)
         # memory address register
-        self.MAR = Register('MAR')
+        self.MAR = Register('MAR', verbose)
         # memory data register
-        self.MDR = Register('MDR')
+        self.MDR = Register('MDR', verbose)
         # code segment register(8086)
-        self.CS = Register('CS')
+        self.CS = Register('CS', verbose)
         # data segment register(8086)
-        self.DS = Register('DS')
+        self.DS = Register('DS', verbose)
         # instruction register
-        self.IR = Register('IR')
+        self.IR = Register('IR', verbose)
         # general purpose registers (32)
-        self.GR = [Register('GR' + str(i)) for i in range(32)]
+        self.GR = [Register('GR' + str(i), verbose) for i in range(32)]
+        # executed instruction cycles
+        self.cycles = 0
 
     # update the PC register
     def _pc_increase(self):
-        pc_bits = self.PC.get_register_bits()
-        pc_trans = bin_to_dec(pc_bits)
-        pc_trans = pc_trans + 4
-        pc_bits = dec_to_bin(pc_trans)
-        self.PC.pulse(pc_bits)
+        self.PC.pulse(self.PC.value + 4)
 
     # Instruction: Add
     def _add(self, r3_code, r1_code, r2_code):
-        r1 = self.GR[bin_to_dec(r1_code)]
-        r2 = self.GR[bin_to_dec(r2_code)]
-        r3 = self.GR[bin_to_dec(r3_code)]
+        r1 = self.GR[r1_code]
+        r2 = self.GR[r2_code]
+        r3 = self.GR[r3_code]
         # add value from r1 to r2, get new value
-        r1_bits = r1.get_register_bits()
-        print('read value from GR%d' % bin_to_dec(r1_code))
-        r2_bits = r2.get_register_bits()
-        print('read value from GR%d' % bin_to_dec(r2_code))
-        r1_trans = bin_to_dec(r1_bits)
-        r2_trans = bin_to_dec(r2_bits)
-        r_sum_trans = r1_trans + r2_trans
-        sum_bits = dec_to_bin(r_sum_trans)
-        print(str(r1_trans), '+', str(r2_trans), '=', str(r_sum_trans))
+        r1_trans = r1.value
+        r2_trans = r2.value
+        r_sum_trans = (r1_trans + r2_trans) & WORD_MASK
+        if self.verbose:
+            print('read value from GR%d' % r1_code)
+            print('read value from GR%d' % r2_code)
+            print(str(r1_trans), '+', str(r2_trans), '=', str(r_sum_trans))
         # write new value to r3
-        r3.pulse(sum_bits)
-        print('Write new value to GR%d' % bin_to_dec(r3_code))
+        r3.pulse(r_sum_trans)
+        if self.verbose:
+            print('Write new value to GR%d' % r3_code)
 
     # Instruction: Load
-    def _load(self, r_code, real_address_code):
-        self.MAR.pulse(real_address_code)
-        self.MDR.pulse(self.MM.read(self.MAR.get_register_bits()))
-        self.GR[bin_to_dec(r_code)].pulse(self.MDR.get_register_bits())
+    def _load(self, r_code, real_address):
+        self.MAR.pulse(real_address)
+        self.MDR.pulse(self.MM.read(self.MAR.value))
+        self.GR[r_code].pulse(self.MDR.value)
 
     # Instruction: Store
-    def _store(self, r_code, real_address_code):
-        self.MDR.pulse(self.GR[bin_to_dec(r_code)].get_register_bits())
-        self.MAR.pulse(real_address_code)
-        self.MM.write(self.MDR.get_register_bits(), self.MAR.get_register_bits())
+    def _store(self, r_code, real_address):
+        self.MDR.pulse(self.GR[r_code].value)
+        self.MAR.pulse(real_address)
+        self.MM.write(self.MDR.value, self.MAR.value)
 
     def _get_instruction(self):
-        print('[Get new instruction from PC]')
-        self.MAR.pulse(self.PC.get_register_bits())
-        self.MDR.pulse(self.MM.read(self.MAR.get_register_bits()))
-        self.IR.pulse(self.MDR.get_register_bits())
-        print("[New instruction has been load]")
+        if self.verbose:
+            print('[Get new instruction from PC]')
+        self.MAR.pulse(self.PC.value)
+        self.MDR.pulse(self.MM.read(self.MAR.value))
+        self.IR.pulse(self.MDR.value)
+        if self.verbose:
+            print("[New instruction has been load]")
 
     def _decode_and_execute(self):
-        ir = self.IR.get_register_bits()
-        op_code = ''.join(ir[:8])
-        if op_code == '00000100':
-            r1 = ir[8:16]
-            r2 = ir[16:24]
-            r3 = ir[24:32]
-            print("Instruction: \'Add r%d, r%d, r%d\'" % (bin_to_dec(r1), bin_to_dec(r2), bin_to_dec(r3)))
+        ir = self.IR.value
+        op_code = ir >> 24
+        if op_code == OP_ADD:
+            r1 = (ir >> 16) & 0xFF
+            r2 = (ir >> 8) & 0xFF
+            r3 = ir & 0xFF
+            if self.verbose:
+                print("Instruction: \'Add r%d, r%d, r%d\'" % (r1, r2, r3))
             self._add(r1, r2, r3)
-        if op_code == '00000010':
-            r = ir[16:24]
-            a = ir[24:32]
-            print("Instruction: \'Load r%d, #%d\'" % (bin_to_dec(r), bin_to_dec(a)))
+        elif op_code == OP_LOAD:
+            r = (ir >> 8) & 0xFF
             # Direct addressing
-            a = ['0' for _ in range(24)] + a
+            a = ir & 0xFF
+            if self.verbose:
+                print("Instruction: \'Load r%d, #%d\'" % (r, a))
             self._load(r, a)
-        if op_code == '00000011':
-            r = ir[16:24]
-            a = ir[24:32]
-            print("Instruction: \'Store r%d, #%d\'" % (bin_to_dec(r), bin_to_dec(a)))
+        elif op_code == OP_STORE:
+            r = (ir >> 8) & 0xFF
             # Direct addressing
-            a = ['0' for _ in range(24)] + a
+            a = ir & 0xFF
+            if self.verbose:
+                print("Instruction: \'Store r%d, #%d\'" % (r, a))
             self._store(r, a)
+        elif op_code == OP_HALT and self.verbose:
+            print("Instruction: \'Halt\'")
+
+    # the program ends when PC runs out of memory or points to a halt instruction
+    # (any word whose highest byte is 0, e.g. the zeroed memory after the code)
+    def program_is_end(self):
+        pc = self.PC.value
+        return pc > self.MM.cell_num - 4 or self.MM.cells[pc + 3] == OP_HALT
+
+    # one instruction cycle
+    def step(self):
+        # 取址
+        self._get_instruction()
+        # 译码,执行
+        self._decode_and_execute()
+        # 地址自增
+        self._pc_increase()
+        self.cycles += 1
+        if self.verbose:
+            print('------------------------------')
+
+    # run until halt, or until max_cycles instructions have been executed
+    # return the number of executed instructions
+    def run(self, max_cycles=None):
+        if not self.verbose:
+            return self._run_quiet(-1 if max_cycles is None else max_cycles)
+        executed = 0
+        while executed != max_cycles and not self.program_is_end():
+            self.step()
+            executed += 1
+        return executed
+
+    # the same cycles as step() in quiet mode, with the registers kept in locals
+    # until the loop ends; the final register state is the same as stepping
+    def _run_quiet(self, budget):
+        cells = self.MM.cells
+        last = self.MM.cell_num - 4
+        gr = self.GR
+        unpack_from = _word.unpack_from
+        pack_into = _word.pack_into
+        pc = self.PC.value
+        mar, mdr, ir = self.MAR.value, self.MDR.value, self.IR.value
+        executed = 0
+        try:
+            while executed != budget and pc <= last and cells[pc + 3] != OP_HALT:
+                mar = pc
+                ir = mdr = unpack_from(cells, pc)[0]
+                op_code = ir >> 24
+                if op_code == OP_ADD:
+                    gr[(ir >> 16) & 0xFF].value = (gr[(ir >> 8) & 0xFF].value + gr[ir & 0xFF].value) & WORD_MASK
+                elif op_code == OP_LOAD:
+                    mar = ir & 0xFF
+                    if mar > last:
+                        raise IndexError('Memory address out of range: %d' % mar)
+                    mdr = unpack_from(cells, mar)[0]
+                    gr[(ir >> 8) & 0xFF].value = mdr
+                elif op_code == OP_STORE:
+                    mdr = gr[(ir >> 8) & 0xFF].value
+                    mar = ir & 0xFF
+                    if mar > last:
+                        raise IndexError('Memory address out of range: %d' % mar)
+                    pack_into(cells, mar, mdr)
+                pc = (pc + 4) & WORD_MASK
+                executed += 1
+        finally:
+            # an error leaves PC on the failing instruction, as step() does
+            self.PC.value, self.MAR.value, self.MDR.value, self.IR.value = pc, mar, mdr, ir
+            self.cycles += executed
+        return executed
 
     def initialize(self):
-        print('-----initalization-----')
-        print('Initalize PC value')
-        self.PC.pulse(list('00000000000000000000000000010000'))
+        if self.verbose:
+            print('-----initalization-----')
+            print('Initalize PC value')
+        self.PC.pulse(0b00000000000000000000000000010000)
         # data
-        self.MM.write(list(dec_to_bin(37)), list(dec_to_bin(0)))
-        self.MM.write(list(dec_to_bin(1697)), list(dec_to_bin(4)))
+        self.MM.write(37, 0)
+        self.MM.write(1697, 4)
         # code
-        self.MM.write(list('00000010' + '0' * 8 + '00000001' + '00000000'), list(dec_to_bin(16)))
-        self.MM.write(list('00000010' + '0' * 8 + '00000010' + '00000100'), list(dec_to_bin(20)))
-        self.MM.write(list('00000100' + '00000011' + '00000001' + '00000010'), list(dec_to_bin(24)))
-        self.MM.write(list('00000011' + '0' * 8 + '00000011' + '00001000'), list(dec_to_bin(28)))
-        print('------------------------------')
+        self.MM.write(0b00000010_00000000_00000001_00000000, 16)
+        self.MM.write(0b00000010_00000000_00000010_00000100, 20)
+        self.MM.write(0b00000100_00000011_00000001_00000010, 24)
+        self.MM.write(0b00000011_00000000_00000011_00001000, 28)
+        if self.verbose:
+            print('------------------------------')
 
-    def main(self):
+    def main(self, max_cycles=None):
         self.initialize()
-        for i in range(4):
-            # 取址
-            self._get_instruction()
-            # 译码,执行
-            self._decode_and_execute()
-            # 地址自增
-            self._pc_increase()
-            print('------------------------------')
+        # the word after the code is 0, a halt instruction
+        return self.run(max_cycles)
 
 
 if __name__ == '__main__':
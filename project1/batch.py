@@ -0,0 +1,127 @@
+# *******************************************************
+# 简介：该模块实现了批量仿真。每个作业由一个程序(代码文件)和一份
+#      初始内存组成，作业通过ProcessPoolExecutor分发到多个进程并行
+#      执行，结果按作业的提交顺序返回，包含最终的寄存器、内存快照
+#      和执行的指令周期数。同一进程内相同的程序只汇编一次。
+#      命令行用法：
+#         python -m project1.batch jobs.json [-w 进程数] [--jit]
+#      jobs.json为作业列表，每项形如
+#         {"program": "codes.txt", "memory": {"0": 10, "1": 15}}
+#      memory的键为字地址；结果以JSON逐行输出。
+# *******************************************************
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+
+from project1.objfile import assemble_cached
+from project1.project1 import CPU, PAGE_SIZE
+
+_objects = {}  # 本进程内已汇编的程序：(代码文件, 寻址长度) -> 目标文件
+
+
+class Job:
+    """作业类"""
+
+    def __init__(self, program, memory=None):
+        """
+        :param program: 代码文件
+        :param memory: 初始内存，字地址 -> 32位整数
+        """
+        self.program = program
+        self.memory = memory if memory is not None else {}
+
+
+class JobResult:
+    """作业结果类"""
+
+    def __init__(self, index, registers, pc, cycles, pages):
+        self.index = index  # 作业序号
+        self.registers = registers  # 32个通用寄存器的最终值
+        self.pc = pc  # 最终的PC
+        self.cycles = cycles  # 执行的指令周期数
+        self.pages = pages  # 内存快照，页号 -> 页内容(bytes)，只包含分配过的页
+
+    def get_word(self, index):
+        """从内存快照中读取字地址index处的32位整数"""
+        address = index * 4
+        page = self.pages.get(address // PAGE_SIZE)
+        if page is None:
+            return 0
+        return int.from_bytes(page[address % PAGE_SIZE:address % PAGE_SIZE + 4], 'little')
+
+    def nonzero_words(self):
+        """内存快照中所有非0的字，字地址 -> 32位整数"""
+        words = {}
+        for page_number in sorted(self.pages):
+            page = self.pages[page_number]
+            for offset in range(0, PAGE_SIZE, 4):
+                value = int.from_bytes(page[offset:offset + 4], 'little')
+                if value:
+                    words[(page_number * PAGE_SIZE + offset) // 4] = value
+        return words
+
+    def to_dict(self):
+        """转为可JSON序列化的字典"""
+        return {'index': self.index, 'registers': list(self.registers), 'pc': self.pc, 'cycles': self.cycles,
+                'memory': {str(index): value for index, value in self.nonzero_words().items()}}
+
+
+def load_program(program, address_len=256):
+    """获取程序的目标文件，本进程内只汇编一次"""
+    obj = _objects.get((program, address_len))
+    if obj is None:
+        obj = _objects[(program, address_len)] = assemble_cached(program, address_len=address_len)
+    return obj
+
+
+def run_job(index, job: Job, address_len=256, jit=False):
+    """在当前进程内执行一个作业"""
+    cpu = CPU(address_len=address_len, verbose=False, init_memory=False)
+    for address, value in job.memory.items():
+        cpu.memory.write_word(int(address), value)
+    cpu.load_object(load_program(job.program, address_len))
+    if jit:
+        from project1.jit import BlockEngine
+        BlockEngine(cpu).run()
+    else:
+        cpu.execute()
+    return JobResult(index, tuple(cpu.GR.data), cpu.PC.read_int(), cpu.cycles,
+                     {number: bytes(page) for number, page in cpu.memory.pages.items()})
+
+
+def _run_indexed(args):
+    return run_job(*args)
+
+
+def run_batch(jobs, workers=None, address_len=256, jit=False):
+    """
+    并行执行一批作业
+    :param jobs: 作业列表，元素为Job或 (program, memory) 元组
+    :param workers: 进程数，默认为CPU核数；为1时在当前进程内顺序执行
+    :param address_len: 每个仿真实例的内存寻址长度
+    :param jit: 是否使用基本块翻译引擎执行
+    :return: 与jobs顺序一致的JobResult列表
+    """
+    tasks = [(index, job if isinstance(job, Job) else Job(*job), address_len, jit) for index, job in enumerate(jobs)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(tasks) <= 1:
+        return [_run_indexed(task) for task in tasks]
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_run_indexed, tasks, chunksize=chunksize))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run many project1 simulations in parallel.')
+    parser.add_argument('jobs', help='JSON file with a list of {"program": ..., "memory": {...}} jobs')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--address-len', type=int, default=256, help='memory size of each instance in bytes')
+    parser.add_argument('--jit', action='store_true', help='use the basic-block translation engine')
+    args = parser.parse_args()
+    with open(args.jobs, 'r') as f:
+        job_list = [Job(item['program'], item.get('memory')) for item in json.load(f)]
+    for result in run_batch(job_list, args.workers, args.address_len, args.jit):
+        print(json.dumps(result.to_dict()))
@@ -0,0 +1,248 @@
+# *******************************************************
+# 简介：该模块实现了可配置的多级缓存模拟器，位于指令的访存操作
+#      (mem2reg/reg2mem)与MyMemory之间。缓存只模拟标签、替换与脏位，
+#      数据始终读写MyMemory，因此接入缓存不会改变程序的执行结果，
+#      只额外给出命中/缺失/替换统计和访存延迟。每一级缓存可以配置：
+#         size           容量(字节)
+#         line_size      行大小(字节)，须为4的倍数
+#         associativity  相联度，1为直接映射
+#         replacement    替换策略：lru / fifo / random
+#         write_back     写回(True)或写直达(False)
+#         write_allocate 写缺失时是否分配缓存行，默认与write_back相同
+#         hit_latency    命中延迟(周期)
+#      用法：
+#         hierarchy = CacheHierarchy.from_config(cpu.memory, [
+#             {'name': 'L1', 'size': 64, 'line_size': 16, 'associativity': 2},
+#             {'name': 'L2', 'size': 256, 'line_size': 32, 'associativity': 4,
+#              'replacement': 'fifo', 'hit_latency': 10},
+#         ])
+#         cpu.attach_cache(hierarchy)
+#         ...
+#         print(hierarchy.report())
+#      取指不经过该缓存(相当于独立的指令缓存)。
+# *******************************************************
+
+import random
+
+REPLACEMENT_POLICIES = ('lru', 'fifo', 'random')  # 支持的替换策略
+
+
+class Cache:
+    """单级组相联缓存类"""
+
+    def __init__(self, name, size, line_size=16, associativity=1, replacement='lru', write_back=True,
+                 write_allocate=None, hit_latency=1, seed=None):
+        """
+        :param name: 缓存名称，用于报告
+        :param size: 容量(字节)
+        :param line_size: 行大小(字节)
+        :param associativity: 相联度
+        :param replacement: 替换策略，lru / fifo / random
+        :param write_back: True为写回，False为写直达
+        :param write_allocate: 写缺失时是否分配，None表示写回时分配、写直达时不分配
+        :param hit_latency: 命中延迟(周期)
+        :param seed: random替换策略的随机种子
+        """
+        if line_size <= 0 or line_size % 4:
+            raise Exception(r"Cache line size must be a positive multiple of 4!")
+        if associativity <= 0 or size <= 0 or size % (line_size * associativity):
+            raise Exception(r"Cache size must be a multiple of line_size * associativity!")
+        if replacement not in REPLACEMENT_POLICIES:
+            raise Exception(r"Unknown replacement policy: %s" % replacement)
+        self.name = name
+        self.size = size
+        self.line_size = line_size
+        self.associativity = associativity
+        self.replacement = replacement
+        self.write_back = write_back
+        self.write_allocate = write_back if write_allocate is None else write_allocate
+        self.hit_latency = hit_latency
+        self.set_count = size // (line_size * associativity)  # 组数
+        self.sets = [{} for _ in range(self.set_count)]  # 每组：标签 -> 脏位，字典顺序即替换顺序
+        self.random = random.Random(seed)
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        """清零统计数据"""
+        self.reads = 0  # 读访问次数
+        self.writes = 0  # 写访问次数
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 缺失次数
+        self.evictions = 0  # 替换出的行数
+        self.writebacks = 0  # 替换出的脏行数(写回下一级)
+        self.reads_below = 0  # 向下一级发出的读(行填充)次数
+        self.writes_below = 0  # 向下一级发出的写次数
+
+    def flush(self):
+        """清空缓存内容，返回需要写回下一级的脏行地址列表"""
+        below = []
+        for set_index, ways in enumerate(self.sets):
+            for tag, dirty in ways.items():
+                if dirty:
+                    self.writebacks += 1
+                    self.writes_below += 1
+                    below.append((tag * self.set_count + set_index) * self.line_size)
+            ways.clear()
+        return below
+
+    def access(self, address, write=False):
+        """
+        访问字节地址address
+        :return: (是否命中, 需要从下一级读取的行地址或None, 需要写入下一级的地址列表)
+        """
+        line = address // self.line_size
+        ways = self.sets[line % self.set_count]
+        tag = line // self.set_count
+        if write:
+            self.writes += 1
+        else:
+            self.reads += 1
+        if tag in ways:
+            self.hits += 1
+            if self.replacement == 'lru':
+                ways[tag] = ways.pop(tag)  # 移到最近使用的位置
+            if write:
+                if self.write_back:
+                    ways[tag] = True
+                else:
+                    self.writes_below += 1
+                    return True, None, [address]
+            return True, None, []
+        self.misses += 1
+        if write and not self.write_allocate:
+            self.writes_below += 1
+            return False, None, [address]
+        below = []
+        if len(ways) >= self.associativity:
+            if self.replacement == 'random':
+                victim = self.random.choice(list(ways))
+            else:
+                victim = next(iter(ways))  # lru与fifo都替换最早的一项
+            self.evictions += 1
+            if ways.pop(victim):
+                self.writebacks += 1
+                self.writes_below += 1
+                below.append((victim * self.set_count + line % self.set_count) * self.line_size)
+        self.reads_below += 1
+        ways[tag] = write and self.write_back
+        if write and not self.write_back:
+            self.writes_below += 1
+            below.append(address)
+        return False, line * self.line_size, below
+
+    def report(self):
+        """返回统计结果"""
+        accesses = self.reads + self.writes
+        return {
+            'name': self.name,
+            'accesses': accesses,
+            'reads': self.reads,
+            'writes': self.writes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / accesses if accesses else 0.0,
+            'evictions': self.evictions,
+            'writebacks': self.writebacks,
+            'reads_below': self.reads_below,
+            'writes_below': self.writes_below,
+        }
+
+
+class CacheHierarchy:
+    """
+    多级缓存类，提供与MyMemory相同的get_word/write_word接口，
+    其余属性和方法(get_data、address_len、写入监听器等)直接转发给MyMemory
+    """
+
+    def __init__(self, memory, levels, memory_latency=100):
+        """
+        :param memory: 主存，MyMemory对象
+        :param levels: Cache对象列表，按L1、L2……排列
+        :param memory_latency: 访问主存的延迟(周期)
+        """
+        if not levels:
+            raise Exception(r"A cache hierarchy needs at least one level!")
+        self.memory = memory
+        self.levels = list(levels)
+        self.memory_latency = memory_latency
+        self.reset_statistics()
+
+    @classmethod
+    def from_config(cls, memory, config, memory_latency=100):
+        """由配置字典列表构建，每项为Cache的关键字参数"""
+        return cls(memory, [Cache(**level) for level in config], memory_latency)
+
+    def __getattr__(self, name):
+        return getattr(self.memory, name)
+
+    def reset_statistics(self):
+        """清零统计数据"""
+        self.latency = 0  # 访存总延迟(周期)
+        self.accesses = 0  # 访存次数
+        self.memory_reads = 0  # 主存读(行填充)次数
+        self.memory_writes = 0  # 主存写次数
+        for level in self.levels:
+            level.reset_statistics()
+
+    def write_below(self, depth, addresses):
+        """将第depth级发出的写入传递到下一级，写入被视为经过写缓冲，不计延迟"""
+        for address in addresses:
+            if depth + 1 < len(self.levels):
+                _, fill, below = self.levels[depth + 1].access(address, True)
+                if fill is not None:
+                    self.read_below(depth + 1, fill)
+                self.write_below(depth + 1, below)
+            else:
+                self.memory_writes += 1
+
+    def read_below(self, depth, address):
+        """第depth级缺失时从下一级读取行，返回延迟"""
+        if depth + 1 == len(self.levels):
+            self.memory_reads += 1
+            return self.memory_latency
+        level = self.levels[depth + 1]
+        hit, fill, below = level.access(address, False)
+        latency = level.hit_latency
+        if fill is not None:
+            latency += self.read_below(depth + 1, fill)
+        self.write_below(depth + 1, below)
+        return latency
+
+    def access(self, address, write=False):
+        """通过L1访问字节地址address，返回本次访问的延迟"""
+        level = self.levels[0]
+        hit, fill, below = level.access(address, write)
+        latency = level.hit_latency
+        if fill is not None:
+            latency += self.read_below(0, fill)
+        self.write_below(0, below)
+        self.accesses += 1
+        self.latency += latency
+        return latency
+
+    def get_word(self, index):
+        """经过缓存读取字地址index处的32位整数"""
+        self.access(index * 4)
+        return self.memory.get_word(index)
+
+    def write_word(self, index, value, is_program=False):
+        """经过缓存向字地址index写入32位整数，程序写入(装载代码)不经过缓存"""
+        if not is_program:
+            self.access(index * 4, True)
+        self.memory.write_word(index, value, is_program)
+
+    def flush(self):
+        """清空各级缓存，脏行逐级写回"""
+        for depth, level in enumerate(self.levels):
+            self.write_below(depth, level.flush())
+
+    def report(self):
+        """返回各级缓存与整体的统计结果"""
+        return {
+            'levels': [level.report() for level in self.levels],
+            'accesses': self.accesses,
+            'latency': self.latency,
+            'average_latency': self.latency / self.accesses if self.accesses else 0.0,
+            'memory_reads': self.memory_reads,
+            'memory_writes': self.memory_writes,
+        }
@@ -0,0 +1,98 @@
+# *******************************************************
+# 简介：该模块实现了内存转储。内存按块(默认64 KiB)读出，每块一次性
+#      格式化：字节到字符串的转换通过预先计算的256项表完成，整块
+#      拼接后再按行切分，不对每个字节单独补0或调用print。支持的格式：
+#         hex    地址  16进制字节  |ASCII|
+#         bin    地址  2进制字节
+#         ascii  地址  ASCII字符，不可打印字符显示为 .
+#         cells  每行一个单元的2进制字符串，每4个单元(一个字)之后空一行，
+#                与原先CPU.show_memory的输出相同
+#      结果可以返回为字符串，也可以逐块写入文件，内存大小不受限制。
+# *******************************************************
+
+BIN_TABLE = tuple(format(i, '08b') for i in range(256))  # 字节 -> 8位2进制字符串
+ASCII_TABLE = bytes(i if 0x20 <= i < 0x7F else 0x2E for i in range(256))  # 字节 -> 可打印字符
+MODES = ('hex', 'bin', 'ascii', 'cells')  # 支持的格式
+CHUNK_SIZE = 1 << 16  # 每次读出并格式化的字节数
+
+
+def format_chunk(data, address=0, mode='hex', width=16):
+    """
+    将一段字节格式化为文本
+    :param data: bytes类对象
+    :param address: data第一个字节的地址
+    :param mode: 格式，见MODES
+    :param width: hex/bin/ascii格式下每行的字节数
+    :return: 以换行结尾的字符串，data为空时返回空字符串
+    """
+    if not data:
+        return ''
+    data = bytes(data)
+    length = len(data)
+    if mode == 'cells':
+        if address % 4 == 0 and length % 4 == 0:
+            return _group_cells('\n'.join(map(BIN_TABLE.__getitem__, data)) + '\n')
+        return ''.join(BIN_TABLE[byte] + ('\n\n' if (address + i) % 4 == 3 else '\n') for i, byte in enumerate(data))
+    if mode == 'hex':
+        body, step = data.hex(' ') + ' ', 3
+    elif mode == 'bin':
+        body, step = ' '.join(map(BIN_TABLE.__getitem__, data)) + ' ', 9
+    elif mode == 'ascii':
+        body, step = data.translate(ASCII_TABLE).decode('ascii'), 1
+    else:
+        raise Exception(r"Unknown dump mode: %s" % mode)
+    span = width * step  # 每行正文的字符数
+    lines = []
+    if mode == 'hex':
+        text = data.translate(ASCII_TABLE).decode('ascii')
+        for offset in range(0, length, width):
+            row = body[offset * step:offset * step + span - 1]
+            lines.append('%08x  %-*s  |%s|' % (address + offset, span - 1, row, text[offset:offset + width]))
+    else:
+        for offset in range(0, length, width):
+            lines.append('%08x  %s' % (address + offset, body[offset * step:offset * step + span].rstrip(' ')))
+    return '\n'.join(lines) + '\n'
+
+
+def _group_cells(text):
+    """cells格式：每4行(一个字)之后插入一个空行，text中每行为一个单元"""
+    cell_line = 9  # 8位2进制字符串加换行
+    word_chars = cell_line * 4
+    return '\n'.join(text[i:i + word_chars] for i in range(0, len(text), word_chars)) + '\n'
+
+
+def iter_dump(memory, start=0, end=None, mode='hex', width=16, chunk_size=CHUNK_SIZE):
+    """
+    逐块生成内存转储文本
+    :param memory: MyMemory对象(通过read_bytes读取)，或bytes类对象
+    :param start: 起始字节地址
+    :param end: 结束字节地址(不含)，默认为内存末尾
+    """
+    if mode not in MODES:
+        raise Exception(r"Unknown dump mode: %s" % mode)
+    if end is None:
+        end = memory.address_len if hasattr(memory, 'read_bytes') else len(memory)
+    step = width if mode != 'cells' else 4
+    chunk_size = max(step, chunk_size - chunk_size % step)  # 块大小为整行的倍数，保证行不跨块
+    for address in range(start, end, chunk_size):
+        size = min(chunk_size, end - address)
+        if hasattr(memory, 'read_bytes'):
+            data = memory.read_bytes(address, size)
+        else:
+            data = memory[address:address + size]
+        yield format_chunk(data, address, mode, width)
+
+
+def dump(memory, start=0, end=None, mode='hex', width=16, file=None):
+    """
+    转储一段内存
+    :param file: None时返回字符串；否则为文件名或可写的文本文件对象，逐块写入
+    """
+    chunks = iter_dump(memory, start, end, mode, width)
+    if file is None:
+        return ''.join(chunks)
+    if isinstance(file, str):
+        with open(file, 'w') as f:
+            f.writelines(chunks)
+    else:
+        file.writelines(chunks)
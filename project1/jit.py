@@ -0,0 +1,205 @@
+# *******************************************************
+# 简介：该模块实现了基本块翻译引擎。从当前PC开始找出一段直线执行的
+#      基本块，调用各指令类的translate方法将其翻译为Python源码，
+#      再编译为一个函数，一次调用即可完成整个基本块对寄存器和内存
+#      的修改，函数返回下一条指令的地址。
+#      翻译结果按起始地址缓存；某地址被执行的次数达到翻译阈值之前，
+#      从该地址开始的直线代码都解释执行(CPU.step)，无法翻译的指令
+#      同样回退到解释执行。基本块中的内存写入若
+#      命中了已翻译的代码(自修改代码)，则相应的基本块被丢弃，当前
+#      基本块在该写入之后立即返回，由引擎重新取指。
+#      跳转指令结束基本块，函数按条件返回跳转目标或顺序的下一条地址；
+#      CPU接入了分支预测器时，翻译结果中每条跳转都会调用预测器统计；
+#      翻译结果直接绑定了访存对象(内存或缓存)与预测器，CPU更换缓存
+#      或预测器后已翻译的基本块全部丢弃。
+# *******************************************************
+
+from project1.alu import to_signed
+from project1.project1 import CPU, REGISTER_COUNT, WORD_MASK, branch_offset, decode
+
+HOT_THRESHOLD = 16  # 默认的翻译阈值：翻译一条指令的开销约等于解释执行它6~10次，只执行十几遍的代码不值得翻译
+
+
+class BlockEngine:
+    """基本块翻译引擎类"""
+
+    def __init__(self, cpu: CPU, max_block_len=64, hot_threshold=HOT_THRESHOLD):
+        """
+        :param cpu: 要执行的CPU对象，须已载入程序并初始化PC
+        :param max_block_len: 单个基本块的最大指令数
+        :param hot_threshold: 某地址被解释执行多少次之后才翻译，0表示首次遇到即翻译
+        """
+        self.cpu = cpu
+        self.max_block_len = max_block_len
+        self.hot_threshold = hot_threshold
+        self.blocks = {}  # 基本块起始地址 -> (翻译后的函数, 指令数)
+        self.covered = {}  # 字地址 -> 覆盖该地址的基本块起始地址集合
+        self.counters = {}  # 未翻译地址的解释执行次数
+        self.modified = [False]  # 基本块执行期间是否发生了自修改写入
+        self.translated = 0  # 已翻译的基本块数量
+        self.block_runs = 0  # 基本块执行次数
+        self.interpreted = 0  # 解释执行的指令数
+        self.predictor = cpu.predictor  # 翻译时使用的分支预测器
+        self.data_memory = cpu.data_memory  # 翻译时绑定的访存对象
+        self.cpu.memory.add_write_listener(self.invalidate)
+
+    def invalidate(self, index=None):
+        """内存写入监听器：丢弃覆盖了index的基本块，index为None时丢弃全部基本块"""
+        if index is None:
+            self.blocks.clear()
+            self.covered.clear()
+            self.modified[0] = True
+            return
+        starts = self.covered.pop(index, None)
+        if starts:
+            for start in starts:
+                self.blocks.pop(start, None)
+            self.modified[0] = True
+
+    def translatable(self, instruction, operands, address):
+        """
+        指令能否翻译：自修改代码可能产生r32~r255等不存在的寄存器，解释执行时读出None、写入被忽略，
+        翻译后的g[i]则会越界，因此这类指令留给解释执行
+        """
+        for group in instruction.registers(operands):
+            if any(register >= REGISTER_COUNT for register in group):
+                return False
+        return instruction.is_branch or instruction.translate_at(operands, True, address) is not None
+
+    def translate(self, pc):
+        """翻译从pc开始的基本块，返回 (函数, 指令数)，无法翻译时返回None"""
+        memory = self.cpu.memory
+        instructions = self.cpu.instructions
+        entries = []
+        address = pc
+        while address * 4 < memory.address_len and len(entries) < self.max_block_len:
+            op_code, des, src1, src2 = decode(memory.get_word(address))
+            instruction = instructions.get_by_code(op_code)
+            entries.append((address, instruction, [des, src1, src2]))
+            address += 1
+            if instruction is not None and instruction.is_branch:
+                break  # 跳转指令结束基本块
+        # 基本块在第一条无法翻译的指令之前结束
+        for i, (address, instruction, operands) in enumerate(entries):
+            if instruction is not None and not self.translatable(instruction, operands, address):
+                del entries[i:]
+                break
+        # 只有每个出口(写内存后的自修改检查与基本块末尾)之前最后一条更新标志位的指令
+        # 需要真正更新标志位，其余的标志位在到达出口之前都会被覆盖
+        set_flags = set()
+        pending = True
+        for i in range(len(entries) - 1, -1, -1):
+            instruction = entries[i][1]
+            if instruction is None:
+                continue
+            if instruction.writes_memory:
+                pending = True
+            if instruction.sets_flags and pending:
+                set_flags.add(i)
+                pending = False
+        lines = []
+        end = pc
+        for i, (address, instruction, operands) in enumerate(entries):
+            if instruction is None:
+                # 无法识别的指令与解释执行时一样视为空操作
+                end = address + 1
+                continue
+            if instruction.is_branch and self.predictor is not None:
+                target = address + branch_offset(operands[0], operands[1], operands[2])
+                code = ['taken = %s' % instruction.taken_source(),
+                        'predict(%d, taken, %d)' % (address, target),
+                        'if taken:',
+                        '    return %d' % target]
+            else:
+                code = instruction.translate_at(operands, i in set_flags, address)
+            lines.extend(code)
+            end = address + 1
+            if instruction.writes_memory:
+                lines.append('if modified[0]:')
+                lines.append('    return %d' % end)
+        if end == pc:
+            return None
+        source = 'def make(g, get_word, write_word, alu, to_signed, M, modified, predict):\n'
+        source += '    def block():\n'
+        source += ''.join('        %s\n' % line for line in lines)
+        source += '        return %d\n' % end
+        source += '    return block\n'
+        namespace = {}
+        exec(compile(source, '<block %d>' % pc, 'exec'), namespace)
+        data_memory = self.data_memory  # 指令访存经过的对象(内存或缓存)
+        predict = self.predictor.update if self.predictor is not None else None
+        block = namespace['make'](self.cpu.GR.data, data_memory.get_word, data_memory.write_word, self.cpu.ALU,
+                                  to_signed, WORD_MASK, self.modified, predict), end - pc
+        self.blocks[pc] = block
+        for address in range(pc, end):
+            self.covered.setdefault(address, set()).add(pc)
+        self.translated += 1
+        return block
+
+    def interpret(self, limit=None):
+        """
+        解释执行从当前PC开始的一段直线代码，直到发生跳转、程序结束、执行了max_block_len条指令
+        或指令周期数达到limit；只有起始地址计入翻译阈值，省去逐条查找基本块的开销
+        """
+        cpu = self.cpu
+        PC = cpu.PC
+        step = cpu.step
+        pc = PC.read_int()
+        end = pc + self.max_block_len
+        if limit is not None:
+            end = min(end, pc + limit - cpu.cycles)
+        start = pc
+        while pc < end and not cpu.program_is_end():
+            step()
+            pc += 1
+            if PC.read_int() != pc:
+                break
+        self.interpreted += pc - start
+
+    def run(self, max_cycles=None):
+        """
+        从当前PC开始执行，直到程序结束
+        :param max_cycles: 最多执行的指令周期数，为None时不限制；剩余周期不足一个基本块时
+                           逐条解释执行，因此与CPU.execute(max_cycles)停在同一条指令处
+        """
+        cpu = self.cpu
+        PC = cpu.PC
+        blocks = self.blocks
+        modified = self.modified
+        if self.predictor is not cpu.predictor or self.data_memory is not cpu.data_memory:
+            self.invalidate()  # 已翻译的基本块按旧的预测器或访存对象生成
+            self.predictor = cpu.predictor
+            self.data_memory = cpu.data_memory
+        limit = None if max_cycles is None else cpu.cycles + max_cycles
+        while not cpu.program_is_end():
+            if limit is not None and cpu.cycles >= limit:
+                break
+            pc = PC.read_int()
+            block = blocks.get(pc)
+            if block is None:
+                count = self.counters.get(pc, 0)
+                if count < self.hot_threshold:
+                    self.counters[pc] = count + 1
+                    self.interpret(limit)
+                    continue
+                block = self.translate(pc)
+                if block is None:
+                    cpu.step()  # 回退到解释执行
+                    self.interpreted += 1
+                    continue
+            function, length = block
+            if limit is not None and cpu.cycles + length > limit:
+                cpu.step()  # 剩余周期不足整个基本块
+                self.interpreted += 1
+                continue
+            modified[0] = False
+            next_pc = function()
+            PC.write_int(next_pc)
+            # 因自修改提前返回时只执行了next_pc - pc条指令
+            cpu.cycles += next_pc - pc if modified[0] else length
+            self.block_runs += 1
+
+    def close(self):
+        """丢弃全部基本块并注销写入监听器"""
+        self.invalidate()
+        self.cpu.memory.remove_write_listener(self.invalidate)
@@ -0,0 +1,189 @@
+# *******************************************************
+# 简介：该模块定义了汇编器的输出格式(目标文件)，使程序只需汇编一次
+#      即可多次载入。目标文件由文件头、代码段、数据段和符号表组成，
+#      所有整数均为小端序：
+#         文件头   magic(4B) 版本(2B) 保留(2B) 代码字数(4B)
+#                  代码段基址(字地址,4B，0xFFFFFFFF表示放在内存末尾)
+#                  数据段基址(字地址,4B) 数据段字节数(4B) 符号数(4B)
+#         代码段   代码字数 * 4 字节，与内存中的布局完全相同
+#         数据段   数据段字节数
+#         符号表   每项为 段(1B) 值(4B) 名称长度(2B) 名称(UTF-8)
+#      汇编时代码段按内存末尾布局，跳转指令按相对偏移编码，其它指令
+#      引用的标号被解析为绝对地址，因此目标文件与内存大小相关。载入时目标文件通过mmap映射，代码段和数据
+#      段各只复制一次到内存。assemble_cached按源码内容、内存大小与
+#      指令集的哈希缓存汇编结果，源码未变化时直接载入缓存的目标文件，
+#      跳过汇编。
+# *******************************************************
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+
+from project1.project1 import ISA, Translater, isa_tables
+
+MAGIC = b'P1OB'  # 目标文件标识
+VERSION = 3  # 目标文件格式版本，3起跳转按相对偏移编码
+SECTION_CODE = 0  # 符号所在段：代码段，值为字地址
+SECTION_DATA = 1  # 符号所在段：数据段，值为字地址
+NO_BASE = 0xFFFFFFFF  # 代码段基址未指定
+CACHE_DIR_NAME = '__p1cache__'  # 默认缓存目录名，位于源文件所在目录下
+_header = struct.Struct('<4sHHIIIII')
+_word = struct.Struct('<I')
+_symbol = struct.Struct('<BIH')
+_isa_fingerprint = None  # (分派表, 指纹)，注册新指令后分派表重建，指纹随之重新计算
+
+
+class ObjectFile:
+    """目标文件类"""
+
+    def __init__(self, code=b'', data=b'', data_base=0, symbols=None, code_base=None):
+        """
+        :param code: 代码段字节，按小端序存放的机器码
+        :param code_base: 代码段载入的字地址，为None时载入到内存末尾
+        :param data: 数据段字节
+        :param data_base: 数据段载入的字地址
+        :param symbols: 符号表，名称 -> (段, 值)
+        """
+        if len(code) % 4:
+            raise Exception(r"Code section must be word aligned!")
+        self.code = code
+        self.code_base = code_base
+        self.data = data
+        self.data_base = data_base
+        self.symbols = symbols if symbols is not None else {}
+
+    @property
+    def code_words(self):
+        """代码段包含的指令数"""
+        return len(self.code) // 4
+
+    @classmethod
+    def from_machine_codes(cls, machine_codes, data=b'', data_base=0, symbols=None, code_base=None):
+        """由机器码列表构建目标文件"""
+        code = struct.pack('<%dI' % len(machine_codes), *machine_codes)
+        return cls(code, data, data_base, symbols, code_base)
+
+    def machine_codes(self):
+        """返回代码段的机器码列表"""
+        return list(struct.unpack('<%dI' % self.code_words, self.code))
+
+    def to_bytes(self):
+        """序列化为目标文件格式"""
+        code_base = NO_BASE if self.code_base is None else self.code_base
+        parts = [_header.pack(MAGIC, VERSION, 0, self.code_words, code_base, self.data_base, len(self.data),
+                              len(self.symbols)),
+                 bytes(self.code), bytes(self.data)]
+        for name, (section, value) in sorted(self.symbols.items()):
+            encoded = name.encode('utf-8')
+            parts.append(_symbol.pack(section, value, len(encoded)))
+            parts.append(encoded)
+        return b''.join(parts)
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """从目标文件内容解析，代码段与数据段以memoryview引用buffer，不做复制"""
+        view = memoryview(buffer)
+        if len(view) < _header.size:
+            raise Exception(r"Object file truncated!")
+        magic, version, _, code_words, code_base, data_base, data_bytes, symbol_count = _header.unpack_from(view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception(r"Not a version %d object file!" % VERSION)
+        offset = _header.size
+        code = view[offset:offset + code_words * 4]
+        offset += code_words * 4
+        data = view[offset:offset + data_bytes]
+        offset += data_bytes
+        if len(code) != code_words * 4 or len(data) != data_bytes:
+            raise Exception(r"Object file truncated!")
+        symbols = {}
+        for _ in range(symbol_count):
+            section, value, name_len = _symbol.unpack_from(view, offset)
+            offset += _symbol.size
+            symbols[bytes(view[offset:offset + name_len]).decode('utf-8')] = (section, value)
+            offset += name_len
+        return cls(code, data, data_base, symbols, None if code_base == NO_BASE else code_base)
+
+    def save(self, file_name):
+        """写入目标文件，先写临时文件再替换，避免并发读取到不完整的文件"""
+        tmp_name = '%s.%d.tmp' % (file_name, os.getpid())
+        with open(tmp_name, 'wb') as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_name, file_name)
+
+    @classmethod
+    def load(cls, file_name):
+        """通过mmap映射目标文件并解析"""
+        with open(file_name, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.from_buffer(buffer)
+
+
+def isa_fingerprint():
+    """指令集指纹，指令集变化时缓存的目标文件自动失效"""
+    global _isa_fingerprint
+    tables = isa_tables()
+    if _isa_fingerprint is None or _isa_fingerprint[0] is not tables:
+        description = ';'.join('%s=%s' % (instruction_class.instruction_name, instruction_class.instruction_code)
+                               for instruction_class in ISA)
+        _isa_fingerprint = tables, ('%d;%s' % (VERSION, description)).encode('utf-8')
+    return _isa_fingerprint[1]
+
+
+def assemble(file_name, address_len=256, tracer=None):
+    """
+    流式汇编代码文件，代码段按寻址长度为address_len的内存末尾布局
+    :return: 目标文件对象，符号表包含全部标号及代码段入口_start
+    """
+    translater = Translater(None)
+    base = address_len // 4 - translater.count_instructions(file_name)
+    if base < 0:
+        raise Exception(r"Program does not fit into %d bytes of memory!" % address_len)
+    code = bytearray()
+
+    def write_word(address, machine_code):
+        offset = (address - base) * 4
+        if offset == len(code):
+            code.extend(_word.pack(machine_code))
+        else:
+            _word.pack_into(code, offset, machine_code)  # 回填
+    translater.assemble(file_name, base, write_word, tracer)
+    symbols = {name: (SECTION_CODE, address) for name, address in translater.labels.items()}
+    symbols.setdefault('_start', (SECTION_CODE, base))
+    return ObjectFile(bytes(code), symbols=symbols, code_base=base)
+
+
+def assemble_cached(file_name, cache_dir=None, tracer=None, address_len=256):
+    """
+    按内容哈希缓存汇编结果
+    :param file_name: 代码文件
+    :param cache_dir: 缓存目录，默认为源文件所在目录下的__p1cache__
+    :param tracer: 跟踪器，仅在实际汇编时使用
+    :param address_len: 目标内存的寻址长度
+    :return: 目标文件对象
+    """
+    with open(file_name, 'rb') as f:
+        source = f.read()
+    key = hashlib.sha256(isa_fingerprint() + b'\0%d\0' % address_len + source).hexdigest()
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(file_name)), CACHE_DIR_NAME)
+    cache_name = os.path.join(cache_dir, key + '.p1o')
+    if os.path.exists(cache_name):
+        return ObjectFile.load(cache_name)
+    obj = assemble(file_name, address_len, tracer)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        obj.save(cache_name)
+    except OSError:
+        pass  # 缓存目录不可写时只是无法复用，不影响本次结果
+    return obj
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Assemble a source file into a project1 object file.')
+    parser.add_argument('source', help='assembly source file')
+    parser.add_argument('-o', '--output', help='output object file (default: <source>.p1o)')
+    parser.add_argument('--address-len', type=int, default=256, help='memory size the code is laid out for')
+    args = parser.parse_args()
+    assemble(args.source, args.address_len).save(args.output or os.path.splitext(args.source)[0] + '.p1o')
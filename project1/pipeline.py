@@ -0,0 +1,192 @@
+# *******************************************************
+# 简介：该模块实现了经典的5级流水线时序模型(IF/ID/EX/MEM/WB)，
+#      用于估算程序在流水线处理器上的CPI。
+#         IF   按PC取指：MAR <- PC，MDR <- 内存，IR <- MDR，PC自增
+#         ID   译码并检测数据相关
+#         EX   调用指令类的execute完成指令的功能
+#         MEM  访存指令的结果在本阶段结束时可用
+#         WB   写回，前半周期写、后半周期读，与ID阶段不冲突
+#      指令按程序顺序在进入EX时执行，因此功能结果与串行执行完全一致，
+#      停顿与冲刷只影响时序。数据相关的处理：
+#         开启转发时，只有紧跟在Load之后使用其结果(load-use)需要停顿1拍；
+#         关闭转发时，使用EX或MEM阶段中尚未写回的结果都需要停顿。
+#      Store写入了已进入IF/ID阶段的指令地址(自修改代码)时，冲刷IF/ID
+#      并从被冲刷的最早指令处重新取指。
+#      跳转指令在IF阶段按CPU接入的分支预测器(未接入时总是预测不跳转)
+#      选择下一条取指地址，在EX阶段确定实际结果；预测错误时冲刷IF/ID
+#      并从实际的下一条指令处重新取指，每次误预测损失被冲刷的周期。
+#      标志位作为一个寄存器参与数据相关检测。
+# *******************************************************
+
+from project1.project1 import CPU, branch_offset, decode
+
+STAGES = ('IF', 'ID', 'EX', 'MEM', 'WB')  # 流水线各阶段名称
+
+
+class Slot:
+    """流水线锁存器中的一条指令"""
+
+    def __init__(self, address, instruction, operands):
+        self.address = address  # 指令地址
+        self.instruction = instruction  # 指令对象，无法识别的指令为None(空操作)
+        self.operands = operands  # [des, src1, src2]
+        self.predicted = None  # 跳转指令：取指时预测的下一条指令地址
+        if instruction is None:
+            self.reads, self.writes = (), ()
+        else:
+            self.reads, self.writes = instruction.registers(operands)
+
+
+class Pipeline:
+    """5级流水线模型类"""
+
+    def __init__(self, cpu: CPU, forwarding=True):
+        """
+        :param cpu: 要执行的CPU对象，须已载入程序并初始化PC
+        :param forwarding: 是否开启数据转发
+        """
+        self.cpu = cpu
+        self.forwarding = forwarding
+        self.latches = dict.fromkeys(STAGES)  # 各阶段当前的指令，None为气泡
+        self.occupancy = dict.fromkeys(STAGES, 0)  # 各阶段有效指令占用的周期数
+        self.cycles = 0  # 流水线周期数
+        self.retired = 0  # 完成写回的指令数
+        self.stalls = 0  # 因数据相关停顿的周期数
+        self.forwards = 0  # 通过转发解决的数据相关次数
+        self.flushes = 0  # 冲刷次数
+        self.flushed = 0  # 被冲刷的指令数
+        self.flush_request = False  # 本周期EX阶段的写入是否命中了IF/ID中的指令
+        self.branches = 0  # 执行的跳转指令数
+        self.mispredictions = 0  # 误预测次数
+        self.branch_flushed = 0  # 因误预测被冲刷的指令数
+        self.cpu.memory.add_write_listener(self.check_fetched)
+
+    def check_fetched(self, index):
+        """内存写入监听器：写入地址已被取入IF/ID时请求冲刷"""
+        for stage in ('IF', 'ID'):
+            slot = self.latches[stage]
+            if slot is not None and (index is None or slot.address == index):
+                self.flush_request = True
+
+    def fetch(self):
+        """IF阶段：取指并使PC自增，程序结束后返回None"""
+        cpu = self.cpu
+        if cpu.program_is_end():
+            return None
+        address = cpu.PC.read_int()
+        cpu.MAR.write_int(address)  # 读取PC寄存器中的代码地址
+        cpu.MDR.write_int(cpu.memory.get_word(address))  # 从内存中读取数据到MDR寄存器
+        cpu.IR.write_int(cpu.MDR.read_int())  # 将MDR寄存器的数据写入IR寄存器
+        op_code, des, src1, src2 = decode(cpu.IR.read_int())
+        slot = Slot(address, cpu.instructions.get_by_code(op_code), [des, src1, src2])
+        next_pc = address + 1
+        if slot.instruction is not None and slot.instruction.is_branch:
+            if cpu.predictor is not None:
+                next_pc = cpu.predictor.predict(address, address + branch_offset(des, src1, src2))
+            slot.predicted = next_pc
+        cpu.PC.write_int(next_pc)
+        return slot
+
+    def hazard(self, slot: Slot):
+        """检测ID阶段的指令是否必须停顿"""
+        if not slot.reads:
+            return False
+        for stage in ('EX', 'MEM'):
+            producer = self.latches[stage]
+            if producer is None or not producer.writes:
+                continue
+            if any(register in producer.writes for register in slot.reads):
+                if not self.forwarding:
+                    return True
+                if stage == 'EX' and producer.instruction.reads_memory:
+                    return True  # load-use：Load的结果在MEM阶段结束时才可用
+                self.forwards += 1
+        return False
+
+    def clock(self):
+        """推进一个周期：各阶段指令前移，WB阶段的指令在本周期完成"""
+        latches = self.latches
+        self.cycles += 1
+        decoded = latches['ID']
+        stall = decoded is not None and self.hazard(decoded)
+        latches['WB'] = latches['MEM']
+        latches['MEM'] = latches['EX']
+        if stall:
+            latches['EX'] = None  # 插入气泡，IF/ID保持不变
+            self.stalls += 1
+        else:
+            latches['EX'] = decoded
+            latches['ID'] = latches['IF']
+            latches['IF'] = self.fetch()
+        for stage in STAGES:
+            if latches[stage] is not None:
+                self.occupancy[stage] += 1
+        if latches['WB'] is not None:
+            self.retired += 1
+            self.cpu.cycles += 1
+        if not stall and decoded is not None and decoded.instruction is not None:
+            self.flush_request = False
+            offset = decoded.instruction.execute(decoded.operands)
+            if decoded.instruction.is_branch:
+                self.resolve(decoded, None if offset is None else decoded.address + offset)
+            elif self.flush_request:
+                self.flush()
+
+    def resolve(self, slot: Slot, target):
+        """EX阶段确定跳转结果，与取指时的预测不符时冲刷IF/ID"""
+        self.branches += 1
+        actual = slot.address + 1 if target is None else target
+        predictor = self.cpu.predictor
+        if predictor is not None:
+            predictor.update(slot.address, target is not None, slot.address + branch_offset(*slot.operands),
+                             slot.predicted)
+        if actual != slot.predicted:
+            self.mispredictions += 1
+            flushed = self.flushed
+            self.flush(actual)
+            self.branch_flushed += self.flushed - flushed
+
+    def flush(self, restart=None):
+        """冲刷IF/ID阶段，并从restart处重新取指，restart为None时从被冲刷的最早指令处重新取指"""
+        for stage in ('ID', 'IF'):
+            slot = self.latches[stage]
+            if slot is not None:
+                if restart is None:
+                    restart = slot.address
+                self.flushed += 1
+                self.latches[stage] = None
+        if restart is not None:
+            self.cpu.PC.write_int(restart)
+        self.flushes += 1
+        self.flush_request = False
+
+    def is_drained(self):
+        """流水线是否已排空，WB阶段的指令在当前周期已完成，不计在内"""
+        latches = self.latches
+        return latches['IF'] is None and latches['ID'] is None and latches['EX'] is None and latches['MEM'] is None
+
+    def run(self):
+        """执行到程序结束且流水线排空"""
+        self.clock()
+        while not self.is_drained():
+            self.clock()
+
+    def report(self):
+        """返回统计结果"""
+        return {
+            'cycles': self.cycles,
+            'instructions': self.retired,
+            'cpi': self.cycles / self.retired if self.retired else 0.0,
+            'stalls': self.stalls,
+            'forwards': self.forwards,
+            'flushes': self.flushes,
+            'flushed': self.flushed,
+            'branches': self.branches,
+            'mispredictions': self.mispredictions,
+            'branch_flushed': self.branch_flushed,
+            'occupancy': {stage: self.occupancy[stage] / self.cycles if self.cycles else 0.0 for stage in STAGES},
+        }
+
+    def close(self):
+        """注销写入监听器"""
+        self.cpu.memory.remove_write_listener(self.check_fetched)
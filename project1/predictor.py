@@ -0,0 +1,258 @@
+# *******************************************************
+# 简介：该模块实现了可替换的分支预测器模型。预测器只观察跳转指令的
+#      地址、实际结果和目标地址，不改变程序的执行结果，给出预测
+#      准确率和误预测带来的惩罚周期。支持的预测器：
+#         static   静态预测：taken / not_taken / btfn(向后跳转预测跳转)
+#         1bit     按PC索引的1位历史表，预测与上一次结果相同
+#         2bit     按PC索引的2位饱和计数器表
+#         gshare   PC与全局历史异或后索引的2位饱和计数器表
+#         btb      带标签的分支目标缓冲，命中且计数器为跳转时才预测跳转
+#      预测的结果用下一条指令的地址表示，pc + 1即预测不跳转，
+#      因此方向预测错误与目标预测错误都按误预测计算。
+#      用法：
+#         predictor = cpu.attach_predictor(make_predictor('gshare', history_bits=6))
+#         cpu.run('loop.txt')
+#         print(predictor.report())
+#      流水线模型(project1.pipeline)在IF阶段按预测取指，跳转在EX阶段
+#      确定，预测错误时冲刷IF/ID，实际的损失周期由流水线统计。
+# *******************************************************
+
+STATIC_POLICIES = ('taken', 'not_taken', 'btfn')  # 静态预测策略
+
+
+def check_entries(entries):
+    """预测表的项数须为2的幂"""
+    if entries <= 0 or entries & (entries - 1):
+        raise Exception(r"Predictor table size must be a power of 2: %d" % entries)
+
+
+class BranchPredictor:
+    """分支预测器基类，子类实现predict与train"""
+
+    name = None  # 预测器名称，用于报告
+
+    def __init__(self, penalty=2):
+        """
+        :param penalty: 每次误预测的惩罚周期数，默认对应5级流水线中在EX阶段确定跳转、冲刷IF/ID
+        """
+        self.penalty = penalty
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        """清零统计数据，不清除预测器的状态"""
+        self.branches = 0  # 跳转指令执行次数
+        self.taken = 0  # 实际跳转的次数
+        self.correct = 0  # 预测正确的次数
+        self.direction_misses = 0  # 跳转方向预测错误的次数
+        self.target_misses = 0  # 方向正确但目标地址预测错误的次数
+
+    def predict(self, pc, target):
+        """
+        预测地址pc处的跳转指令
+        :param target: 指令编码的目标地址，译码后才可知
+        :return: 预测的下一条指令地址
+        """
+        return pc + 1
+
+    def train(self, pc, taken, target):
+        """按实际结果更新预测器状态"""
+        pass
+
+    def update(self, pc, taken, target, predicted=None):
+        """
+        记录一次跳转的实际结果并训练预测器
+        :param predicted: 取指时给出的预测，为None时现在预测
+        :return: 预测是否正确
+        """
+        if predicted is None:
+            predicted = self.predict(pc, target)
+        self.branches += 1
+        if taken:
+            self.taken += 1
+            actual = target
+        else:
+            actual = pc + 1
+        correct = predicted == actual
+        if correct:
+            self.correct += 1
+        elif (predicted != pc + 1) != taken:
+            self.direction_misses += 1
+        else:
+            self.target_misses += 1
+        self.train(pc, taken, target)
+        return correct
+
+    @property
+    def mispredictions(self):
+        """误预测次数"""
+        return self.branches - self.correct
+
+    def report(self):
+        """返回统计结果"""
+        return {
+            'name': self.name,
+            'branches': self.branches,
+            'taken': self.taken,
+            'correct': self.correct,
+            'mispredictions': self.mispredictions,
+            'direction_misses': self.direction_misses,
+            'target_misses': self.target_misses,
+            'accuracy': self.correct / self.branches if self.branches else 0.0,
+            'penalty': self.penalty,
+            'penalty_cycles': self.mispredictions * self.penalty,
+        }
+
+
+class StaticPredictor(BranchPredictor):
+    """静态预测器，不保存任何状态"""
+
+    name = 'static'
+
+    def __init__(self, policy='btfn', penalty=2):
+        """
+        :param policy: taken总是跳转，not_taken总是不跳转，btfn向后(循环)跳转、向前不跳转
+        """
+        if policy not in STATIC_POLICIES:
+            raise Exception(r"Unknown static policy: %s" % policy)
+        self.policy = policy
+        super(StaticPredictor, self).__init__(penalty)
+
+    def predict(self, pc, target):
+        if self.policy == 'taken' or (self.policy == 'btfn' and target <= pc):
+            return target
+        return pc + 1
+
+
+class OneBitPredictor(BranchPredictor):
+    """1位预测器，每项记录上一次的结果"""
+
+    name = '1bit'
+
+    def __init__(self, entries=64, penalty=2):
+        check_entries(entries)
+        self.mask = entries - 1
+        self.table = bytearray(entries)  # 初始预测为不跳转
+        super(OneBitPredictor, self).__init__(penalty)
+
+    def predict(self, pc, target):
+        return target if self.table[pc & self.mask] else pc + 1
+
+    def train(self, pc, taken, target):
+        self.table[pc & self.mask] = taken
+
+
+class TwoBitPredictor(BranchPredictor):
+    """2位饱和计数器预测器，计数器为2、3时预测跳转"""
+
+    name = '2bit'
+
+    def __init__(self, entries=64, initial=1, penalty=2):
+        """
+        :param initial: 计数器初值，默认为1(弱不跳转)
+        """
+        check_entries(entries)
+        self.mask = entries - 1
+        self.counters = bytearray([initial]) * entries
+        super(TwoBitPredictor, self).__init__(penalty)
+
+    def index(self, pc):
+        """计数器表的索引"""
+        return pc & self.mask
+
+    def predict(self, pc, target):
+        return target if self.counters[self.index(pc)] >= 2 else pc + 1
+
+    def train(self, pc, taken, target):
+        i = self.index(pc)
+        counter = self.counters[i]
+        if taken:
+            if counter < 3:
+                self.counters[i] = counter + 1
+        elif counter > 0:
+            self.counters[i] = counter - 1
+
+
+class GsharePredictor(TwoBitPredictor):
+    """gshare预测器：PC与全局历史(最近history_bits次跳转的结果)异或后索引2位计数器表"""
+
+    name = 'gshare'
+
+    def __init__(self, entries=256, history_bits=8, initial=1, penalty=2):
+        self.history_mask = (1 << history_bits) - 1
+        self.history = 0  # 全局历史，最低位为最近一次的结果
+        super(GsharePredictor, self).__init__(entries, initial, penalty)
+
+    def index(self, pc):
+        return (pc ^ self.history) & self.mask
+
+    def train(self, pc, taken, target):
+        super(GsharePredictor, self).train(pc, taken, target)
+        self.history = ((self.history << 1) | taken) & self.history_mask
+
+
+class BTBPredictor(BranchPredictor):
+    """
+    分支目标缓冲(BTB)，直接映射，每项保存 标签(跳转指令地址)、目标地址与2位饱和计数器。
+    取指时还不知道指令是否为跳转，因此未命中时预测不跳转；实际跳转时分配表项
+    """
+
+    name = 'btb'
+
+    def __init__(self, entries=16, penalty=2):
+        check_entries(entries)
+        self.mask = entries - 1
+        self.tags = [-1] * entries  # -1表示空项
+        self.targets = [0] * entries
+        self.counters = bytearray(entries)
+        super(BTBPredictor, self).__init__(penalty)
+
+    def reset_statistics(self):
+        super(BTBPredictor, self).reset_statistics()
+        self.hits = 0  # 查找命中次数
+        self.allocations = 0  # 分配(含替换)表项的次数
+
+    def predict(self, pc, target):
+        i = pc & self.mask
+        if self.tags[i] == pc and self.counters[i] >= 2:
+            return self.targets[i]
+        return pc + 1
+
+    def train(self, pc, taken, target):
+        i = pc & self.mask
+        if self.tags[i] == pc:
+            self.hits += 1
+            counter = self.counters[i]
+            if taken:
+                self.targets[i] = target
+                if counter < 3:
+                    self.counters[i] = counter + 1
+            elif counter > 0:
+                self.counters[i] = counter - 1
+        elif taken:
+            self.tags[i] = pc
+            self.targets[i] = target
+            self.counters[i] = 2  # 弱跳转
+            self.allocations += 1
+
+    def report(self):
+        result = super(BTBPredictor, self).report()
+        result['btb_hits'] = self.hits
+        result['btb_allocations'] = self.allocations
+        return result
+
+
+PREDICTORS = {
+    'static': StaticPredictor,
+    '1bit': OneBitPredictor,
+    '2bit': TwoBitPredictor,
+    'gshare': GsharePredictor,
+    'btb': BTBPredictor,
+}  # 预测器名称 -> 预测器类
+
+
+def make_predictor(kind='2bit', **options):
+    """按名称构建预测器，options为对应预测器类的关键字参数"""
+    predictor_class = PREDICTORS.get(kind)
+    if predictor_class is None:
+        raise Exception(r"Unknown branch predictor: %s" % kind)
+    return predictor_class(**options)
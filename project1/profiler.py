@@ -0,0 +1,154 @@
+# *******************************************************
+# 简介：该模块实现了指令级性能剖析器。Profiler是一个跟踪器，
+#      挂在CPU.execute_code的execute/executed事件上，按操作码(指令类)
+#      和按PC地址分别统计：
+#         count        执行次数
+#         time         宿主机上执行该指令的累计时间(纳秒)
+#         read_bytes   指令访存读取的字节数
+#         write_bytes  指令访存写入的字节数
+#      不剖析时CPU的跟踪器为None，执行路径上没有任何额外开销。
+#      结果可以输出为按时间排序的热点报告，也可以输出为折叠栈格式
+#      (每行为 "帧;帧;帧 数值")，供flamegraph.pl等工具生成火焰图。
+#      用法：
+#         profiler = Profiler()
+#         cpu.run('codes.txt', trace=profiler)
+#         print(profiler.report())
+#         profiler.write_collapsed('codes.folded')
+#      命令行用法：
+#         python -m project1.profiler codes.txt [-o codes.folded] [--top 20]
+# *******************************************************
+
+import argparse
+import time
+
+from project1.project1 import CPU, Tracer
+
+WORD_BYTES = 4  # 每次访存的字节数
+
+
+class ProfileEntry:
+    """一个操作码或一个PC地址的统计数据"""
+
+    def __init__(self, name, class_name):
+        self.name = name  # 指令名称
+        self.class_name = class_name  # 指令类名
+        self.count = 0  # 执行次数
+        self.time = 0  # 累计时间(纳秒)
+        self.read_bytes = 0  # 读取的字节数
+        self.write_bytes = 0  # 写入的字节数
+
+    def to_dict(self):
+        return {'name': self.name, 'class': self.class_name, 'count': self.count, 'time_ns': self.time,
+                'read_bytes': self.read_bytes, 'write_bytes': self.write_bytes}
+
+
+class Profiler(Tracer):
+    """指令级性能剖析器类"""
+
+    def __init__(self, clock=time.perf_counter_ns):
+        """
+        :param clock: 计时函数，返回整数纳秒
+        """
+        self.clock = clock
+        self.by_opcode = {}  # 指令类名 -> ProfileEntry
+        self.by_pc = {}  # PC(字地址) -> ProfileEntry
+        self.started = 0  # 当前指令开始执行的时间
+        self.pc = 0  # 当前指令的PC
+
+    def __call__(self, event, source, *args):
+        # 只关心执行事件，其余事件直接返回，避免按名称分派的开销
+        if event == 'execute':
+            self.pc = source.PC.read_int()
+            self.started = self.clock()
+        elif event == 'executed':
+            self.on_executed(source, *args)
+
+    def on_executed(self, cpu, instruction, operands):
+        elapsed = self.clock() - self.started
+        read_bytes = WORD_BYTES if instruction.reads_memory else 0
+        write_bytes = WORD_BYTES if instruction.writes_memory else 0
+        class_name = type(instruction).__name__
+        entry = self.by_opcode.get(class_name)
+        if entry is None:
+            entry = self.by_opcode[class_name] = ProfileEntry(instruction.instruction_name, class_name)
+        site = self.by_pc.get(self.pc)
+        if site is None:
+            site = self.by_pc[self.pc] = ProfileEntry(instruction.instruction_name, class_name)
+        for item in (entry, site):
+            item.count += 1
+            item.time += elapsed
+            item.read_bytes += read_bytes
+            item.write_bytes += write_bytes
+
+    def reset(self):
+        """清空统计数据"""
+        self.by_opcode.clear()
+        self.by_pc.clear()
+
+    @property
+    def total_time(self):
+        """全部指令的累计时间(纳秒)"""
+        return sum(entry.time for entry in self.by_opcode.values())
+
+    @property
+    def total_count(self):
+        """执行的指令总数"""
+        return sum(entry.count for entry in self.by_opcode.values())
+
+    def hotspots(self, key='pc', sort='time'):
+        """
+        返回按sort降序排列的 (键, ProfileEntry) 列表
+        :param key: 'pc' 按PC地址，'opcode' 按指令类
+        :param sort: 'time' / 'count' / 'read_bytes' / 'write_bytes'
+        """
+        table = self.by_pc if key == 'pc' else self.by_opcode
+        return sorted(table.items(), key=lambda item: getattr(item[1], sort), reverse=True)
+
+    def report(self, top=20, sort='time'):
+        """生成热点报告文本"""
+        total_time = self.total_time or 1
+        lines = ['Instructions: %d, host time: %.3f ms' % (self.total_count, self.total_time / 1e6)]
+        for key, title in (('opcode', 'By instruction class'), ('pc', 'By PC')):
+            lines.append('')
+            lines.append(title + ':')
+            lines.append('%-20s %10s %12s %7s %10s %10s' % ('', 'count', 'time(us)', 'time%', 'read(B)', 'write(B)'))
+            for name, entry in self.hotspots(key, sort)[:top]:
+                label = name if key == 'opcode' else '%d %s' % (name, entry.name)
+                lines.append('%-20s %10d %12.1f %6.1f%% %10d %10d' % (
+                    label, entry.count, entry.time / 1e3, entry.time * 100.0 / total_time,
+                    entry.read_bytes, entry.write_bytes))
+        return '\n'.join(lines)
+
+    def collapsed(self, weight='time'):
+        """
+        生成折叠栈格式的行，栈为 程序;指令类;PC 指令名
+        :param weight: 'time' 以纳秒为权重，'count' 以执行次数为权重
+        """
+        lines = []
+        for pc, site in sorted(self.by_pc.items()):
+            value = site.time if weight == 'time' else site.count
+            if value:
+                lines.append('program;%s;%d %s %d' % (site.class_name, pc, site.name, value))
+        return lines
+
+    def write_collapsed(self, file_name, weight='time'):
+        """将折叠栈写入文件"""
+        with open(file_name, 'w') as f:
+            for line in self.collapsed(weight):
+                f.write(line + '\n')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Profile a project1 program per instruction.')
+    parser.add_argument('source', help='assembly source file')
+    parser.add_argument('-o', '--output', help='write a collapsed-stack file for flame graphs')
+    parser.add_argument('--weight', choices=('time', 'count'), default='time', help='collapsed-stack weight')
+    parser.add_argument('--top', type=int, default=20, help='number of hot spots to list')
+    parser.add_argument('--address-len', type=int, default=256, help='memory size in bytes')
+    args = parser.parse_args()
+    profiler = Profiler()
+    cpu = CPU(address_len=args.address_len, verbose=False)
+    cpu.run(args.source, trace=profiler)
+    print(profiler.report(args.top))
+    if args.output:
+        profiler.write_collapsed(args.output, args.weight)
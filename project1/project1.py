@@ -21,136 +21,360 @@
 #   Store r3, #3
 # *******************************************************
 
+from array import array
+import os
+import struct
+import sys
+
+if __name__ == '__main__' and not __package__:
+    # 以脚本方式运行(python project1/project1.py)时，本文件会遮蔽同名的project1包，
+    # 改为把仓库根目录加入模块搜索路径后按模块运行
+    import runpy
+    sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runpy.run_module('project1.project1', run_name='__main__', alter_sys=True)
+    sys.exit()
+
+from project1.alu import ALU
+
 Separate_len = 76  # 分隔线的长度
+WORD_MASK = 0xFFFFFFFF  # 32位掩码
+ADDRESS_SPACE = 1 << 32  # 32位地址空间
+PAGE_BITS = 12  # 页内偏移位数
+PAGE_SIZE = 1 << PAGE_BITS  # 页大小，4KiB
+PAGE_OFFSET_MASK = PAGE_SIZE - 1  # 页内偏移掩码
+_word = struct.Struct('<I')  # 内存中的字按小端序存放
+REGISTER_COUNT = 32  # 通用寄存器的个数
+FLAGS_REGISTER = -1  # 标志位在数据相关检测中视为一个不与通用寄存器编号冲突的寄存器
+BRANCH_OFFSET_BITS = 24  # 跳转偏移为24位有符号字偏移
+BRANCH_OFFSET_LIMIT = 1 << (BRANCH_OFFSET_BITS - 1)  # 跳转偏移的范围为 [-LIMIT, LIMIT)
 
 
 def int2binstr(num, bits):
     """int类型转指定位数2进制字符串"""
-    b = bin(num)[2:]
-    return '0' * (bits - len(b)) + b
+    return format(num, '0%db' % bits)
 
 
 class Cell:
     """单元类，用于实现寄存器或Memory中的单元格，可指定位数，例如Register为32位，Memory为8位"""
 
+    __slots__ = ('bits', 'mask', 'value')
+
     def __init__(self, bits):
         self.bits = bits  # 单元的总长度
-        self.data = ''.join(['0' for _ in range(self.bits)])  # 设置全0初始化
+        self.mask = (1 << bits) - 1  # 位数掩码
+        self.value = 0  # 以整数形式保存数据，全0初始化
 
     def read(self):
-        """read函数，直接返回data"""
-        return self.data
+        """read函数，按需构建2进制字符串"""
+        return int2binstr(self.value, self.bits)
 
     def write(self, data: str):
         """write函数，直接将data写入，但是会先检测data的长度是否一致"""
         assert len(data) == self.bits
-        self.data = data
+        self.value = int(data, 2)
+
+    def read_int(self):
+        """以整数形式读取数据"""
+        return self.value
+
+    def write_int(self, value):
+        """以整数形式写入数据，超出位数的部分被截断"""
+        self.value = value & self.mask
 
 
 class Register:
-    """寄存器类"""
+    """寄存器类，所有单元以array('I')保存，只在显示时才构建2进制字符串"""
+
+    __slots__ = ('register_name', 'cells', 'bits', 'data')
 
     def __init__(self, register_name=None, cells=1):
         """
         :param register_name: 寄存器类型
         :param cells: 寄存器内包含的单元个数
         """
-        self.register = []  # 默认使用一个列表来表示寄存器
         self.register_name = register_name  # 寄存器的名字
         self.cells = cells  # 寄存器的单元数量，默认为1
-        self.cell_list = [Cell(bits=32) for _ in range(self.cells)]  # 初始化
+        self.bits = 32  # 每个单元的位数
+        self.data = array('I', bytes(4 * self.cells))  # 初始化为全0
 
     def read(self, index=0):
-        """从寄存器中读取32位数据"""
+        """从寄存器中读取32位数据，返回2进制字符串"""
         if self.cells == 1:
-            return self.cell_list[0].read()
+            return int2binstr(self.data[0], self.bits)
         elif 0 <= index < self.cells:
-            return self.cell_list[index].read()
+            return int2binstr(self.data[index], self.bits)
 
     def write(self, data: str, index=0):
         """将32位数据写入寄存器，需要检测data的长度是否一致"""
-        assert len(data) == self.cell_list[0].bits
+        assert len(data) == self.bits
+        self.write_int(int(data, 2), index)
+
+    def read_int(self, index=0):
+        """从寄存器中读取32位整数"""
+        if self.cells == 1:
+            return self.data[0]
+        elif 0 <= index < self.cells:
+            return self.data[index]
+
+    def write_int(self, value, index=0):
+        """将32位整数写入寄存器，超出32位的部分被截断"""
         if self.cells == 1:
-            self.cell_list[0].write(data)
+            self.data[0] = value & WORD_MASK
         elif 0 <= index < self.cells:
-            self.cell_list[index].write(data)
+            self.data[index] = value & WORD_MASK
 
 
 class MyMemory:
-    """内存类"""
+    """
+    内存类，按4KiB分页稀疏存储：页保存在字典中，首次写入时才分配，未分配的页读出全0，
+    因此可以寻址完整的32位地址空间，而实际占用只与写入过的页数成正比。字数据按小端序存放。
+    与快照共享的页以不可变的bytes保存，首次写入时才复制为bytearray(写时复制)。
+    寻址长度不是页大小整数倍时，最后一页只分配到寻址长度为止。
+    代码段固定在载入时的位置，数据写入不会移动代码段：写入代码段即为自修改代码，
+    由写入监听器通知各个缓存失效；需要更大的数据段时，构建CPU时指定更大的寻址长度即可
+    """
+
+    __slots__ = ('address_len', 'pages', 'program_index', 'write_listeners')
 
     def __init__(self, address_len=256):
-        self.address_len = address_len  # 寻址长度，默认为8位寻址，即256长度
-        self.memory = [Cell(bits=8) for _ in range(self.address_len)]  # 初始化内存
-        self.program_index = self.address_len  # 初始化代码段指针
-
-    def extend_memory(self, extend_size):
-        """扩展内存数组"""
-        for i in range(extend_size):
-            self.memory.insert(self.program_index, Cell(bits=8))  # 添加一个内存单元
-            self.program_index += 1  # 代码段指针向后移位
-
-    def check_data_extend(self, index):
-        """检查是否要扩展内存空间"""
-        if index * 4 >= self.program_index:
-            # 当数据段不够用时，扩展内存空间，实际上此方法不会触发，因为设定了寻址长度最大为8位
-            self.extend_memory((index + 1) * 4 - self.program_index)
+        if not 0 < address_len <= ADDRESS_SPACE:
+            raise Exception(r"Address length out of range: %d" % address_len)
+        self.address_len = address_len  # 寻址长度，默认为8位寻址，即256长度，最大为2^32
+        self.pages = {}  # 页号 -> bytearray(PAGE_SIZE)，与快照共享的页为bytes
+        self.program_index = self.address_len  # 初始化代码段指针（字节地址）
+        self.write_listeners = []  # 写入监听器列表，listener(index)，index为None表示整体失效
+
+    def add_write_listener(self, listener):
+        """注册写入监听器，每次写入字数据后以字地址调用，用于使预译码缓存失效"""
+        self.write_listeners.append(listener)
+
+    def remove_write_listener(self, listener):
+        """注销写入监听器"""
+        self.write_listeners.remove(listener)
+
+    def check_range(self, address, length):
+        """检查字节地址范围是否越界"""
+        if address < 0 or address + length > self.address_len:
+            raise IndexError(r"Memory address out of range: %d" % address)
+
+    def get_page(self, page_number):
+        """获取可写的页，不存在时分配一个全0页，与快照共享的页先复制"""
+        page = self.pages.get(page_number)
+        if page is None:
+            page = self.pages[page_number] = bytearray(min(PAGE_SIZE, self.address_len - (page_number << PAGE_BITS)))
+        elif page.__class__ is bytes:
+            page = self.pages[page_number] = bytearray(page)
+        return page
+
+    def share_pages(self):
+        """
+        冻结所有页并返回页字典的浅拷贝，用于快照：自上次冻结以来写过的页转为bytes，
+        其余页已是共享的bytes，因此开销只与写过的页数成正比
+        """
+        pages = self.pages
+        for page_number, page in pages.items():
+            if page.__class__ is not bytes:
+                pages[page_number] = bytes(page)
+        return dict(pages)
+
+    def load_pages(self, pages, address_len, program_index):
+        """从快照恢复：共享快照中的页(写时复制)，并通知所有写入监听器整体失效"""
+        self.pages = dict(pages)
+        self.address_len = address_len
+        self.program_index = program_index
+        for listener in self.write_listeners:
+            listener(None)
+
+    def resident_size(self):
+        """实际分配的内存字节数"""
+        return len(self.pages) * PAGE_SIZE
+
+    def read_cell(self, address):
+        """读取单个内存单元，返回8位2进制字符串，仅用于显示"""
+        self.check_range(address, 1)
+        page = self.pages.get(address >> PAGE_BITS)
+        return int2binstr(page[address & PAGE_OFFSET_MASK] if page is not None else 0, 8)
+
+    def get_word(self, index):
+        """获取指定index的32位整数"""
+        address = index * 4  # 乘以4来进行对齐，字不会跨页
+        if address < 0 or address + 4 > self.address_len:
+            raise IndexError(r"Memory address out of range: %d" % address)
+        page = self.pages.get(address >> PAGE_BITS)
+        if page is None:
+            return 0
+        return _word.unpack_from(page, address & PAGE_OFFSET_MASK)[0]  # 小端序读取
+
+    def write_word(self, index, value, is_program=False):
+        """
+        向指定index写入32位整数
+        :param is_program: 是否为载入程序的写入，内存本身对两者一视同仁，接入的缓存据此区分
+        """
+        address = index * 4  # 乘以4来进行对齐，字不会跨页
+        if address < 0 or address + 4 > self.address_len:
+            raise IndexError(r"Memory address out of range: %d" % address)
+        page = self.pages.get(address >> PAGE_BITS)
+        if page is None or page.__class__ is bytes:
+            page = self.get_page(address >> PAGE_BITS)
+        _word.pack_into(page, address & PAGE_OFFSET_MASK, value & WORD_MASK)  # 小端序存储
+        if self.write_listeners:
+            for listener in self.write_listeners:
+                listener(index)
+
+    def read_bytes(self, address, length):
+        """从字节地址address开始读取length个单元，未分配的页读出全0"""
+        self.check_range(address, length)
+        parts = []
+        end = address + length
+        while address < end:
+            offset = address & PAGE_OFFSET_MASK
+            size = min(PAGE_SIZE - offset, end - address)
+            page = self.pages.get(address >> PAGE_BITS)
+            parts.append(page[offset:offset + size] if page is not None else bytes(size))
+            address += size
+        return b''.join(parts)
+
+    def copy_in(self, address, data):
+        """按页复制一段数据到内存，不通知写入监听器"""
+        self.check_range(address, len(data))
+        view = memoryview(data).cast('B')
+        position = 0
+        while position < len(view):
+            offset = address & PAGE_OFFSET_MASK
+            size = min(PAGE_SIZE - offset, len(view) - position)
+            page = self.get_page(address >> PAGE_BITS)
+            page[offset:offset + size] = view[position:position + size]
+            address += size
+            position += size
+
+    def write_bytes(self, address, data):
+        """从字节地址address开始一次性写入一段数据，用于批量载入"""
+        self.copy_in(address, data)
+        for listener in self.write_listeners:
+            listener(None)
 
     def get_data(self, index):
-        """获取指定index的数据"""
-        index *= 4  # 乘以4来进行对齐
-        return ''.join(reversed([self.memory[index + i].read() for i in range(4)]))  # 采用倒序读取的方式来读取数据
+        """获取指定index的数据，返回32位2进制字符串"""
+        return int2binstr(self.get_word(index), 32)
 
     def write_data(self, index, data: str, is_program=False):
-        """向指定index写入数据"""
-        if not is_program:
-            # 如果写入的是非程序数据，则检测是否要进行内存扩展
-            self.check_data_extend(index)
-        index *= 4  # 乘以4来进行对齐
-        bits = 32
-        i = 0
-        for j in range(4):
-            self.memory[index + j].write(data[bits - (i + 8):bits - i])  # 采用倒序存储的方式来存入数据
-            i += 8
+        """向指定index写入32位2进制字符串"""
+        assert len(data) == 32
+        self.write_word(index, int(data, 2), is_program)
+
+
+ISA = []  # 指令集：已注册的指令类，按注册顺序排列
+_isa_tables = None  # (8位操作码(整数) -> 指令类, 助记符 -> 指令类)，首次查找时由ISA构建
+
+
+def register_instruction(instruction_class):
+    """
+    注册指令类，可作为类装饰器使用。注册只记录类本身，分派表在下一次查找时才构建，
+    指令对象由各个Instructions在第一次用到时才创建
+    """
+    global _isa_tables
+    ISA.append(instruction_class)
+    _isa_tables = None
+    return instruction_class
+
+
+def isa_tables():
+    """返回指令集的分派表 (操作码 -> 指令类, 助记符 -> 指令类)，首次调用时构建并检查重复"""
+    global _isa_tables
+    if _isa_tables is None:
+        by_code, by_name = {}, {}
+        for instruction_class in ISA:
+            op_code = int(instruction_class.instruction_code, 2)
+            if op_code in by_code:
+                raise Exception(r"Duplicate instruction code: %s" % instruction_class.instruction_code)
+            if instruction_class.instruction_name in by_name:
+                raise Exception(r"Duplicate instruction name: %s" % instruction_class.instruction_name)
+            by_code[op_code] = instruction_class
+            by_name[instruction_class.instruction_name] = instruction_class
+        _isa_tables = by_code, by_name
+    return _isa_tables
 
 
 class Instruction:
     """指令类"""
 
-    def __init__(self, memory: MyMemory, MDR: Register, MAR: Register, GR: Register):
+    __slots__ = ('memory', 'alu', 'GR', 'MDR', 'MAR')
+    instruction_name = None  # 指令名称，由子类指定
+    instruction_code = None  # 8位2进制字符串形式的指令代码，由子类指定
+    reads_memory = False  # 执行时是否读内存，流水线中其结果在MEM阶段之后才可用
+    writes_memory = False  # 执行时是否写内存，基本块翻译时写内存后需检查自修改
+    sets_flags = False  # 执行时是否更新ALU标志位
+    is_branch = False  # 是否为跳转指令，跳转指令结束基本块并交给分支预测器统计
+
+    def __init__(self, memory: MyMemory, MDR: Register, MAR: Register, GR: Register, alu: ALU = None):
         self.memory = memory  # 获取内存变量
+        self.alu = alu if alu is not None else ALU()  # 获取运算器
         self.GR = GR  # 获取通用寄存器
         self.MDR = MDR  # 获取MDR寄存器
         self.MAR = MAR  # 获取MAR寄存器
-        self.instruction_name = None  # 定义指令名称
-        self.instruction_code = None  # 定义指令代码
 
     def execute(self, operands: list):
-        """定义指令的执行函数，用于具体执行"""
+        """
+        定义指令的执行函数，用于具体执行，执行过程中不做任何输出。
+        返回None表示顺序执行；跳转指令在跳转时返回目标相对本指令的字偏移
+        """
         pass
 
-    def check_format(self, operands: list, address):
-        """定义指令的格式检测函数，用于程序编译"""
+    def registers(self, operands: list):
+        """返回 (读取的通用寄存器, 写入的通用寄存器)，供流水线模型检测数据相关"""
+        return (), ()
+
+    def translate(self, operands: list, set_flags: bool):
+        """
+        将指令翻译为Python源码行，供基本块翻译引擎(project1.jit)使用，返回None表示不能翻译。
+        源码中可用的名称：g(通用寄存器数组)、get_word/write_word(内存读写)、alu(运算器)、
+        to_signed(有符号转换)、M(32位掩码)；set_flags为True时需要像execute一样更新标志位
+        """
+        return None
+
+    def translate_at(self, operands: list, set_flags: bool, address):
+        """按指令所在的字地址翻译，默认与地址无关；跳转指令需要由地址算出目标"""
+        return self.translate(operands, set_flags)
+
+    def show_before(self, operands: list):
+        """打印指令执行前的相关数据，仅由VerboseTracer调用"""
+        pass
+
+    def show_after(self, operands: list):
+        """打印指令执行后的相关数据，仅由VerboseTracer调用"""
         pass
 
+    def encode(self, operands: list):
+        """定义指令的编码函数，检测格式并返回32位机器码，用于程序编译"""
+        pass
+
+    def encode_at(self, operands: list, address):
+        """按指令所在的字地址编码，默认与地址无关；跳转指令按相对地址编码"""
+        return self.encode(operands)
+
+    def check_format(self, operands: list, address):
+        """定义指令的格式检测函数，用于程序编译：编码后写入内存"""
+        self.memory.write_word(address, self.encode_at(operands, address), is_program=True)
+
     def mem2reg(self, src, des):
         # 实现内存到寄存器
-        self.GR.write(self.memory.get_data(src), des)
+        self.GR.write_int(self.memory.get_word(src), des)
 
     def reg2mem(self, src, des):
         # 实现寄存器到内存
-        self.memory.write_data(des, self.GR.read(src))
+        self.memory.write_word(des, self.GR.read_int(src))
 
 
+@register_instruction
 class LoadInstruction(Instruction):
     """Load指令类"""
 
-    def __init__(self, memory: MyMemory, MDR: Register, MAR: Register, GR: Register):
-        super(LoadInstruction, self).__init__(memory, MDR, MAR, GR)
-        self.instruction_name = "Load"  # 指令名称
-        self.instruction_code = "10000001"  # 指令代码
+    __slots__ = ()
+    instruction_name = "Load"  # 指令名称
+    instruction_code = "10000001"  # 指令代码
+    reads_memory = True
 
-    def check_format(self, operands: list, address):
+    def encode(self, operands: list):
         # 检测命令格式
         if len(operands) != 2:
             raise Exception(r"Operand error!")
@@ -158,32 +382,54 @@ class LoadInstruction(Instruction):
         if not des.startswith('r') or not src.startswith('#'):
             raise Exception(r"Operand error!")
         else:
-            # 命令格式正确后，提取操作数并转为机器码写入内存
-            rs = int2binstr(int(src[1:]), 8)
-            rt = '0' * 8
-            rd = int2binstr(int(des[1:]), 8)
-            machine_code = self.instruction_code + rs + rt + rd  # 构建机器码
-            self.memory.write_data(address, machine_code, is_program=True)
+            # 命令格式正确后，提取操作数并转为机器码
+            return make_machine_code(self.instruction_code, register_number(des), int(src[1:]), 0)
 
     def execute(self, operands: list):
         """执行Load命令"""
         des, src = operands[0], operands[1]  # 获取源操作数和目的操作数
+        self.mem2reg(src=src, des=des)  # 执行内存到寄存器的转移
+
+    def registers(self, operands: list):
+        return (), (operands[0],)
+
+    def translate(self, operands: list, set_flags: bool):
+        des, src = operands[0], operands[1]
+        return ['g[%d] = get_word(%d)' % (des, src)]
+
+    def show_before(self, operands: list):
+        des, src = operands[0], operands[1]
         print('Memory %d: %s' % (src, self.memory.get_data(src)))
         print('Register %d: %s' % (des, self.GR.read(des)))
         print("Load #%d to r%d" % (src, des))
-        self.mem2reg(src=src, des=des)  # 执行内存到寄存器的转移
-        print('Register %d: %s' % (des, self.GR.read(des)))
 
+    def show_after(self, operands: list):
+        des = operands[0]
+        print('Register %d: %s' % (des, self.GR.read(des)))
 
-class AddInstruction(Instruction):
-    """Add指令类"""
-
-    def __init__(self, memory: MyMemory, MDR: Register, MAR: Register, GR: Register):
-        super(AddInstruction, self).__init__(memory, MDR, MAR, GR)
-        self.instruction_name = "Add"  # 指令名称
-        self.instruction_code = "10000011"  # 指令代码
 
-    def check_format(self, operands: list, address):
+class ALUInstruction(Instruction):
+    """三寄存器运算指令基类：des = src1 <运算> src2，运算由ALU中名为alu_operation的方法完成"""
+
+    __slots__ = ('operate',)
+    sets_flags = True
+    alu_operation = None  # ALU运算名称，由子类指定
+    native_expressions = {
+        'add': '(%s + %s) & M',
+        'sub': '(%s - %s) & M',
+        'and_': '%s & %s',
+        'or_': '%s | %s',
+        'xor': '%s ^ %s',
+        'shl': '(%s << (%s & 31)) & M',
+        'shr': '%s >> (%s & 31)',
+        'sar': '(to_signed(%s) >> (%s & 31)) & M',
+    }  # 不需要更新标志位时使用的原生整数表达式
+
+    def __init__(self, memory: MyMemory, MDR: Register, MAR: Register, GR: Register, alu: ALU = None):
+        super(ALUInstruction, self).__init__(memory, MDR, MAR, GR, alu)
+        self.operate = getattr(self.alu, self.alu_operation)  # 绑定ALU运算
+
+    def encode(self, operands: list):
         # 检测命令格式
         if len(operands) != 3:
             raise Exception(r"Operands error!")
@@ -192,62 +438,122 @@ class AddInstruction(Instruction):
         if not des.startswith('r') or not src1.startswith('r') or not src2.startswith('r'):
             raise Exception(r"Operand error!")
         else:
-            # 命令格式正确后，提取操作数并转为机器码写入内存
-            rs = int2binstr(int(src1[1:]), 8)
-            rt = int2binstr(int(src2[1:]), 8)
-            rd = int2binstr(int(des[1:]), 8)
-            machine_code = self.instruction_code + rs + rt + rd  # 构建机器码
-            self.memory.write_data(address, machine_code, is_program=True)
+            # 命令格式正确后，提取操作数并转为机器码
+            return make_machine_code(self.instruction_code, register_number(des), register_number(src1),
+                                     register_number(src2))
 
     def execute(self, operands: list):
-        """执行Add命令"""
+        """执行运算命令"""
         des, src1, src2 = operands[0], operands[1], operands[2]  # 获取源操作数和目的操作数
+        self.GR.write_int(self.operate(self.GR.read_int(src1), self.GR.read_int(src2)), des)
+
+    def registers(self, operands: list):
+        return (operands[1], operands[2]), (operands[0], FLAGS_REGISTER)
+
+    def translate(self, operands: list, set_flags: bool):
+        des, src1, src2 = operands[0], operands[1], operands[2]
+        a, b = 'g[%d]' % src1, 'g[%d]' % src2
+        if set_flags or self.alu_operation not in self.native_expressions:
+            return ['g[%d] = alu.%s(%s, %s)' % (des, self.alu_operation, a, b)]
+        return ['g[%d] = %s' % (des, self.native_expressions[self.alu_operation] % (a, b))]
+
+    def show_before(self, operands: list):
+        des, src1, src2 = operands[0], operands[1], operands[2]
         print('Register %d: %s' % (src1, self.GR.read(src1)))
         print('Register %d: %s' % (src2, self.GR.read(src2)))
         print('Register %d: %s' % (des, self.GR.read(des)))
-        print("Add r%d r%d to r%d" % (src1, src2, des))
-        self.GR.write(self.binary_add(self.GR.read(src1), self.GR.read(src2)), des)  # 执行加法命令
+        print("%s r%d r%d to r%d" % (self.instruction_name, src1, src2, des))
+
+    def show_after(self, operands: list):
+        des = operands[0]
         print('Register %d: %s' % (des, self.GR.read(des)))
 
+
+@register_instruction
+class AddInstruction(ALUInstruction):
+    """Add指令类"""
+
+    __slots__ = ()
+    instruction_name = "Add"  # 指令名称
+    instruction_code = "10000011"  # 指令代码
+    alu_operation = 'add'
+
     @staticmethod
     def binary_add(a: str, b: str):
-        """加法器，简单实现了按位加"""
-        a = a[::-1]
-        b = b[::-1]
-        f = False
-        res = ''
-        for i in range(32):
-            if a[i] == '1' and b[i] == '1':
-                if f:
-                    res += '1'
-                else:
-                    res += '0'
-                f = True
-            elif a[i] == '0' and b[i] == '0':
-                if f:
-                    res += '1'
-                else:
-                    res += '0'
-                f = False
-            else:
-                if f:
-                    res += '0'
-                    f = True
-                else:
-                    res += '1'
-                    f = False
-        return res[::-1]
+        """加法器，输入输出均为32位2进制字符串，结果按2^32回绕"""
+        return int2binstr((int(a, 2) + int(b, 2)) & WORD_MASK, 32)
+
+
+@register_instruction
+class SubInstruction(ALUInstruction):
+    """Sub指令类"""
+
+    __slots__ = ()
+    instruction_name = "Sub"  # 指令名称
+    instruction_code = "10000100"  # 指令代码
+    alu_operation = 'sub'
+
+
+@register_instruction
+class AndInstruction(ALUInstruction):
+    """And指令类"""
+
+    __slots__ = ()
+    instruction_name = "And"  # 指令名称
+    instruction_code = "10000101"  # 指令代码
+    alu_operation = 'and_'
+
+
+@register_instruction
+class OrInstruction(ALUInstruction):
+    """Or指令类"""
+
+    __slots__ = ()
+    instruction_name = "Or"  # 指令名称
+    instruction_code = "10000110"  # 指令代码
+    alu_operation = 'or_'
+
+
+@register_instruction
+class XorInstruction(ALUInstruction):
+    """Xor指令类"""
+
+    __slots__ = ()
+    instruction_name = "Xor"  # 指令名称
+    instruction_code = "10000111"  # 指令代码
+    alu_operation = 'xor'
 
 
+@register_instruction
+class ShlInstruction(ALUInstruction):
+    """Shl指令类，逻辑左移，移位数取自src2寄存器"""
+
+    __slots__ = ()
+    instruction_name = "Shl"  # 指令名称
+    instruction_code = "10001000"  # 指令代码
+    alu_operation = 'shl'
+
+
+@register_instruction
+class ShrInstruction(ALUInstruction):
+    """Shr指令类，逻辑右移，移位数取自src2寄存器"""
+
+    __slots__ = ()
+    instruction_name = "Shr"  # 指令名称
+    instruction_code = "10001001"  # 指令代码
+    alu_operation = 'shr'
+
+
+@register_instruction
 class StoreInstruction(Instruction):
     """Store指令类"""
 
-    def __init__(self, memory: MyMemory, MDR: Register, MAR: Register, GR: Register):
-        super(StoreInstruction, self).__init__(memory, MDR, MAR, GR)
-        self.instruction_name = "Store"  # 指令名称
-        self.instruction_code = "10000010"  # 指令代码
+    __slots__ = ()
+    instruction_name = "Store"  # 指令名称
+    instruction_code = "10000010"  # 指令代码
+    writes_memory = True
 
-    def check_format(self, operands: list, address):
+    def encode(self, operands: list):
         # 检测命令格式
         if len(operands) != 2:
             raise Exception(r"Operands error!")
@@ -255,172 +561,792 @@ class StoreInstruction(Instruction):
         if not des.startswith('#') or not src.startswith('r'):
             raise Exception(r"Operands error!")
         else:
-            # 命令格式正确后，提取操作数并转为机器码写入内存
-            rs = int2binstr(int(src[1:]), 8)
-            rt = '0' * 8
-            rd = int2binstr(int(des[1:]), 8)
-            machine_code = self.instruction_code + rs + rt + rd  # 构建机器码
-            self.memory.write_data(address, machine_code, is_program=True)
+            # 命令格式正确后，提取操作数并转为机器码
+            return make_machine_code(self.instruction_code, int(des[1:]), register_number(src), 0)
 
     def execute(self, operands: list):
-        """执行Load命令"""
-        des, src = operands[1], operands[0]  # 获取源操作数和目的操作数
+        """执行Store命令"""
+        des, src = operands[0], operands[1]  # 获取源操作数(寄存器)和目的操作数(内存地址)
+        self.reg2mem(src=src, des=des)  # 执行寄存器到内存的转移
+
+    def registers(self, operands: list):
+        return (operands[1],), ()
+
+    def translate(self, operands: list, set_flags: bool):
+        des, src = operands[0], operands[1]
+        return ['write_word(%d, g[%d])' % (des, src)]
+
+    def show_before(self, operands: list):
+        des, src = operands[0], operands[1]
         print('Register %d: %s' % (src, self.GR.read(src)))
         print('Memory %d: %s' % (des, self.memory.get_data(des)))
-        print("Store r%d to #%d", (src, des))
-        self.reg2mem(src=src, des=des)  # 执行寄存器到内存的转移
+        print("Store r%d to #%d" % (src, des))
+
+    def show_after(self, operands: list):
+        des = operands[0]
         print('Memory %d: %s' % (des, self.memory.get_data(des)))
 
 
+@register_instruction
+class CompareInstruction(Instruction):
+    """Cmp指令类：按src1 - src2更新标志位，不写回结果"""
+
+    __slots__ = ()
+    instruction_name = "Cmp"  # 指令名称
+    instruction_code = "10001010"  # 指令代码
+    sets_flags = True
+
+    def encode(self, operands: list):
+        # 检测命令格式
+        if len(operands) != 2:
+            raise Exception(r"Operands error!")
+        src1, src2 = operands[0], operands[1]
+        if not src1.startswith('r') or not src2.startswith('r'):
+            raise Exception(r"Operand error!")
+        else:
+            # 命令格式正确后，提取操作数并转为机器码
+            return make_machine_code(self.instruction_code, 0, register_number(src1), register_number(src2))
+
+    def execute(self, operands: list):
+        """执行Cmp命令"""
+        self.alu.compare(self.GR.read_int(operands[1]), self.GR.read_int(operands[2]))
+
+    def registers(self, operands: list):
+        return (operands[1], operands[2]), (FLAGS_REGISTER,)
+
+    def translate(self, operands: list, set_flags: bool):
+        if not set_flags:
+            return []  # 标志位随后被覆盖，比较没有可见的效果
+        return ['alu.compare(g[%d], g[%d])' % (operands[1], operands[2])]
+
+    def show_before(self, operands: list):
+        src1, src2 = operands[1], operands[2]
+        print('Register %d: %s' % (src1, self.GR.read(src1)))
+        print('Register %d: %s' % (src2, self.GR.read(src2)))
+        print("Cmp r%d r%d" % (src1, src2))
+
+    def show_after(self, operands: list):
+        alu = self.alu
+        print('Flags: Z=%d N=%d V=%d C=%d' % (alu.zero, alu.negative, alu.overflow, alu.carry))
+
+
+class BranchInstruction(Instruction):
+    """
+    跳转指令基类：条件成立时跳转到目标字地址，条件由ALU中名为condition的方法根据标志位判断。
+    汇编时操作数(标号或#地址)是绝对字地址，机器码的三个8位操作数字段合起来保存
+    目标相对本指令的24位有符号偏移，因此跳转与代码段所在的位置无关，
+    任意大小的地址空间中都可以跳转到前后8M条指令以内的目标
+    """
+
+    __slots__ = ('test',)
+    is_branch = True
+    condition = None  # ALU条件判断方法名称，由子类指定
+    condition_expressions = {
+        'always': 'True',
+        'equal': 'alu.zero',
+        'not_equal': 'not alu.zero',
+        'less': 'alu.negative != alu.overflow',
+        'greater_equal': 'alu.negative == alu.overflow',
+        'greater': 'not alu.zero and alu.negative == alu.overflow',
+        'less_equal': 'alu.zero or alu.negative != alu.overflow',
+    }  # 条件的Python表达式，供基本块翻译使用
+
+    def __init__(self, memory: MyMemory, MDR: Register, MAR: Register, GR: Register, alu: ALU = None):
+        super(BranchInstruction, self).__init__(memory, MDR, MAR, GR, alu)
+        self.test = getattr(self.alu, self.condition)  # 绑定条件判断
+
+    def encode(self, operands: list):
+        raise Exception(r"Branch instructions are encoded relative to their address, use encode_at")
+
+    def encode_at(self, operands: list, address):
+        # 检测命令格式
+        if len(operands) != 1 or not operands[0].startswith('#'):
+            raise Exception(r"Operand error!")
+        target = int(operands[0][1:])
+        offset = target - address
+        if target < 0 or not -BRANCH_OFFSET_LIMIT <= offset < BRANCH_OFFSET_LIMIT:
+            raise Exception(r"Branch target out of range: %d" % target)
+        offset &= (1 << BRANCH_OFFSET_BITS) - 1
+        return make_machine_code(self.instruction_code, offset & 0xFF, offset >> 16, (offset >> 8) & 0xFF)
+
+    def execute(self, operands: list):
+        """执行跳转命令，条件成立时返回跳转偏移"""
+        if self.test():
+            return branch_offset(operands[0], operands[1], operands[2])
+        return None
+
+    def registers(self, operands: list):
+        return (FLAGS_REGISTER,), ()
+
+    def taken_source(self):
+        """跳转条件的Python表达式"""
+        return self.condition_expressions[self.condition]
+
+    def translate_at(self, operands: list, set_flags: bool, address):
+        target = address + branch_offset(operands[0], operands[1], operands[2])
+        if self.condition == 'always':
+            return ['return %d' % target]
+        return ['if %s:' % self.taken_source(), '    return %d' % target]
+
+    def show_before(self, operands: list):
+        alu = self.alu
+        print('Flags: Z=%d N=%d V=%d C=%d' % (alu.zero, alu.negative, alu.overflow, alu.carry))
+        print("%s by %+d" % (self.instruction_name, branch_offset(operands[0], operands[1], operands[2])))
+
+
+@register_instruction
+class JmpInstruction(BranchInstruction):
+    """Jmp指令类，无条件跳转"""
+
+    __slots__ = ()
+    instruction_name = "Jmp"  # 指令名称
+    instruction_code = "10010000"  # 指令代码
+    condition = 'always'
+
+
+@register_instruction
+class BeqInstruction(BranchInstruction):
+    """Beq指令类，相等时跳转"""
+
+    __slots__ = ()
+    instruction_name = "Beq"  # 指令名称
+    instruction_code = "10010001"  # 指令代码
+    condition = 'equal'
+
+
+@register_instruction
+class BneInstruction(BranchInstruction):
+    """Bne指令类，不相等时跳转"""
+
+    __slots__ = ()
+    instruction_name = "Bne"  # 指令名称
+    instruction_code = "10010010"  # 指令代码
+    condition = 'not_equal'
+
+
+@register_instruction
+class BltInstruction(BranchInstruction):
+    """Blt指令类，有符号小于时跳转"""
+
+    __slots__ = ()
+    instruction_name = "Blt"  # 指令名称
+    instruction_code = "10010011"  # 指令代码
+    condition = 'less'
+
+
+@register_instruction
+class BgeInstruction(BranchInstruction):
+    """Bge指令类，有符号大于等于时跳转"""
+
+    __slots__ = ()
+    instruction_name = "Bge"  # 指令名称
+    instruction_code = "10010100"  # 指令代码
+    condition = 'greater_equal'
+
+
+@register_instruction
+class BgtInstruction(BranchInstruction):
+    """Bgt指令类，有符号大于时跳转"""
+
+    __slots__ = ()
+    instruction_name = "Bgt"  # 指令名称
+    instruction_code = "10010101"  # 指令代码
+    condition = 'greater'
+
+
+@register_instruction
+class BleInstruction(BranchInstruction):
+    """Ble指令类，有符号小于等于时跳转"""
+
+    __slots__ = ()
+    instruction_name = "Ble"  # 指令名称
+    instruction_code = "10010110"  # 指令代码
+    condition = 'less_equal'
+
+
+def register_number(operand: str):
+    """解析rN形式的寄存器操作数，编号须小于通用寄存器的个数"""
+    number = int(operand[1:])
+    if not 0 <= number < REGISTER_COUNT:
+        raise Exception(r"Register out of range: %s" % operand)
+    return number
+
+
+def make_machine_code(instruction_code: str, des, src1, src2):
+    """
+    构建32位机器码，格式为【操作码8位，源操作数8位，源操作数8位，目的操作数8位】
+    :param instruction_code: 8位2进制字符串形式的指令代码
+    """
+    for operand in (des, src1, src2):
+        if not 0 <= operand <= 0xFF:
+            raise Exception(r"Operand out of range: %d" % operand)
+    return (int(instruction_code, 2) << 24) | (src1 << 16) | (src2 << 8) | des
+
+
+def decode(machine_code):
+    """将32位机器码拆分为 (操作码, 目的操作数, 源操作数1, 源操作数2)"""
+    return machine_code >> 24, machine_code & 0xFF, (machine_code >> 16) & 0xFF, (machine_code >> 8) & 0xFF
+
+
+def branch_offset(des, src1, src2):
+    """由跳转指令译码后的操作数拼出24位有符号的跳转偏移，目标字地址为跳转指令的地址加偏移"""
+    offset = (src1 << 16) | (src2 << 8) | des
+    return offset - (1 << BRANCH_OFFSET_BITS) if offset >= BRANCH_OFFSET_LIMIT else offset
+
+
+class DecodeCache:
+    """
+    预译码指令缓存，字地址 -> (handler, des, src1, src2, is_branch)，handler为指令的execute方法。
+    注册为内存的写入监听器，被写入的地址会从缓存中移除，保证自修改代码的正确性
+    """
+
+    def __init__(self, memory: MyMemory, instructions):
+        self.memory = memory
+        self.instructions = instructions
+        self.entries = {}  # 已译码的指令
+        self.memory.add_write_listener(self.invalidate)
+
+    def lookup(self, address):
+        """获取address处的已译码指令，未命中时从内存取指并译码；无法识别的指令返回None"""
+        entry = self.entries.get(address)
+        if entry is None:
+            op_code, des, src1, src2 = decode(self.memory.get_word(address))
+            instruction = self.instructions.get_by_code(op_code)
+            if instruction is None:
+                return None
+            entry = self.entries[address] = (instruction.execute, des, src1, src2, instruction.is_branch)
+        return entry
+
+    def invalidate(self, index=None):
+        """使index处的缓存失效，index为None时清空全部缓存"""
+        if index is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(index, None)
+
+    def close(self):
+        """清空缓存并注销写入监听器"""
+        self.entries.clear()
+        self.memory.remove_write_listener(self.invalidate)
+
+
 class Instructions:
     """
-    指令集集合类
+    指令集集合类，同时维护按操作码和按助记符索引的分派表。
+    已注册的指令类(ISA)在第一次被查找到时才实例化，程序没用到的指令不创建对象
     """
 
-    def __init__(self, memory: MyMemory, MDR: Register, MAR: Register, GR: Register):
+    def __init__(self, memory: MyMemory, MDR: Register, MAR: Register, GR: Register, alu: ALU = None):
         self.MAR = MAR
         self.MDR = MDR
-        self.instructions = []  # 定义指令集集合
+        self.alu = alu if alu is not None else ALU()  # 所有指令共享同一个运算器
+        self.opcode_table = {}  # 分派表：8位操作码(整数) -> 已创建的指令对象
+        self.name_table = {}  # 分派表：助记符 -> 已创建的指令对象
         self.memory = memory  # 载入内存对象
         self.GR = GR  # 载入通用寄存器对象
-        self.init_instructions()  # 初始化指令集集合
 
-    def init_instructions(self):
-        """初始化指令集集合"""
-        self.instructions.append(LoadInstruction(memory=self.memory, MDR=self.MDR, MAR=self.MAR, GR=self.GR))
-        self.instructions.append(AddInstruction(memory=self.memory, MDR=self.MDR, MAR=self.MAR, GR=self.GR))
-        self.instructions.append(StoreInstruction(memory=self.memory, MDR=self.MDR, MAR=self.MAR, GR=self.GR))
+    @property
+    def instructions(self):
+        """指令集集合：实例化全部已注册的指令，返回全部指令对象"""
+        for op_code in isa_tables()[0]:
+            self.get_by_code(op_code)
+        return list(self.opcode_table.values())
+
+    def create(self, instruction_class):
+        """实例化一个已注册的指令类并登记到分派表中"""
+        instruction = instruction_class(memory=self.memory, MDR=self.MDR, MAR=self.MAR, GR=self.GR, alu=self.alu)
+        self.opcode_table[int(instruction.instruction_code, 2)] = instruction
+        self.name_table[instruction.instruction_name] = instruction
+        return instruction
+
+    def add_instruction(self, instruction: Instruction):
+        """向指令集中添加一条未注册的指令，并登记到分派表中"""
+        op_code = int(instruction.instruction_code, 2)
+        by_code, by_name = isa_tables()
+        if op_code in self.opcode_table or op_code in by_code:
+            raise Exception(r"Duplicate instruction code: %s" % instruction.instruction_code)
+        if instruction.instruction_name in self.name_table or instruction.instruction_name in by_name:
+            raise Exception(r"Duplicate instruction name: %s" % instruction.instruction_name)
+        self.opcode_table[op_code] = instruction
+        self.name_table[instruction.instruction_name] = instruction
+
+    def set_memory(self, memory):
+        """更换指令访存所经过的对象，包括之后才创建的指令"""
+        self.memory = memory
+        for instruction in self.opcode_table.values():
+            instruction.memory = memory
+
+    def get_by_code(self, op_code):
+        """按整数操作码查找指令，不存在时返回None"""
+        instruction = self.opcode_table.get(op_code)
+        if instruction is None:
+            instruction_class = isa_tables()[0].get(op_code)
+            if instruction_class is not None:
+                instruction = self.create(instruction_class)
+        return instruction
+
+    def get_by_name(self, instruction_name):
+        """按助记符查找指令，不存在时返回None"""
+        instruction = self.name_table.get(instruction_name)
+        if instruction is None:
+            instruction_class = isa_tables()[1].get(instruction_name)
+            if instruction_class is not None:
+                instruction = self.create(instruction_class)
+        return instruction
+
+
+class Tracer:
+    """
+    跟踪器基类，调用方式为 tracer(event, source, *args)，
+    按事件名分派到 on_<event> 方法，未实现的事件直接忽略
+    """
+
+    def __call__(self, event, source, *args):
+        handler = getattr(self, 'on_' + event, None)
+        if handler is not None:
+            handler(source, *args)
+
+
+class VerboseTracer(Tracer):
+    """详细跟踪器，逐条打印编译与执行过程"""
+
+    def on_compile_begin(self, translater):
+        print('Compile Codes:')
+
+    def on_compile_line(self, translater, code_line):
+        print(code_line, end='')
+
+    def on_compile_end(self, translater):
+        print('\nCodes compiled!')
+        print('-' * Separate_len)
+
+    def on_start(self, cpu):
+        print('PC Instructions initialized')
+        print('-' * Separate_len)
+
+    def on_cycle(self, cpu):
+        print('Run Code:')
+
+    def on_fetch(self, cpu):
+        print('Get Instruction [' + cpu.IR.read() + ']')
+
+    def on_execute(self, cpu, instruction, operands):
+        instruction.show_before(operands)
+
+    def on_executed(self, cpu, instruction, operands):
+        instruction.show_after(operands)
+
+    def on_pc_increase(self, cpu, old_pc):
+        print('PC寄存器自增:' if cpu.PC.read_int() == (old_pc + 1) & WORD_MASK else 'PC跳转:')
+        print(int2binstr(old_pc, 32) + '(' + str(old_pc) + ') => ', end='')
+        print(cpu.PC.read() + '(' + str(cpu.PC.read_int()) + ')')
+        print('-' * Separate_len)
+
+    def on_end(self, cpu):
+        print("Program End!")
+        print('-' * Separate_len)
+
+
+TRACE_QUIET = 0  # 跟踪级别：不输出任何信息
+TRACE_VERBOSE = 1  # 跟踪级别：逐条打印执行过程
+
+
+def make_tracer(trace):
+    """
+    根据参数构建跟踪器
+    :param trace: None或TRACE_QUIET表示不跟踪；整数级别TRACE_VERBOSE及以上使用VerboseTracer；
+                  可调用对象则直接作为跟踪器使用
+    :return: 跟踪器或None
+    """
+    if trace is None:
+        return None
+    if callable(trace):
+        return trace
+    if isinstance(trace, int):
+        return VerboseTracer() if trace >= TRACE_VERBOSE else None
+    raise Exception(r"Invalid trace: %r" % (trace,))
 
 
 class Translater:
     """
-    编译器类
+    编译器类，流式汇编：代码按行逐条读取、编码并立即写出，内存占用与源文件大小无关。
+    支持标号：行首的 name: 定义标号，其值为下一条指令的字地址；地址操作数 #name 引用标号，
+    向前引用的指令先以占位值写出，待标号定义后重新编码回填。行内 ; 之后为注释
     """
 
-    def __init__(self, memory: MyMemory):
+    def __init__(self, memory: MyMemory, instructions=None):
+        """
+        :param memory: 内存对象，只经由compile_code使用，单独汇编时可以为None
+        :param instructions: 用于编码的指令集集合对象，通常为CPU的指令集；为None时新建一个，
+                             指令对象只在用到时创建
+        """
         self.memory = memory  # 载入内存对象
-        self.instructions = Instructions(self.memory, None, None, None)  # 构建指令集集合对象
+        self.instructions = instructions if instructions is not None else Instructions(memory, None, None, None)
+        self.labels = {}  # 标号 -> 字地址
+        self.pending = {}  # 未定义的标号 -> 等待回填的指令列表 [地址, 指令, 操作数]
 
-    def compile_code(self, file_name):
-        """编译代码"""
-        # 读取代码文件
-        with open(file_name, 'r') as f:
-            lines = f.readlines()
-        print('Compile Codes:')
-        # 计算代码段地址
-        program_address = int(self.memory.address_len / 4) - len(lines)
-        self.memory.program_index = program_address
+    @staticmethod
+    def iter_source(source):
+        """逐行读取源码，source为文件名或任意可迭代的行序列(文件对象、生成器等)"""
+        if isinstance(source, str):
+            with open(source, 'r') as f:
+                for code_line in f:
+                    yield code_line
+        else:
+            for code_line in source:
+                yield code_line
+
+    @staticmethod
+    def parse_line(code_line):
+        """
+        解析一行代码
+        :return: (标号列表, 指令名称, 操作数列表)，没有指令时指令名称为None
+        """
+        code_line = code_line.split(';', 1)[0].strip()  # 去掉注释
+        labels = []
+        while True:
+            head, colon, rest = code_line.partition(':')
+            if not colon or not head.strip().isidentifier():
+                break
+            labels.append(head.strip())
+            code_line = rest.strip()
+        if not code_line:
+            return labels, None, []
+        # 分割代码与参数
+        instruction_name, _, parameters = code_line.partition(' ')
+        p = [s.strip() for s in parameters.split(',')] if parameters.strip() else []
+        return labels, instruction_name, p
+
+    def count_instructions(self, source):
+        """第一遍扫描：统计指令条数，用于确定代码段的起始地址"""
+        count = 0
+        for code_line in self.iter_source(source):
+            _, instruction_name, _ = self.parse_line(code_line)
+            if instruction_name is not None and self.instructions.get_by_name(instruction_name) is not None:
+                count += 1
+        return count
+
+    def resolve_operands(self, operands):
+        """将操作数中的标号引用替换为地址，返回 (替换后的操作数, 未定义的标号列表)"""
+        resolved = []
+        undefined = []
+        for operand in operands:
+            if operand.startswith('#') and operand[1:].isidentifier():
+                name = operand[1:]
+                if name in self.labels:
+                    operand = '#%d' % self.labels[name]
+                else:
+                    undefined.append(name)
+                    operand = '#0'  # 占位值，标号定义后回填
+            resolved.append(operand)
+        return resolved, undefined
+
+    def define_label(self, name, address, write_word):
+        """定义标号，并回填所有等待该标号的指令"""
+        if name in self.labels:
+            raise Exception(r"Duplicate label: %s" % name)
+        self.labels[name] = address
+        for entry in self.pending.pop(name, []):
+            instruction_address, instruction, operands = entry
+            resolved, undefined = self.resolve_operands(operands)
+            if not undefined:
+                write_word(instruction_address, instruction.encode_at(resolved, instruction_address))
+
+    def assemble(self, source, base, write_word, tracer=None):
+        """
+        单遍流式汇编
+        :param source: 文件名或可迭代的行序列
+        :param base: 代码段起始字地址
+        :param write_word: 输出函数 write_word(字地址, 机器码)，回填时同一地址会被再次写入
+        :param tracer: 跟踪器，不为None时通过跟踪器输出编译过程
+        :return: 代码段结束字地址
+        """
+        self.labels = {}
+        self.pending = {}
+        if tracer is not None:
+            tracer('compile_begin', self)
+        address = base
         # 逐行编译
-        for code_line in lines:
+        for code_line in self.iter_source(source):
             # 读取代码
-            print(code_line, end='')
-            code_a = code_line.split(',')
-            # 分割代码与参数
-            instruction_name, p1 = tuple(code_a[0].strip().split(' '))
-            p = [p1]
-            for s in code_a[1:]:
-                p.append(s.strip())
-            # 代码与参数分割完毕
-            for instruction in self.instructions.instructions:
-                # 遍历指令集
-                assert isinstance(instruction, Instruction)
-                if instruction.instruction_name == instruction_name:
-                    # 将对应的指令编译为机器码
-                    instruction.check_format(p, program_address)
-                    # 代码段地址加一
-                    program_address += 1
-                    break
-        print('\nCodes compiled!')
-        print('-' * Separate_len)
+            if tracer is not None:
+                tracer('compile_line', self, code_line)
+            labels, instruction_name, p = self.parse_line(code_line)
+            for name in labels:
+                self.define_label(name, address, write_word)
+            if instruction_name is None:
+                continue
+            instruction = self.instructions.get_by_name(instruction_name)  # 查找对应指令
+            if instruction is not None:
+                # 将对应的指令编译为机器码
+                resolved, undefined = self.resolve_operands(p)
+                write_word(address, instruction.encode_at(resolved, address))
+                if undefined:
+                    entry = [address, instruction, p]
+                    for name in set(undefined):
+                        self.pending.setdefault(name, []).append(entry)
+                # 代码段地址加一
+                address += 1
+        if self.pending:
+            raise Exception(r"Undefined label: %s" % ', '.join(sorted(self.pending)))
+        if tracer is not None:
+            tracer('compile_end', self)
+        return address
+
+    def compile_code(self, source, tracer=None, base=None):
+        """
+        编译代码，并将机器码写入内存末尾的代码段
+        :param source: 文件名或可迭代的行序列
+        :param base: 代码段起始字地址；为None时先扫描一遍统计指令数，将代码段放在内存末尾，
+                     此时source必须可以重复读取(文件名)
+        """
+        if base is None:
+            if not isinstance(source, str):
+                raise Exception(r"A base address is required when compiling from a stream!")
+            # 计算代码段地址
+            base = self.memory.address_len // 4 - self.count_instructions(source)
+        self.memory.program_index = base * 4  # 代码段指针为字节地址
+
+        def write_word(address, machine_code):
+            self.memory.write_word(address, machine_code, is_program=True)
+        return self.assemble(source, base, write_word, tracer)
 
 
 class CPU:
-    """CPU类"""
+    """CPU类，不需要打印初始化信息时可以用工厂函数create_cpu构建"""
 
-    def __init__(self):
-        self.memory = MyMemory()  # 构建内存对象
-        self.memory_init()  # 初始化内存对象
+    def __init__(self, address_len=256, verbose=True, init_memory=True):
+        """
+        :param address_len: 内存寻址长度(字节)，最大为2^32，内存按页稀疏分配
+        :param verbose: 是否打印初始化信息
+        :param init_memory: 是否向内存写入示例程序所需的初始数据
+        """
+        self.verbose = verbose
+        self.memory = MyMemory(address_len)  # 构建内存对象
+        if init_memory:
+            self.memory_init()  # 初始化内存对象
         self.PC = Register('PC')  # PC寄存器
         self.MAR = Register('MAR')  # MAR寄存器
         self.MDR = Register('MDR')  # MDR寄存器
         self.IR = Register('IR')  # IR指令寄存器
-        self.GR = Register('GR', cells=32)  # GR通用寄存器
-        print('Registers initialized!')
-        self.instructions = Instructions(memory=self.memory, MDR=self.MDR, MAR=self.MAR, GR=self.GR)  # 构建指令集集合对象
-        print('Instructions initialized!')
-        print('-' * Separate_len)
-
-    def pc_auto_increase(self):
-        # PC寄存器自增
-        print('PC寄存器自增:')
-        print(self.PC.read() + '(' + str(int(self.PC.read(), 2)) + ') => ', end='')
-        self.PC.write(int2binstr(int(self.PC.read(), 2) + 1, 32))  # 向下一条代码的地址移动
-        print(self.PC.read() + '(' + str(int(self.PC.read(), 2)) + ')')
-        print('-' * Separate_len)
+        self.GR = Register('GR', cells=REGISTER_COUNT)  # GR通用寄存器
+        self.ALU = ALU()  # 运算器
+        if self.verbose:
+            print('Registers initialized!')
+        self.instructions = Instructions(memory=self.memory, MDR=self.MDR, MAR=self.MAR, GR=self.GR,
+                                         alu=self.ALU)  # 构建指令集集合对象
+        if self.verbose:
+            print('Instructions initialized!')
+            print('-' * Separate_len)
+        self.cycles = 0  # 已执行的指令周期数
+        self.tracer = None  # 跟踪器，为None时运行过程中不做任何格式化与输出
+        self.decode_cache = DecodeCache(self.memory, self.instructions)  # 预译码指令缓存
+        self.data_memory = self.memory  # 指令访存所经过的对象，接入缓存后为project1.cache.CacheHierarchy
+        self.predictor = None  # 分支预测器(project1.predictor)，为None时不统计分支
+
+    def pc_auto_increase(self, target=None):
+        # PC寄存器自增，跳转时改为写入跳转目标
+        old_pc = self.PC.read_int()
+        self.PC.write_int(old_pc + 1 if target is None else target)  # 向下一条代码的地址移动
+        if self.tracer is not None:
+            self.tracer('pc_increase', self, old_pc)
 
     def get_instruction(self):
         """取指令"""
-        self.MAR.write(self.PC.read())  # 读取PC寄存器中的代码地址
-        self.MDR.write(self.memory.get_data(int(self.MAR.read(), 2)))  # 从内存中读取数据到MDR寄存器
-        self.IR.write(self.MDR.read())  # 将MDR寄存器的数据写入IR寄存器
-        print('Get Instruction [' + self.IR.read() + ']')
+        self.MAR.write_int(self.PC.read_int())  # 读取PC寄存器中的代码地址
+        self.MDR.write_int(self.memory.get_word(self.MAR.read_int()))  # 从内存中读取数据到MDR寄存器
+        self.IR.write_int(self.MDR.read_int())  # 将MDR寄存器的数据写入IR寄存器
+        if self.tracer is not None:
+            self.tracer('fetch', self)
 
     def memory_init(self):
         # 内存初始化
-        self.memory.write_data(0, int2binstr(10, 32))  # 向内存的0号位添加数字10
-        self.memory.write_data(1, int2binstr(15, 32))  # 向内存的1号位添加数字15
-        print('Memory initialized!')
+        self.memory.write_word(0, 10)  # 向内存的0号位添加数字10
+        self.memory.write_word(1, 15)  # 向内存的1号位添加数字15
+        if self.verbose:
+            print('Memory initialized!')
 
     def PC_instruction_init(self):
         # PC寄存器初始化
-        self.PC.write(int2binstr(self.memory.program_index, 32))  # 向PC寄存器写入代码段地址
-        print('PC Instructions initialized')
-        print('-' * Separate_len)
+        self.PC.write_int(self.memory.program_index // 4)  # 向PC寄存器写入代码段地址（字地址）
+        if self.tracer is not None:
+            self.tracer('start', self)
 
     def execute_code(self):
-        # 执行代码
-        instruction_address = self.IR.read()  # 从IR寄存器中读取机器代码
-        op_code = instruction_address[0:8]  # 读取指令代码
-        src1 = int(instruction_address[8:16], 2)  # 读取源操作数1
-        src2 = int(instruction_address[16:24], 2)  # 读取源操作数2
-        des = int(instruction_address[24:32], 2)  # 读取目的操作数
+        # 执行代码，返回跳转目标，顺序执行时返回None
+        op_code, des, src1, src2 = decode(self.IR.read_int())  # 从IR寄存器中读取机器代码并拆分
         parameters = [des, src1, src2]  # 构成参数列表
-        for instruction in self.instructions.instructions:
-            # 寻找对应指令
-            if instruction.instruction_code == op_code:
-                # 执行相应的操作
-                instruction.execute(parameters)
-                break
+        instruction = self.instructions.get_by_code(op_code)  # 寻找对应指令
+        if instruction is None:
+            return None
+        # 执行相应的操作
+        if self.tracer is None:
+            offset = instruction.execute(parameters)
+        else:
+            self.tracer('execute', self, instruction, parameters)
+            offset = instruction.execute(parameters)
+            self.tracer('executed', self, instruction, parameters)
+        if not instruction.is_branch:
+            return None
+        pc = self.PC.read_int()
+        if self.predictor is not None:
+            self.predictor.update(pc, offset is not None, pc + branch_offset(des, src1, src2))
+        return None if offset is None else pc + offset
 
     def program_is_end(self):
-        # 识别程序是否执行完毕
-        return int(self.PC.read(), 2) * 4 >= self.memory.address_len
-
-    def run(self):
-        translater = Translater(self.memory)  # 编译器
-        translater.compile_code('codes.txt')  # 编译代码
+        # 识别程序是否执行完毕：PC越过内存末尾，代码段位于内存末尾，因此顺序执行完最后一条指令
+        # 或跳转到内存之外都会结束程序
+        return self.PC.read_int() * 4 >= self.memory.address_len
+
+    def step(self):
+        """执行一个指令周期：取指令、执行、PC自增"""
+        self.cycles += 1
+        if self.tracer is None:
+            self.step_cached()
+            return
+        self.tracer('cycle', self)
+        self.get_instruction()  # 取指令
+        target = self.execute_code()  # 执行指令
+        self.pc_auto_increase(target)  # PC自增或跳转
+
+    def step_cached(self):
+        """静默模式下的指令周期：命中预译码缓存时跳过取指与译码，此时MAR/MDR/IR不更新"""
+        pc = self.PC.read_int()
+        entry = self.decode_cache.lookup(pc)
+        if entry is not None:
+            handler, des, src1, src2, is_branch = entry
+            offset = handler([des, src1, src2])
+            if is_branch:
+                if self.predictor is not None:
+                    self.predictor.update(pc, offset is not None, pc + branch_offset(des, src1, src2))
+                if offset is not None:
+                    self.PC.write_int(pc + offset)
+                    return
+        self.PC.write_int(pc + 1)
+
+    def load_program(self, file_name='codes.txt'):
+        """编译代码文件并初始化PC寄存器"""
+        translater = Translater(self.memory, self.instructions)  # 编译器，与CPU共用指令集
+        translater.compile_code(file_name, self.tracer)  # 编译代码
         del translater
         self.PC_instruction_init()  # 初始化PC寄存器
-        # 执行程序
-        while not self.program_is_end():
-            print('Run Code:')
-            self.get_instruction()  # 取指令
-            self.execute_code()  # 执行指令
-            self.pc_auto_increase()  # PC自增
-        print("Program End!")
-        print('-' * Separate_len)
 
-    def show_memory(self):
-        # 展示内存
-        i = 0
-        for m in self.memory.memory:
-            print(m.read())
-            i += 1
-            if i % 4 == 0:
-                print()
+    def load_object(self, obj):
+        """
+        载入汇编输出的目标文件(project1.objfile.ObjectFile)：代码段一次性复制到内存末尾，
+        数据段复制到其基地址，随后初始化PC寄存器
+        """
+        if obj.code_base is None:
+            program_address = self.memory.address_len // 4 - obj.code_words
+        else:
+            program_address = obj.code_base
+        self.memory.program_index = program_address * 4  # 代码段指针为字节地址
+        self.memory.write_bytes(self.memory.program_index, obj.code)
+        if obj.data:
+            self.memory.write_bytes(obj.data_base * 4, obj.data)
+        self.PC_instruction_init()  # 初始化PC寄存器
+
+    def execute(self, max_cycles=None):
+        """
+        从当前PC开始执行，直到程序结束
+        :param max_cycles: 最多执行的指令周期数，为None时不限制；用完时停在下一条指令处
+        """
+        if max_cycles is None:
+            while not self.program_is_end():
+                self.step()
+        else:
+            limit = self.cycles + max_cycles
+            while self.cycles < limit and not self.program_is_end():
+                self.step()
+        if self.tracer is not None and self.program_is_end():
+            self.tracer('end', self)
+
+    def run(self, file_name='codes.txt', trace=None, jit=False, cache=False, pipeline=False):
+        """
+        编译并执行程序
+        :param file_name: 代码文件
+        :param trace: 跟踪方式，None为静默运行，TRACE_VERBOSE为逐条打印，也可传入自定义的跟踪器 tracer(event, source, *args)
+        :param jit: 为True且静默运行时，使用基本块翻译引擎(project1.jit.BlockEngine)执行
+        :param cache: 为True时通过project1.objfile按内容哈希缓存汇编结果，源码未变化时跳过汇编
+        :param pipeline: 为True且静默运行时，使用5级流水线模型(project1.pipeline.Pipeline)执行，
+                         为'stall'时关闭数据转发，返回流水线的统计结果
+        """
+        self.tracer = make_tracer(trace)
+        if cache:
+            from project1.objfile import assemble_cached  # 延迟导入，避免循环引用
+            self.load_object(assemble_cached(file_name, tracer=self.tracer, address_len=self.memory.address_len))
+        else:
+            self.load_program(file_name)
+        if pipeline and self.tracer is None:
+            from project1.pipeline import Pipeline  # 延迟导入，避免循环引用
+            engine = Pipeline(self, forwarding=pipeline != 'stall')
+            engine.run()
+            engine.close()
+            return engine.report()
+        if jit and self.tracer is None:
+            from project1.jit import BlockEngine  # 延迟导入，避免循环引用
+            BlockEngine(self).run()
+        else:
+            self.execute()
+
+    def snapshot(self):
+        """对寄存器、标志位与内存拍快照(project1.snapshot.Snapshot)，内存页写时复制"""
+        from project1.snapshot import Snapshot  # 延迟导入，避免循环引用
+        return Snapshot.capture(self)
+
+    def restore(self, snapshot):
+        """恢复到快照时的状态，同一快照可以反复恢复"""
+        snapshot.restore(self)
+
+    def attach_cache(self, hierarchy):
+        """
+        在指令的访存操作与内存之间接入缓存(project1.cache.CacheHierarchy)，
+        hierarchy为None时恢复为直接访问内存
+        """
+        self.data_memory = self.memory if hierarchy is None else hierarchy
+        self.instructions.set_memory(self.data_memory)
+        return hierarchy
+
+    def attach_predictor(self, predictor):
+        """
+        接入分支预测器(project1.predictor中的预测器)，之后执行的每条跳转指令都交给它预测并统计，
+        predictor为None时不再统计。流水线模型按预测结果取指
+        """
+        self.predictor = predictor
+        return predictor
+
+    def show_memory(self, start=0, end=None, mode='cells', file=None):
+        """
+        展示内存，由project1.dump逐块格式化
+        :param start: 起始字节地址
+        :param end: 结束字节地址(不含)，默认为内存末尾
+        :param mode: 'cells'为每行一个单元，另有'hex'、'bin'、'ascii'
+        :param file: 输出的文件名或文本文件对象，默认为标准输出
+        """
+        from project1.dump import dump  # 延迟导入，只在转储时需要
+        dump(self.memory, start, end, mode, file=sys.stdout if file is None else file)
+
+
+def create_cpu(address_len=256, program=None, trace=None, init_memory=False):
+    """
+    构建CPU的工厂函数，不打印任何初始化信息
+    :param address_len: 内存寻址长度(字节)
+    :param program: None时只构建CPU；代码文件名则汇编并载入；也可以是目标文件(project1.objfile.ObjectFile)
+    :param trace: 载入程序及之后运行时使用的跟踪方式，同CPU.run
+    :param init_memory: 是否向内存写入示例程序所需的初始数据
+    :return: 已初始化PC、可以直接调用execute的CPU对象
+    """
+    cpu = CPU(address_len=address_len, verbose=False, init_memory=init_memory)
+    cpu.tracer = make_tracer(trace)
+    if isinstance(program, str):
+        cpu.load_program(program)
+    elif program is not None:
+        cpu.load_object(program)
+    return cpu
 
 
 if __name__ == '__main__':
+    # 在仓库根目录下通过 python -m project1.project1 或 python project1/project1.py 运行
     cpu = CPU()
-    cpu.run()
+    cpu.run(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'codes.txt'), trace=TRACE_VERBOSE)
     # cpu.show_memory()
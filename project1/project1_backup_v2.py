@@ -15,6 +15,8 @@
 class Word:
     """字类"""
 
+    __slots__ = ('data',)
+
     def __init__(self, num=None, num_str=None, num_list=None):
         """初始化函数"""
         if num is not None:
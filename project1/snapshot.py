@@ -0,0 +1,128 @@
+# *******************************************************
+# 简介：该模块实现了CPU状态的快照与恢复。快照保存PC/MAR/MDR/IR、
+#      通用寄存器、ALU标志位、指令周期数以及内存。内存页在快照与
+#      CPU之间共享(写时复制)：拍快照时只有上次快照之后写过的页需要
+#      冻结为bytes，恢复时只复制页字典，之后哪一页被写入才复制哪一页，
+#      因此从同一状态反复重启的开销与访问过的页数成正比，与内存大小无关。
+#      快照可以序列化为紧凑的二进制格式(全0页省略，整体经zlib压缩)：
+#         文件头   magic(4B) 版本(2B) 保留(2B)
+#         正文(zlib压缩)
+#                  寻址长度(8B) 代码段指针(8B) 周期数(8B)
+#                  PC MAR MDR IR(各4B) 标志位(1B) 页数(4B)
+#                  通用寄存器 32 * 4B
+#                  每页：页号(4B) 页内容(4KiB，不足一页的最后一页补0)
+#      所有整数均为小端序。
+# *******************************************************
+
+from array import array
+import os
+import struct
+import zlib
+
+from project1.project1 import CPU, PAGE_BITS, PAGE_SIZE
+
+MAGIC = b'P1SS'  # 快照文件标识
+VERSION = 1  # 快照格式版本
+_header = struct.Struct('<4sHH')
+_state = struct.Struct('<QQQIIIIBI')
+_registers = struct.Struct('<32I')
+_page_number = struct.Struct('<I')
+_zero_page = bytes(PAGE_SIZE)
+FLAG_NAMES = ('carry', 'overflow', 'zero', 'negative')  # 标志位，按位序排列
+
+
+class Snapshot:
+    """CPU状态快照类，创建后不可修改"""
+
+    def __init__(self, registers, flags, cycles, pages, address_len, program_index):
+        """
+        :param registers: 专用寄存器 (PC, MAR, MDR, IR) 与32个通用寄存器，字典
+        :param flags: ALU标志位 (carry, overflow, zero, negative)
+        :param cycles: 指令周期数
+        :param pages: 页号 -> bytes
+        :param address_len: 内存寻址长度
+        :param program_index: 代码段指针(字节地址)
+        """
+        self.registers = registers
+        self.flags = flags
+        self.cycles = cycles
+        self.pages = pages
+        self.address_len = address_len
+        self.program_index = program_index
+
+    @classmethod
+    def capture(cls, cpu: CPU):
+        """对CPU拍快照"""
+        registers = {
+            'PC': cpu.PC.read_int(),
+            'MAR': cpu.MAR.read_int(),
+            'MDR': cpu.MDR.read_int(),
+            'IR': cpu.IR.read_int(),
+            'GR': tuple(cpu.GR.data),
+        }
+        flags = tuple(getattr(cpu.ALU, name) for name in FLAG_NAMES)
+        memory = cpu.memory
+        return cls(registers, flags, cpu.cycles, memory.share_pages(), memory.address_len, memory.program_index)
+
+    def restore(self, cpu: CPU):
+        """将CPU恢复到快照时的状态，快照本身不受之后执行的影响"""
+        registers = self.registers
+        cpu.PC.write_int(registers['PC'])
+        cpu.MAR.write_int(registers['MAR'])
+        cpu.MDR.write_int(registers['MDR'])
+        cpu.IR.write_int(registers['IR'])
+        cpu.GR.data[:] = array('I', registers['GR'])
+        for name, value in zip(FLAG_NAMES, self.flags):
+            setattr(cpu.ALU, name, value)
+        cpu.cycles = self.cycles
+        cpu.memory.load_pages(self.pages, self.address_len, self.program_index)
+
+    def to_bytes(self, level=6):
+        """序列化，level为zlib压缩级别"""
+        registers = self.registers
+        flags = sum(1 << bit for bit, value in enumerate(self.flags) if value)
+        pages = [(number, page) for number, page in sorted(self.pages.items()) if page != _zero_page[:len(page)]]
+        parts = [_state.pack(self.address_len, self.program_index, self.cycles, registers['PC'], registers['MAR'],
+                             registers['MDR'], registers['IR'], flags, len(pages)),
+                 _registers.pack(*registers['GR'])]
+        for number, page in pages:
+            parts.append(_page_number.pack(number))
+            parts.append(page.ljust(PAGE_SIZE, b'\0'))  # 不足一页的最后一页补齐
+        return _header.pack(MAGIC, VERSION, 0) + zlib.compress(b''.join(parts), level)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """反序列化"""
+        if len(data) < _header.size:
+            raise Exception(r"Snapshot truncated!")
+        magic, version, _ = _header.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception(r"Not a version %d snapshot!" % VERSION)
+        body = zlib.decompress(memoryview(data)[_header.size:])
+        address_len, program_index, cycles, pc, mar, mdr, ir, flags, page_count = _state.unpack_from(body, 0)
+        offset = _state.size
+        registers = {'PC': pc, 'MAR': mar, 'MDR': mdr, 'IR': ir, 'GR': _registers.unpack_from(body, offset)}
+        offset += _registers.size
+        pages = {}
+        for _ in range(page_count):
+            number, = _page_number.unpack_from(body, offset)
+            offset += _page_number.size
+            pages[number] = body[offset:offset + min(PAGE_SIZE, address_len - (number << PAGE_BITS))]
+            offset += PAGE_SIZE
+        if offset != len(body):
+            raise Exception(r"Snapshot truncated!")
+        flag_values = tuple(bool(flags >> bit & 1) for bit in range(len(FLAG_NAMES)))
+        return cls(registers, flag_values, cycles, pages, address_len, program_index)
+
+    def save(self, file_name, level=6):
+        """写入快照文件，先写临时文件再替换"""
+        tmp_name = '%s.%d.tmp' % (file_name, os.getpid())
+        with open(tmp_name, 'wb') as f:
+            f.write(self.to_bytes(level))
+        os.replace(tmp_name, file_name)
+
+    @classmethod
+    def load(cls, file_name):
+        """读取快照文件"""
+        with open(file_name, 'rb') as f:
+            return cls.from_bytes(f.read())
@@ -0,0 +1,251 @@
+# *******************************************************
+# 简介：该模块实现了向量化的锁步仿真(VectorCPU)，用于多个实例运行
+#      同一程序、处理不同数据的场景。N个实例(通道)的通用寄存器保存
+#      为(N, 32)的uint32数组，内存保存为(N, 寻址长度)的uint8数组，
+#      每条译码后的指令以一次数组运算作用于所有通道。
+#      各通道的PC分别保存；当PC发生分歧时，每次选择PC最小的一组
+#      通道执行，其余通道被屏蔽，等待汇合。跳转指令按各通道的标志位
+#      分别判断，结果不一致时PC发生分歧；所有通道的PC再次相同时恢复
+#      为整体执行。
+#      代码段由所有通道共享，只译码一次，因此不支持向代码段写入
+#      (自修改代码)。该模块依赖NumPy。
+# *******************************************************
+
+from project1.objfile import assemble
+from project1.project1 import (ALUInstruction, BranchInstruction, CompareInstruction, LoadInstruction,
+                               StoreInstruction, WORD_MASK, branch_offset, decode, isa_tables)
+
+try:
+    import numpy as np
+except ImportError:  # NumPy为可选依赖，只有向量化仿真需要
+    np = None
+
+SIGN_BIT = 0x80000000  # 符号位
+
+
+class VectorCPU:
+    """向量化CPU类"""
+
+    def __init__(self, lanes, address_len=256):
+        """
+        :param lanes: 通道(实例)数量
+        :param address_len: 每个通道的内存寻址长度(字节)，内存为稠密数组
+        """
+        if np is None:
+            raise ImportError(r"VectorCPU requires NumPy!")
+        if address_len % 4:
+            raise Exception(r"Address length must be word aligned!")
+        self.lanes = lanes
+        self.address_len = address_len
+        self.GR = np.zeros((lanes, 32), dtype=np.uint32)  # 通用寄存器
+        self.memory = np.zeros((lanes, address_len), dtype=np.uint8)  # 内存
+        self.words = self.memory.view(np.dtype('<u4'))  # 内存的字视图，(N, 寻址长度/4)
+        self.PC = np.zeros(lanes, dtype=np.int64)  # 各通道的PC(字地址)
+        self.cycles = np.zeros(lanes, dtype=np.int64)  # 各通道执行的指令周期数
+        self.carry = np.zeros(lanes, dtype=bool)  # 进位标志
+        self.overflow = np.zeros(lanes, dtype=bool)  # 溢出标志
+        self.zero = np.zeros(lanes, dtype=bool)  # 零标志
+        self.negative = np.zeros(lanes, dtype=bool)  # 负数标志
+        self.program_index = address_len  # 代码段指针(字节地址)
+        self.program = {}  # 字地址 -> (处理函数, des, src1, src2)
+        self.uniform_pc = None  # 所有通道PC一致时的PC，发生分歧时为None
+        self.divergences = 0  # 跳转导致PC分歧的次数
+        self.reconvergences = 0  # 分歧的通道重新汇合的次数
+        self.handlers = {
+            'add': self.alu_add,
+            'sub': self.alu_sub,
+            'and_': self.alu_logic(np.bitwise_and),
+            'or_': self.alu_logic(np.bitwise_or),
+            'xor': self.alu_logic(np.bitwise_xor),
+            'shl': self.alu_shl,
+            'shr': self.alu_shr,
+            'sar': self.alu_sar,
+        }  # ALU运算名称 -> 向量化实现
+        self.conditions = {
+            'always': None,
+            'equal': lambda lanes: self.zero[lanes],
+            'not_equal': lambda lanes: ~self.zero[lanes],
+            'less': lambda lanes: self.negative[lanes] != self.overflow[lanes],
+            'greater_equal': lambda lanes: self.negative[lanes] == self.overflow[lanes],
+            'greater': lambda lanes: ~self.zero[lanes] & (self.negative[lanes] == self.overflow[lanes]),
+            'less_equal': lambda lanes: self.zero[lanes] | (self.negative[lanes] != self.overflow[lanes]),
+        }  # 跳转条件名称 -> 向量化的条件判断，None为无条件
+
+    def load_object(self, obj):
+        """载入目标文件：代码段复制到每个通道的内存末尾并译码一次，数据段复制到每个通道"""
+        if obj.code_base is None:
+            program_address = self.address_len // 4 - obj.code_words
+        else:
+            program_address = obj.code_base
+        self.program_index = program_address * 4
+        code = np.frombuffer(obj.code, dtype=np.uint8)
+        self.memory[:, self.program_index:self.program_index + len(code)] = code
+        if len(obj.data):
+            data = np.frombuffer(obj.data, dtype=np.uint8)
+            self.memory[:, obj.data_base * 4:obj.data_base * 4 + len(data)] = data
+        self.program = {}
+        for offset, machine_code in enumerate(obj.machine_codes()):
+            self.program[program_address + offset] = self.decode_instruction(machine_code)
+        self.PC[:] = program_address
+        self.uniform_pc = program_address
+
+    def load_program(self, file_name):
+        """汇编代码文件并载入"""
+        self.load_object(assemble(file_name, self.address_len))
+
+    def decode_instruction(self, machine_code):
+        """将机器码译码为 (处理函数, des, src1, src2)，无法识别的指令视为空操作"""
+        op_code, des, src1, src2 = decode(machine_code)
+        instruction_class = isa_tables()[0].get(op_code)  # 只需要指令类，不创建指令对象
+        if instruction_class is None:
+            return None
+        if issubclass(instruction_class, LoadInstruction):
+            handler = self.load
+        elif issubclass(instruction_class, StoreInstruction):
+            handler = self.store
+        elif issubclass(instruction_class, ALUInstruction) and instruction_class.alu_operation in self.handlers:
+            handler = self.handlers[instruction_class.alu_operation]
+        elif issubclass(instruction_class, CompareInstruction):
+            handler = self.compare
+        elif issubclass(instruction_class, BranchInstruction) and instruction_class.condition in self.conditions:
+            handler = self.branch(self.conditions[instruction_class.condition])
+        else:
+            raise Exception(r"Instruction %s is not supported by VectorCPU!" % instruction_class.instruction_name)
+        return handler, des, src1, src2
+
+    def set_word(self, index, values):
+        """向所有通道的字地址index写入数据，values为标量或长度为通道数的数组"""
+        self.words[:, index] = values
+
+    def get_word(self, index):
+        """读取所有通道字地址index处的数据"""
+        return self.words[:, index].copy()
+
+    # ---------------- 指令的向量化实现，lanes为参与执行的通道 ----------------
+
+    def load(self, lanes, des, src1, src2):
+        self.GR[lanes, des] = self.words[lanes, src1]
+
+    def store(self, lanes, des, src1, src2):
+        if des * 4 >= self.program_index:
+            raise Exception(r"VectorCPU does not support writing to the code segment!")
+        self.words[lanes, des] = self.GR[lanes, src1]
+
+    def set_result_flags(self, lanes, result):
+        self.zero[lanes] = result == 0
+        self.negative[lanes] = (result & SIGN_BIT) != 0
+
+    def alu_add(self, lanes, des, src1, src2):
+        a, b = self.GR[lanes, src1], self.GR[lanes, src2]
+        result = a + b  # uint32按2^32回绕
+        self.carry[lanes] = result < a
+        self.overflow[lanes] = (~(a ^ b) & (a ^ result) & SIGN_BIT) != 0
+        self.set_result_flags(lanes, result)
+        self.GR[lanes, des] = result
+
+    def alu_sub(self, lanes, des, src1, src2):
+        a, b = self.GR[lanes, src1], self.GR[lanes, src2]
+        result = a - b
+        self.carry[lanes] = a < b
+        self.overflow[lanes] = ((a ^ b) & (a ^ result) & SIGN_BIT) != 0
+        self.set_result_flags(lanes, result)
+        self.GR[lanes, des] = result
+
+    def compare(self, lanes, des, src1, src2):
+        a, b = self.GR[lanes, src1], self.GR[lanes, src2]
+        result = a - b
+        self.carry[lanes] = a < b
+        self.overflow[lanes] = ((a ^ b) & (a ^ result) & SIGN_BIT) != 0
+        self.set_result_flags(lanes, result)
+
+    def branch(self, condition):
+        # 跳转指令的处理函数返回 (跳转偏移, 各通道是否跳转)，由step更新PC
+        def handler(lanes, des, src1, src2):
+            return branch_offset(des, src1, src2), True if condition is None else condition(lanes)
+        return handler
+
+    def alu_logic(self, function):
+        def handler(lanes, des, src1, src2):
+            result = function(self.GR[lanes, src1], self.GR[lanes, src2])
+            self.carry[lanes] = False
+            self.overflow[lanes] = False
+            self.set_result_flags(lanes, result)
+            self.GR[lanes, des] = result
+        return handler
+
+    def finish_shift(self, lanes, des, result, carry):
+        self.carry[lanes] = carry
+        self.overflow[lanes] = False
+        self.set_result_flags(lanes, result)
+        self.GR[lanes, des] = result
+
+    def alu_shl(self, lanes, des, src1, src2):
+        a, n = self.GR[lanes, src1], self.GR[lanes, src2] & 31
+        carry = (n > 0) & (((a >> ((32 - n) & 31)) & 1) != 0)
+        self.finish_shift(lanes, des, a << n, carry)
+
+    def alu_shr(self, lanes, des, src1, src2):
+        a, n = self.GR[lanes, src1], self.GR[lanes, src2] & 31
+        carry = (n > 0) & (((a >> ((n - 1) & 31)) & 1) != 0)
+        self.finish_shift(lanes, des, a >> n, carry)
+
+    def alu_sar(self, lanes, des, src1, src2):
+        a, n = self.GR[lanes, src1], self.GR[lanes, src2] & 31
+        carry = (n > 0) & (((a >> ((n - 1) & 31)) & 1) != 0)
+        self.finish_shift(lanes, des, (a.view(np.int32) >> n.view(np.int32)).view(np.uint32), carry)
+
+    # ---------------- 执行 ----------------
+
+    def program_is_end(self):
+        """所有通道是否都已执行完毕"""
+        if self.uniform_pc is not None:
+            return self.uniform_pc * 4 >= self.address_len
+        return not (self.PC * 4 < self.address_len).any()
+
+    def step(self):
+        """执行一步：选出PC最小的一组活动通道执行一条指令，其余通道被屏蔽"""
+        if self.uniform_pc is not None:
+            pc = self.uniform_pc
+            lanes = slice(None)
+        else:
+            active = self.PC * 4 < self.address_len
+            pc = int(self.PC[active].min())
+            selected = active & (self.PC == pc)
+            if selected.all():
+                # 所有通道重新汇合
+                lanes = slice(None)
+                self.uniform_pc = pc
+                self.reconvergences += 1
+            else:
+                lanes = np.flatnonzero(selected)
+        entry = self.program.get(pc)
+        branch = None
+        if entry is not None:
+            handler, des, src1, src2 = entry
+            branch = handler(lanes, des, src1, src2)
+        self.cycles[lanes] += 1
+        if branch is None:
+            self.PC[lanes] += 1
+            if self.uniform_pc is not None:
+                self.uniform_pc += 1
+            return
+        offset, taken = branch
+        target = (pc + offset) & WORD_MASK
+        if taken is True or taken.all():
+            self.PC[lanes] = target
+            next_pc = target
+        elif not taken.any():
+            self.PC[lanes] = pc + 1
+            next_pc = pc + 1
+        else:
+            self.PC[lanes] = np.where(taken, target, pc + 1)
+            next_pc = None
+        if self.uniform_pc is not None:
+            self.uniform_pc = next_pc
+            if next_pc is None:
+                self.divergences += 1
+
+    def run(self):
+        """执行到所有通道结束"""
+        while not self.program_is_end():
+            self.step()
@@ -1,58 +1,163 @@
-import math
+from array import array
+import argparse
+
+MEMORY_SIZE = 100  #: Cardiac 的内存单元数
+WORD_LIMIT = 1000  #: 存储指令只保留累加器的低3位十进制数
+RECOMPILE_LIMIT = 4  #: 入口处的代码被改写超过这么多次后不再编译, 例如引导程序每读一张卡片都改写自己
+
+
+def pad(data, length=3):
+    """  在数字前面补0, 负数保留符号. 仿真器中只有输出时才把整数转换为字符串.  """
+    digits = '%0*d' % (length, abs(data))
+    if data < 0:
+        return '-' + digits[-length:]
+    return digits[-length:]
 
 
 class Memory(object):
     """ 本类实现仿真器的虚拟内存空间的各种功能 """
 
     def init_mem(self):
-        """  用空白字符串清除 Cardiac 系统内存中的所有数据  """
-        self.mem = ['' for i in range(0, 100)]
-        self.mem[0] = '001'  #: 启动 Cardiac 系统.
+        """  用0清除 Cardiac 系统内存中的所有数据. 内存以有符号16位整数数组(array('h'))保存, 每个单元2字节.  """
+        self.mem = array('h', bytes(2 * MEMORY_SIZE))
+        self.mem[0] = 1  #: 启动 Cardiac 系统, 即 '001'.
 
     def get_memint(self, data):
-        """  由于我们是以字符串形式(*string* based)保存内存数据的, 要仿真 Cardiac, 就要将字符串转化成整数. 如果是其他存储形式的内存, 如 mmap, 可以根据需要重写本函数.  """
-        return int(self.mem[data])
+        """  读取一个内存单元的整数值. 如果是其他存储形式的内存, 如 mmap, 可以根据需要重写本函数.  """
+        return self.mem[data]
+
+    def set_memint(self, data, value):
+        """  写入一个内存单元, 与原先的字符串存储一样只保留低3位十进制数和符号.  """
+        if value < 0:
+            self.mem[data] = -(-value % WORD_LIMIT)
+        else:
+            self.mem[data] = value % WORD_LIMIT
 
     def pad(self, data, length=3):
         """  在数字前面补0  """
-        orig = int(data)
-        padding = '0' * length
-        data = '%s%s' % (padding, abs(data))
-        if orig < 0:
-            return '-' + data[-length:]
-        return data[-length:]
+        return pad(data, length)
+
+
+class CardReader(object):
+    """ 读卡器: 按需从文件或任意可迭代对象(列表, 生成器, 文件对象...)逐张读取卡片, 不预先读入整副卡片.
+    读取卡片的生成器在第一次读卡时才创建, 没有装入卡片的仿真器实例不必为它占用内存. """
+
+    __slots__ = ('source', 'cards')
+
+    def __init__(self, source=()):
+        """  source 为文件名或可迭代对象, 每个元素是一张卡片, 行尾的换行符会被去掉.  """
+        self.source = source
+        self.cards = None  #: 卡片生成器, 第一次读卡时创建
+
+    @staticmethod
+    def iter_cards(source):
+        """  逐张生成卡片, 文件在读到第一张卡片时才打开, 读完后关闭.  """
+        if isinstance(source, str):
+            with open(source, 'r') as f:
+                for line in f:
+                    yield line.rstrip('\r\n')
+        else:
+            for line in source:
+                yield line.rstrip('\r\n')
+
+    def read(self):
+        """  读取下一张卡片, 卡片用完时抛出 EOFError.  """
+        cards = self.cards
+        if cards is None:
+            cards = self.cards = self.iter_cards(self.source)
+            self.source = None
+        try:
+            return next(cards)
+        except StopIteration:
+            raise EOFError('Card reader is empty')
+
+
+class OutputSink(object):
+    """ 输出设备: target 为 None 时把输出的行保存在内存中(原来的行为);
+    否则为文件名或有 write 方法的流, 输出先缓冲, 每满 chunk_size 行一次性写出, 占用的内存与输出总量无关.
+    保存输出的列表在第一次输出时才创建. """
+
+    __slots__ = ('chunk_size', 'lines', 'stream', 'owned')
+
+    def __init__(self, target=None, chunk_size=8192):
+        self.chunk_size = chunk_size
+        self.lines = None  #: 内存模式下的全部输出, 流模式下尚未写出的缓冲, 第一次输出时创建
+        self.stream = None  #: 输出流, 内存模式下为 None
+        self.owned = False  #: 输出流是否由本对象打开, 是则由 close 关闭
+        if isinstance(target, str):
+            self.stream = open(target, 'w')
+            self.owned = True
+        elif target is not None:
+            self.stream = target
+
+    def write(self, line):
+        """  输出一行, 缓冲满时写出.  """
+        lines = self.lines
+        if lines is None:
+            lines = self.lines = []
+        lines.append(line)
+        if self.stream is not None and len(lines) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """  写出缓冲的行, 内存模式下什么都不做.  """
+        if self.stream is not None and self.lines:
+            self.stream.write('\n'.join(self.lines) + '\n')
+            del self.lines[:]
+            self.stream.flush()
+
+    def getvalue(self):
+        """  内存中保存的输出, 流模式下只有尚未写出的部分.  """
+        return '\n'.join(self.lines or ())
+
+    def close(self):
+        """  写出缓冲并关闭由本对象打开的文件.  """
+        self.flush()
+        if self.owned:
+            self.stream.close()
+            self.owned = False
 
 
 class IO(object):
-    """ 本类实现仿真器的 I/O 功能. To enable alternate methods of input and output, swap this. """
+    """ 本类实现仿真器的 I/O 功能. 输入输出设备 reader/output 可以替换, 例如 open_output 把输出改为写文件. """
 
     def init_reader(self):
         """  初始化 reader.  """
-        self.reader = []  #: 此变量在类初始化后, 可以用来读取输入的数据.
+        self.reader = CardReader()  #: 读卡器, 用 read_deck 装入卡片.
 
     def init_output(self):
         """  初始化诸如： deck/paper/printer/teletype/ 之类的输出功能...  """
-        self.output = []
+        self.output = OutputSink()
 
-    def read_deck(self, fname):
-        """  将指令读到 reader 中.  """
-        self.reader = [s.rstrip('\n') for s in open(fname, 'r').readlines()]
-        self.reader.reverse()
+    def read_deck(self, source):
+        """  装入卡片: source 为文件名或可迭代对象, 卡片在执行输入指令时才逐张读取.  """
+        self.reader = CardReader(source)
+
+    def open_output(self, target, chunk_size=8192):
+        """  把输出改为缓冲写入文件(文件名)或流, 原来的输出设备先写出并关闭.  """
+        self.output.close()
+        self.output = OutputSink(target, chunk_size)
 
     def format_output(self):
         """  格式化虚拟 I/O 设备的输出(output)  """
-        return '\n'.join(self.output)
+        return self.output.getvalue()
+
+    def end_output(self):
+        """  一次运行结束: 内存中的输出打印出来后清空, 流输出则写出缓冲.  """
+        if self.output.stream is None:
+            print("Output:\n%s" % self.format_output())
+            if self.output.lines is not None:
+                self.init_output()
+        else:
+            self.output.flush()
 
     def get_input(self):
-        """  获取 IO 的输入(input), 也就是说用 reader 读取数据, 代替原来的 raw_input() .  """
-        try:
-            return self.reader.pop()
-        except IndexError:
-            # 如果 reader 遇到文件结束标志(EOF) 就用 raw_input() 代替 reader.
-            return input('INP: ')[:3]
+        """  获取 IO 的输入(input), 也就是说用 reader 读取数据. 卡片用完时抛出 EOFError, 不再等待交互输入.  """
+        return self.reader.read()
 
     def stdout(self, data):
-        self.output.append(data)
+        """  输出一个内存单元的整数值, 在这里才格式化为3位字符串.  """
+        self.output.write(pad(data))
 
 
 class CPU(object):
@@ -61,6 +166,7 @@ class CPU(object):
     def __init__(self):
         self.init_cpu()
         self.reset()
+        self.compiler = None  #: 预编译器 DeckCompiler, 第一次以 compiled=True 运行时创建
         try:
             self.init_mem()
         except AttributeError:
@@ -79,8 +185,8 @@ class CPU(object):
         self.running = False  #: 仿真器的运行状态?
 
     def init_cpu(self):
-        """  本函数自动在哈希表中创建指令集. 这样我们就可以使用 case/select 方式调用指令, 同时保持代码简洁. 当然, 在 process(） 中使用 getattr 然后用 try/except 捕捉异常也是可以的, 但是代码看起来就没那么简洁了.  """
-        self.__opcodes = {}
+        """  本函数自动创建指令集分派表 opcodes, 以指令的十进制数字为下标, 0-9 每一位都必须有对应的 opcode_N 方法. 子类(包括基类)中定义的 opcode_N 都会被找到, 子类可以覆盖基类的指令.  """
+        opcodes = {}
         classes = [self.__class__]  #: 获取全部类, 包含基类.
         while classes:
             cls = classes.pop()  # 把堆栈中的类弹出来
@@ -92,22 +198,32 @@ class CPU(object):
                         opcode = int(name[7:])
                     except ValueError:
                         raise NameError('Opcodes must be numeric, invalid opcode: %s' % name[7:])
-        self.__opcodes.update({opcode: getattr(self, 'opcode_%s' % opcode)})
+                    opcodes[opcode] = getattr(self, name)
+        missing = [opcode for opcode in range(10) if opcode not in opcodes]
+        if missing:
+            raise NotImplementedError('Missing opcodes: %s' % ', '.join(map(str, missing)))
+        self.opcodes = [opcodes[opcode] for opcode in range(10)]  #: 指令数字 -> 指令方法
 
     def fetch(self):
         """  根据指令指针(program pointer) 从内存中读取指令, 然后指令指针加 1.  """
         self.ir = self.get_memint(self.pc)
         self.pc += 1
 
+    def decode(self):
+        """  把指令寄存器拆分为 (指令数字, 地址). 负数不是合法的指令.  """
+        if self.ir < 0:
+            raise ValueError('Invalid instruction %d at %d' % (self.ir, self.pc - 1))
+        return divmod(self.ir, 100)
+
     def process(self):
-        """  处理当前指令， 只处理一条. 默认情况下是在循环代码中调用(running loop), 也可以自己写代码, 以单步调试方式调用, 或者利用 time.sleep() 降低执行速度. 在 TK/GTK/Qt/curses 做的界面的线程中调用本函数也是可以的.  """
+        """  处理当前指令， 只处理一条. 可以自己写代码, 以单步调试方式调用, 或者利用 time.sleep() 降低执行速度. 在 TK/GTK/Qt/curses 做的界面的线程中调用本函数也是可以的.  """
         self.fetch()
-        opcode, data = int(math.floor(self.ir / 100)), self.ir % 100
-        self.__opcodes[opcode](data)
+        opcode, data = self.decode()
+        self.opcodes[opcode](data)
 
     def opcode_0(self, data):
         """ 输入指令 """
-        self.mem[data] = self.get_input()
+        self.set_memint(data, int(self.get_input()))
 
     def opcode_1(self, data):
         """ 清除累加器指令 """
@@ -123,20 +239,20 @@ class CPU(object):
             self.pc = data
 
     def opcode_4(self, data):
-        """ 位移指令 """
-        x, y = int(math.floor(data / 10)), int(data % 10)
-        for i in range(0, x):
-            self.acc = (self.acc * 10) % 10000
-        for i in range(0, y):
-            self.acc = int(math.floor(self.acc / 10))
+        """ 位移指令: 先左移 x 位(保留4位十进制数), 再右移 y 位(向下取整) """
+        x, y = divmod(data, 10)
+        if x:
+            self.acc = self.acc * 10 ** x % 10000
+        if y:
+            self.acc //= 10 ** y
 
     def opcode_5(self, data):
         """ 输出指令 """
-        self.stdout(self.mem[data])
+        self.stdout(self.get_memint(data))
 
     def opcode_6(self, data):
         """ 存储指令 """
-        self.mem[data] = self.pad(self.acc)
+        self.set_memint(data, self.acc)
 
     def opcode_7(self, data):
         """ 减法指令 """
@@ -150,15 +266,235 @@ class CPU(object):
         """ 停止/复位指令"""
         self.reset()
 
-    def run(self, pc=None):
-        """ 这段代码会一直运行， 直到遇到 halt/reset 指令才停止. """
+    def run(self, pc=None, compiled=False):
+        """ 这段代码会一直运行， 直到遇到 halt/reset 指令才停止. 循环中直接读内存数组并按下标分派, 与 process() 的效果相同.
+        子类覆盖了 process/fetch/decode/get_memint 时逐条调用 process(), 不走直接读内存的循环, 也不编译.
+        compiled 为 True 时先由 DeckCompiler 把内存中的程序编译为 Python 函数执行, 遇到自修改代码时回到这里解释执行,
+        解释执行中发生跳转后再从跳转目标进入编译后的程序. """
         if pc:
             self.pc = pc
         self.running = True
+        cls = type(self)
+        if not (cls.process is CPU.process and cls.fetch is CPU.fetch and cls.decode is CPU.decode
+                and cls.get_memint is Memory.get_memint):
+            while self.running:
+                self.process()
+            self.end_output()
+            return
+        compiler = None
+        if compiled:
+            if self.compiler is None:
+                self.compiler = DeckCompiler(self)
+            compiler = self.compiler
+            compiler.execute()
+        mem, opcodes = self.mem, self.opcodes
         while self.running:
-            self.process()
-        print("Output:\n%s" % self.format_output())
-        self.init_output()
+            pc = self.pc
+            ir = self.ir = mem[pc]
+            self.pc = pc + 1
+            if ir < 0:
+                raise ValueError('Invalid instruction %d at %d' % (ir, pc))
+            opcodes[ir // 100](ir % 100)
+            if compiler is not None and self.pc != pc + 1 and self.running:
+                compiler.execute()
+        self.end_output()
+
+
+class DeckCompiler(object):
+    """ 本类把已载入内存的 Cardiac 程序预先编译为一个 Python 函数.
+
+    从入口地址出发, 沿顺序执行和跳转找出所有可达的指令, 按跳转目标划分为基本块, 每个基本块是函数中的一个标号,
+    跳转就是给 pc 赋值后回到分派循环. 基本块内连续的 1/2/7 指令合并为 acc = [acc] + 系数 * mem[地址] + ... 一个表达式,
+    整数没有溢出, 对同一单元的加减可以合并系数, 相互抵消的项直接去掉. 4 指令的移位合并为一次乘法和一次整除.
+    累加器和 pc 都是局部变量, 只在函数返回时写回 CPU.
+    0/6 指令写入已编译的代码单元(自修改代码)时, 写入完成后函数立即返回, 由 CPU.run 从下一条指令开始解释执行,
+    直到下一次跳转再进入编译后的程序. 子类覆盖了的指令, 以及非法指令, 同样在该指令处返回解释执行.
+    编译结果按入口地址缓存, 再次运行前检查代码单元是否被改写过, 改写过就重新编译; 同一入口重新编译超过
+    RECOMPILE_LIMIT 次后不再编译, 只解释执行.
+    输入输出抛出异常(例如输入耗尽)时, 先把 pc/ir/acc 写回 CPU, 与解释执行时的状态相同. """
+
+    def __init__(self, cpu):
+        self.cpu = cpu
+        self.programs = {}  #: 入口地址 -> (代码段列表 [(起始地址, 内容)], 编译后的函数), 函数为 None 表示不再编译
+        self.recompiled = {}  #: 入口地址 -> 因代码被改写而重新编译的次数
+        #: 内存被替换为其他实现时只能解释执行
+        self.usable = type(cpu).get_memint is Memory.get_memint and type(cpu).set_memint is Memory.set_memint
+
+    def supported(self, opcode):
+        """  该指令是否仍是 CPU 的原始实现, 子类覆盖了的指令不编译.  """
+        handler = self.cpu.opcodes[opcode]
+        return getattr(handler, '__func__', None) is getattr(CPU, 'opcode_%d' % opcode)
+
+    def discover(self, entry):
+        """  找出从 entry 可达的全部指令.
+        :return: (地址 -> (指令数字, 地址操作数), 基本块起始地址集合, 需要回到解释执行的地址集合)  """
+        mem = self.cpu.mem
+        code, leaders, exits = {}, {entry}, set()
+        work = [entry]
+        while work:
+            address = work.pop()
+            while address not in code and address not in exits:
+                if not 0 <= address < MEMORY_SIZE or not 0 <= mem[address] < 1000:
+                    exits.add(address)
+                    break
+                opcode, data = divmod(mem[address], 100)
+                if not self.supported(opcode):
+                    exits.add(address)
+                    break
+                code[address] = (opcode, data)
+                if opcode == 3:
+                    leaders.update((data, address + 1))
+                    work.append(data)
+                elif opcode == 8:
+                    leaders.add(data)
+                    work.append(data)
+                    break
+                elif opcode == 9:
+                    break
+                address += 1
+        return code, leaders | exits, exits
+
+    def translate(self, entry):
+        """  编译从 entry 开始的程序, 返回 (代码段列表, 函数).  """
+        code, leaders, exits = self.discover(entry)
+        labels = sorted(leaders)
+        lines = []
+        for index, label in enumerate(labels):
+            following = labels[index + 1] if index + 1 < len(labels) else None
+            lines.append('if pc == %d:' % label)
+            if label in exits:
+                lines.append('    return %d, acc, False' % label)
+                continue
+            lines.extend('    ' + line for line in self.translate_block(label, code, leaders, following))
+        source = 'def make(cpu, mem, get_input, set_memint, stdout):\n'
+        source += '    def program(pc, acc):\n'
+        source += '        at = pc\n'
+        source += '        try:\n'
+        source += '            while True:\n'
+        source += ''.join('                %s\n' % line for line in lines)
+        source += '                return pc, acc, False\n'
+        source += '        except Exception:\n'
+        source += '            cpu.pc, cpu.ir, cpu.acc = at + 1, mem[at], acc\n'
+        source += '            raise\n'
+        source += '    return program\n'
+        namespace = {}
+        exec(compile(source, '<cardiac %d>' % entry, 'exec'), namespace)
+        cpu = self.cpu
+        program = namespace['make'](cpu, cpu.mem, cpu.get_input, cpu.set_memint, cpu.stdout)
+        segments = []
+        for address in sorted(code):
+            if segments and segments[-1][1] == address:
+                segments[-1][1] = address + 1
+            else:
+                segments.append([address, address + 1])
+        return [(start, cpu.mem[start:end]) for start, end in segments], program
+
+    def translate_block(self, address, code, leaders, following):
+        """  编译一个基本块, following 是源码中紧接着的下一个标号, 顺序执行到它时不必回到分派循环.  """
+        lines = []
+        terms = {}  #: 尚未写回 acc 的 1/2/7 合并结果, 地址 -> 系数, 键 'acc' 表示在原来的 acc 上加减
+
+        def flush():
+            if not terms:
+                return
+            expression = 'acc' if terms.pop('acc', 0) else ''
+            for data in sorted(terms):
+                factor = terms[data]
+                if not factor:
+                    continue
+                term = 'mem[%d]' % data if abs(factor) == 1 else '%d * mem[%d]' % (abs(factor), data)
+                if expression:
+                    expression += (' + ' if factor > 0 else ' - ') + term
+                else:
+                    expression = term if factor > 0 else '-' + term
+            if expression != 'acc':
+                lines.append('acc = ' + (expression or '0'))
+            terms.clear()
+
+        def goto(target):
+            lines.append('pc = %d' % target)
+            if target != following:
+                lines.append('continue')
+
+        while True:
+            opcode, data = code[address]
+            address += 1
+            if opcode == 1:
+                terms.clear()
+                terms[data] = 1
+            elif opcode in (2, 7):
+                if not terms:
+                    terms['acc'] = 1
+                terms[data] = terms.get(data, 0) + (1 if opcode == 2 else -1)
+            else:
+                flush()
+            if opcode == 0:
+                lines.append('at = %d' % (address - 1))
+                lines.append('set_memint(%d, int(get_input()))' % data)
+            elif opcode == 3:
+                lines.append('if acc < 0:')
+                lines.append('    pc = %d' % data)
+                lines.append('    continue')
+            elif opcode == 4:
+                shift_left, shift_right = divmod(data, 10)
+                if shift_left:
+                    lines.append('acc = acc * %d %% 10000' % 10 ** shift_left)
+                if shift_right:
+                    lines.append('acc //= %d' % 10 ** shift_right)
+            elif opcode == 5:
+                lines.append('at = %d' % (address - 1))
+                lines.append('stdout(mem[%d])' % data)
+            elif opcode == 6:
+                lines.append('mem[%d] = acc if -%d < acc < %d else (acc %% %d if acc > 0 else -(-acc %% %d))'
+                             % (data, WORD_LIMIT, WORD_LIMIT, WORD_LIMIT, WORD_LIMIT))
+            elif opcode == 8:
+                goto(data)
+                return lines
+            elif opcode == 9:
+                lines.append('return 0, acc, True')
+                return lines
+            if opcode in (0, 6) and data in code:
+                # 自修改代码: 写入完成后回到解释执行
+                lines.append('return %d, acc, False' % address)
+                return lines
+            if address in leaders:
+                flush()
+                goto(address)
+                return lines
+
+    def lookup(self, entry):
+        """  获取入口地址的编译结果, 代码被改写过时重新编译, 不再编译的入口返回 None.  """
+        cached = self.programs.get(entry)
+        if cached is not None:
+            segments, program = cached
+            if program is None:
+                return None
+            mem = self.cpu.mem
+            for start, content in segments:
+                if mem[start:start + len(content)] != content:
+                    break
+            else:
+                return program
+            count = self.recompiled[entry] = self.recompiled.get(entry, 0) + 1
+            if count > RECOMPILE_LIMIT:
+                self.programs[entry] = segments, None
+                return None
+        segments, program = self.programs[entry] = self.translate(entry)
+        return program
+
+    def execute(self):
+        """  从 CPU 当前的 pc 开始执行编译后的程序, 停机时复位 CPU, 否则把 pc 和 acc 写回 CPU 以便继续解释执行.  """
+        if not self.usable:
+            return
+        cpu = self.cpu
+        program = self.lookup(cpu.pc)
+        if program is None:
+            return
+        pc, acc, halted = program(cpu.pc, cpu.acc)
+        if halted:
+            cpu.reset()
+        else:
+            cpu.pc, cpu.acc = pc, acc
 
 
 class Cardiac(CPU, Memory, IO):
@@ -166,10 +502,19 @@ class Cardiac(CPU, Memory, IO):
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a Cardiac deck.')
+    parser.add_argument('deck', nargs='?', default='deck1.txt', help='deck file, one card per line')
+    parser.add_argument('-o', '--output', help='stream the output cards to this file instead of printing them')
+    parser.add_argument('--compiled', action='store_true', help='run the deck through DeckCompiler')
+    args = parser.parse_args()
     c = Cardiac()
-    c.read_deck('deck1.txt')
+    c.read_deck(args.deck)
+    if args.output:
+        c.open_output(args.output)
     try:
-        c.run()
+        c.run(compiled=args.compiled)
     except:
         print("IR: %s\nPC: %s\nOutput: %s\n" % (c.ir, c.pc, c.format_output()))
         raise
+    finally:
+        c.output.close()
@@ -0,0 +1,13 @@
+# *******************************************************
+# 简介：测试的公共配置。将仓库根目录加入模块搜索路径，使测试可以
+#      直接导入project1、benchmarks以及根目录下的test.py(Cardiac)、
+#      int2float_with_bits.py。在仓库根目录下运行：
+#         python -m pytest -q tests
+# *******************************************************
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # 仓库根目录
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
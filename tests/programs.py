@@ -0,0 +1,70 @@
+# *******************************************************
+# 简介：为差分测试生成随机的project1程序。程序由Load/Store、ALU运算、
+#      Cmp和只向前跳转的分支组成，因此一定会结束；Store的地址越过
+#      代码段起点时即为自修改代码，被改写的指令可能使程序不再结束，
+#      运行这类程序时需要限制指令周期数。
+# *******************************************************
+
+import random
+
+from project1.project1 import ISA, make_machine_code
+
+ALU_OPERATIONS = ('Add', 'Sub', 'And', 'Or', 'Xor', 'Shl', 'Shr')
+BRANCHES = ('Jmp', 'Beq', 'Bne', 'Blt', 'Bge', 'Bgt', 'Ble')
+INTERESTING = (0, 1, 2, 31, 0x7FFFFFFF, 0x80000000, 0xFFFFFFFF)  # 容易触发进位、溢出与移位边界的数
+
+
+def random_program(rng: random.Random, length, registers=8, max_address=12, branches=True, max_store_address=None):
+    """
+    生成一段随机程序源码
+    :param max_address: Load/Store的字地址上限(不含)
+    :param branches: 是否包含Cmp与跳转
+    :param max_store_address: Store的字地址上限(不含)，默认与max_address相同
+    """
+    if max_store_address is None:
+        max_store_address = max_address
+    lines = []
+    for i in range(length):
+        k = rng.random()
+        label = 'L%d: ' % i
+        if k < 0.15:
+            lines.append(label + 'Load r%d, #%d' % (rng.randrange(registers), rng.randrange(max_address)))
+        elif k < 0.3:
+            lines.append(label + 'Store r%d, #%d' % (rng.randrange(registers), rng.randrange(max_store_address)))
+        elif branches and k < 0.45:
+            lines.append(label + 'Cmp r%d, r%d' % (rng.randrange(registers), rng.randrange(registers)))
+        elif branches and k < 0.6 and i + 1 < length:
+            lines.append(label + '%s #L%d' % (rng.choice(BRANCHES), rng.randrange(i + 1, length)))
+        else:
+            lines.append(label + '%s r%d, r%d, r%d' % (rng.choice(ALU_OPERATIONS), rng.randrange(registers),
+                                                       rng.randrange(registers), rng.randrange(registers)))
+    return '\n'.join(lines) + '\n'
+
+
+def random_data(rng: random.Random, words):
+    """生成数据区的初始值"""
+    return [rng.choice(INTERESTING) if rng.random() < 0.5 else rng.getrandbits(32) for _ in range(words)]
+
+
+def random_instruction_words(rng: random.Random, words):
+    """
+    生成随机的机器码，Store把它们写进代码段后就成为可执行的指令：
+    寄存器字段可能超出r31，跳转可能向后，因此程序不一定会结束
+    """
+    result = []
+    for _ in range(words):
+        instruction_class = rng.choice(ISA)
+        if instruction_class.is_branch:
+            offset = rng.randrange(-8, 8) & 0xFFFFFF  # 附近的目标，向后跳转即形成循环
+            operands = offset & 0xFF, offset >> 16, (offset >> 8) & 0xFF
+        else:
+            operands = rng.randrange(256), rng.choice((0, 31, rng.randrange(256))), rng.randrange(256)
+        result.append(make_machine_code(instruction_class.instruction_code, *operands))
+    return result
+
+
+def cpu_state(cpu):
+    """CPU的可见状态：通用寄存器、PC、指令周期数、标志位与全部内存"""
+    alu = cpu.ALU
+    return (tuple(cpu.GR.data), cpu.PC.read_int(), cpu.cycles, (alu.carry, alu.overflow, alu.zero, alu.negative),
+            cpu.memory.address_len, cpu.memory.read_bytes(0, cpu.memory.address_len))
@@ -0,0 +1,78 @@
+# *******************************************************
+# 简介：算术逻辑单元(project1.alu)的测试：加法与原先按位实现的加法器
+#      逐位一致，各运算的标志位与有符号比较，以及project1.py仍可
+#      直接以脚本方式运行。
+# *******************************************************
+
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from project1.alu import ALU, WORD_MASK, to_signed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # 仓库根目录
+
+
+def ripple_add(a, b):
+    """原先AddInstruction.binary_add的按位加法，作为参照"""
+    a, b = '{:032b}'.format(a)[::-1], '{:032b}'.format(b)[::-1]
+    carry, bits = 0, ''
+    for i in range(32):
+        total = int(a[i]) + int(b[i]) + carry
+        bits += str(total & 1)
+        carry = total >> 1
+    return int(bits[::-1], 2)
+
+
+def test_add_matches_ripple_adder():
+    rng = random.Random(4)
+    alu = ALU()
+    values = [0, 1, 0x7FFFFFFF, 0x80000000, WORD_MASK] + [rng.getrandbits(32) for _ in range(200)]
+    for a in values:
+        for b in values[:20]:
+            assert alu.add(a, b) == ripple_add(a, b)
+
+
+@pytest.mark.parametrize('a, b, result, flags', [
+    (WORD_MASK, 1, 0, (True, False, True, False)),  # 回绕进位
+    (0x7FFFFFFF, 1, 0x80000000, (False, True, False, True)),  # 正数溢出
+    (0x80000000, 0x80000000, 0, (True, True, True, False)),  # 负数溢出
+    (2, 3, 5, (False, False, False, False)),
+])
+def test_add_flags(a, b, result, flags):
+    alu = ALU()
+    assert alu.add(a, b) == result
+    assert (alu.carry, alu.overflow, alu.zero, alu.negative) == flags
+
+
+def test_sub_borrow_and_overflow():
+    alu = ALU()
+    assert alu.sub(0, 1) == WORD_MASK and alu.carry and alu.negative and not alu.overflow
+    assert alu.sub(0x80000000, 1) == 0x7FFFFFFF and alu.overflow
+
+
+@pytest.mark.parametrize('a, b', [(-5, 3), (3, -5), (4, 4), (-2 ** 31, 2 ** 31 - 1), (2 ** 31 - 1, -2 ** 31)])
+def test_signed_comparisons(a, b):
+    alu = ALU()
+    alu.compare(a & WORD_MASK, b & WORD_MASK)
+    assert (alu.equal(), alu.not_equal()) == (a == b, a != b)
+    assert (alu.less(), alu.less_equal(), alu.greater(), alu.greater_equal()) == (a < b, a <= b, a > b, a >= b)
+
+
+def test_shifts():
+    alu = ALU()
+    assert alu.shl(0x80000001, 1) == 2 and alu.carry
+    assert alu.shr(3, 1) == 1 and alu.carry
+    assert alu.sar(0x80000000, 4) == 0xF8000000 and to_signed(0xF8000000) == -2 ** 27
+    assert alu.shl(5, 32) == 5 and not alu.carry  # 移位数取低5位
+
+
+@pytest.mark.parametrize('args', [['project1/project1.py'], ['-m', 'project1.project1']])
+def test_project1_runs_as_script(args):
+    result = subprocess.run([sys.executable] + args, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith('Memory initialized!')
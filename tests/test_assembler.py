@@ -0,0 +1,63 @@
+# *******************************************************
+# 简介：流式汇编器(Translater)的测试：注释与标号的解析，向前引用的
+#      回填，重复或未定义的标号，以及从生成器逐行汇编大段源码。
+# *******************************************************
+
+import pytest
+
+from project1.project1 import MyMemory, Translater, create_cpu, decode
+
+
+def assemble_lines(lines, address_len=256, base=None):
+    memory = MyMemory(address_len)
+    translater = Translater(memory)
+    end = translater.compile_code(lines, base=base)
+    return memory, translater, end
+
+
+def test_parse_line():
+    assert Translater.parse_line('  a: b: Add r1, r2, r3 ; comment\n') == (['a', 'b'], 'Add', ['r1', 'r2', 'r3'])
+    assert Translater.parse_line('; only a comment\n') == ([], None, [])
+    assert Translater.parse_line('end:\n') == (['end'], None, [])
+
+
+def test_forward_reference_is_patched():
+    lines = ['Jmp #skip\n', 'Add r1, r1, r2\n', 'skip: Load r3, #data\n', 'data:\n']
+    memory, translater, end = assemble_lines(lines, base=10)
+    assert translater.labels == {'skip': 12, 'data': 13} and end == 13
+    _, des, src1, src2 = decode(memory.get_word(10))
+    assert (src1 << 16) | (src2 << 8) | des == 2  # 相对偏移
+    assert decode(memory.get_word(12))[2] == 13  # Load的地址操作数
+
+
+def test_label_errors():
+    with pytest.raises(Exception, match='Duplicate label: a'):
+        assemble_lines(['a: Add r1, r1, r1\n', 'a: Add r1, r1, r1\n'], base=0)
+    with pytest.raises(Exception, match='Undefined label: missing'):
+        assemble_lines(['Jmp #missing\n'], base=0)
+    with pytest.raises(Exception, match='base address is required'):
+        assemble_lines(iter(['Add r1, r1, r1\n']))
+
+
+def test_streamed_source():
+    count = 5000
+
+    def lines():
+        yield 'Load r2, #0\n'
+        for _ in range(count):
+            yield 'Add r1, r1, r2\n'
+
+    cpu = create_cpu(address_len=4 * (count + 2))  # 0号字为数据，代码段从1开始直到内存末尾
+    cpu.memory.write_word(0, 3)
+    translater = Translater(cpu.memory, cpu.instructions)
+    assert translater.compile_code(lines(), base=1) == count + 2
+    cpu.PC_instruction_init()
+    cpu.execute()
+    assert cpu.GR.read_int(1) == 3 * count and cpu.cycles == count + 1
+
+
+def test_unknown_mnemonic_is_ignored(tmp_path):
+    source = tmp_path / 'program.txt'
+    source.write_text('Nop\nAdd r1, r1, r2\n')
+    cpu = create_cpu(program=str(source))
+    assert cpu.memory.program_index == 256 - 4
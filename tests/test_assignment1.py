@@ -0,0 +1,76 @@
+# *******************************************************
+# 简介：assignment1.Simulation的测试：逐条打印的输出与原先按字符串
+#      实现的版本逐字一致(tests/data/assignment1_verbose.txt为原版的
+#      输出)，静默运行与逐条执行的最终状态相同，以及停机与越界。
+# *******************************************************
+
+import contextlib
+import io
+import os
+import random
+
+import pytest
+
+from project1.assignment1 import OP_ADD, OP_LOAD, OP_STORE, Simulation
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'assignment1_verbose.txt')
+
+
+def simulation_state(simulation):
+    registers = [simulation.PC, simulation.MAR, simulation.MDR, simulation.IR] + simulation.GR
+    return [register.value for register in registers], bytes(simulation.MM.cells), simulation.cycles
+
+
+def random_codes(rng, length):
+    codes = []
+    for _ in range(length):
+        op_code = rng.choice((OP_ADD, OP_LOAD, OP_STORE))
+        if op_code == OP_ADD:
+            codes.append(OP_ADD << 24 | rng.randrange(32) << 16 | rng.randrange(32) << 8 | rng.randrange(32))
+        else:
+            codes.append(op_code << 24 | rng.randrange(32) << 8 | rng.choice((0, 4, 8, 12)))
+    return codes
+
+
+def test_verbose_output_matches_original():
+    with open(GOLDEN) as f:
+        expected = f.read()
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        Simulation().main()
+    assert out.getvalue() == expected
+
+
+def test_example_program():
+    simulation = Simulation(verbose=False)
+    assert simulation.main() == 4
+    assert simulation.MM.read(8) == 37 + 1697 and simulation.GR[3].value == 1734
+
+
+@pytest.mark.parametrize('max_cycles', [None, 7])
+def test_quiet_matches_stepping(max_cycles):
+    rng = random.Random(24)
+    for _ in range(100):
+        codes = random_codes(rng, rng.randrange(1, 40))
+        data = [rng.getrandbits(32) for _ in range(4)]
+        states = []
+        for verbose in (True, False):
+            simulation = Simulation(verbose=verbose)
+            for index, value in enumerate(data):
+                simulation.MM.write(value, index * 4)
+            for index, code in enumerate(codes):
+                simulation.MM.write(code, 16 + index * 4)
+            simulation.PC.value = 16
+            with contextlib.redirect_stdout(io.StringIO()):
+                executed = simulation.run(max_cycles)
+            states.append((executed, simulation_state(simulation)))
+        assert states[0] == states[1]
+
+
+def test_out_of_range_address_stops_on_instruction():
+    for verbose in (True, False):
+        simulation = Simulation(verbose=verbose)
+        simulation.MM.write(OP_LOAD << 24 | 1 << 8 | 254, 16)  # Load r1, #254
+        simulation.PC.value = 16
+        with contextlib.redirect_stdout(io.StringIO()), pytest.raises(IndexError):
+            simulation.run()
+        assert simulation.PC.value == 16 and simulation.cycles == 0
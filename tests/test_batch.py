@@ -0,0 +1,64 @@
+# *******************************************************
+# 简介：批量仿真(project1.batch)的测试：结果按提交顺序返回，多进程
+#      与单进程、翻译执行与解释执行的结果一致，以及命令行输出。
+# *******************************************************
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from project1 import batch
+from project1.project1 import create_cpu
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # 仓库根目录
+SUM = 'Load r1, #0\nLoad r2, #1\nloop: Add r3, r3, r1\nSub r1, r1, r2\nCmp r1, r0\nBne #loop\nStore r3, #2\n'
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / 'sum.txt'
+    path.write_text(SUM)
+    return str(path)
+
+
+def jobs_for(source_file, counts):
+    return [(source_file, {0: count, 1: 1}) for count in counts]
+
+
+def test_results_in_submission_order(source_file):
+    results = batch.run_batch(jobs_for(source_file, range(1, 9)), workers=1)
+    assert [result.index for result in results] == list(range(8))
+    assert [result.get_word(2) for result in results] == [n * (n + 1) // 2 for n in range(1, 9)]
+    words = results[0].nonzero_words()
+    assert {0: 1, 1: 1, 2: 1}.items() <= words.items() and 3 not in words  # 另有代码段的机器码
+
+
+@pytest.mark.parametrize('jit', [False, True])
+def test_pool_matches_single_process(source_file, jit):
+    jobs = jobs_for(source_file, [3, 40, 7, 100])
+    single = [result.to_dict() for result in batch.run_batch(jobs, workers=1)]
+    pooled = [result.to_dict() for result in batch.run_batch(jobs, workers=2, jit=jit)]
+    assert pooled == single
+
+
+def test_result_matches_cpu(source_file):
+    result = batch.run_job(0, batch.Job(source_file, {0: 12, 1: 1}))
+    cpu = create_cpu(program=source_file)
+    cpu.memory.write_word(0, 12)
+    cpu.memory.write_word(1, 1)
+    cpu.execute()
+    assert result.registers == tuple(cpu.GR.data)
+    assert (result.pc, result.cycles) == (cpu.PC.read_int(), cpu.cycles)
+
+
+def test_command_line(source_file, tmp_path):
+    jobs = tmp_path / 'jobs.json'
+    jobs.write_text(json.dumps([{'program': source_file, 'memory': {'0': 4, '1': 1}},
+                                {'program': source_file, 'memory': {'0': 5, '1': 1}}]))
+    output = subprocess.check_output([sys.executable, '-m', 'project1.batch', str(jobs), '-w', '1'], cwd=ROOT,
+                                     universal_newlines=True, timeout=60)
+    results = [json.loads(line) for line in output.splitlines()]
+    assert [result['memory']['2'] for result in results] == [10, 15]
@@ -0,0 +1,41 @@
+# *******************************************************
+# 简介：基准测试框架(benchmarks)的测试：各仿真器的负载都能运行并给出
+#      完整的结果，预热把编译时间与执行时间分开，以及基线比较。
+# *******************************************************
+
+import pytest
+
+from benchmarks import run
+
+
+@pytest.mark.parametrize('simulator', sorted(run.SIMULATORS))
+def test_every_workload_runs(simulator):
+    _, supported = run.SIMULATORS[simulator]
+    for workload in supported:
+        result = run.run_one(simulator, workload, 200)
+        assert result['instructions'] >= 200
+        assert result['seconds'] > 0 and result['instructions_per_second'] > 0
+        assert result['compile_seconds'] >= 0 and result['startup_seconds'] >= 0
+
+
+def test_warmup_is_not_timed():
+    calls = []
+    compile_seconds, elapsed = run.timed_runs(lambda: calls.append(len(calls)), 3)
+    assert calls == [0, 1, 2, 3]  # 预热一遍，计时三遍
+    assert compile_seconds >= 0 and elapsed >= 0
+
+
+def test_repeat_count():
+    assert run.repeat_count(1000, 300) == 4
+    assert run.repeat_count(10, 300) == 1
+
+
+def test_compare_reports_regressions():
+    baseline = [{'simulator': 'project1', 'workload': 'loop', 'instructions_per_second': 100.0},
+                {'simulator': 'cardiac', 'workload': 'loop', 'instructions_per_second': 100.0}]
+    results = [{'simulator': 'project1', 'workload': 'loop', 'instructions_per_second': 85.0},
+               {'simulator': 'cardiac', 'workload': 'loop', 'instructions_per_second': 95.0},
+               {'simulator': 'assignment1', 'workload': 'loop', 'instructions_per_second': 1.0}]
+    regressions = run.compare(results, baseline, 0.1)
+    assert [(item['simulator'], item['workload']) for item in regressions] == [('project1', 'loop')]
+    assert regressions[0]['ratio'] == pytest.approx(0.85)
@@ -0,0 +1,189 @@
+# *******************************************************
+# 简介：比较与跳转指令、标号以及分支预测器的测试。跳转按相对偏移
+#      编码，因此在4GiB地址空间中也能汇编循环；解释执行、基本块翻译、
+#      流水线模型与向量化仿真的结果必须一致。
+# *******************************************************
+
+import contextlib
+import io
+import random
+
+import pytest
+
+from project1.jit import BlockEngine
+from project1.predictor import PREDICTORS, make_predictor
+from project1.project1 import ADDRESS_SPACE, TRACE_VERBOSE, branch_offset, create_cpu, decode
+from programs import cpu_state, random_data, random_program
+
+COUNT_DOWN = '''Load r1, #0
+Load r2, #1
+loop: Add r3, r3, r1
+Sub r1, r1, r2
+Cmp r1, r0
+Bne #loop
+Store r3, #2
+'''  # r3 = n + (n - 1) + ... + 1
+
+
+def write_source(tmp_path, source, name='program.txt'):
+    path = tmp_path / name
+    path.write_text(source)
+    return str(path)
+
+
+def run_engine(cpu, file_name, engine):
+    if engine == 'verbose':
+        with contextlib.redirect_stdout(io.StringIO()):
+            cpu.run(file_name, trace=TRACE_VERBOSE)
+    elif engine == 'jit':
+        cpu.load_program(file_name)
+        BlockEngine(cpu, hot_threshold=0).run()
+    elif engine == 'pipeline':
+        cpu.run(file_name, pipeline=True)
+    else:
+        cpu.run(file_name)
+
+
+def make_cpu(address_len, data):
+    cpu = create_cpu(address_len=address_len)
+    for index, value in enumerate(data):
+        cpu.memory.write_word(index, value)
+    return cpu
+
+
+@pytest.mark.parametrize('engine', ['interpreter', 'verbose', 'jit', 'pipeline'])
+def test_loop_in_full_address_space(tmp_path, engine):
+    cpu = make_cpu(ADDRESS_SPACE, [10, 1])
+    run_engine(cpu, write_source(tmp_path, COUNT_DOWN), engine)
+    assert cpu.memory.get_word(2) == 55
+    assert cpu.memory.program_index == ADDRESS_SPACE - 7 * 4
+    assert cpu.cycles == 2 + 4 * 10 + 1
+
+
+def test_branches_are_position_independent(tmp_path):
+    file_name = write_source(tmp_path, COUNT_DOWN)
+    small = create_cpu(address_len=256, program=file_name)
+    large = create_cpu(address_len=ADDRESS_SPACE, program=file_name)
+    code = small.memory.read_bytes(small.memory.program_index, 7 * 4)
+    assert large.memory.read_bytes(large.memory.program_index, 7 * 4) == code
+    _, des, src1, src2 = decode(small.memory.get_word(small.memory.program_index // 4 + 5))
+    assert branch_offset(des, src1, src2) == -3
+
+
+def test_branch_target_out_of_range(tmp_path):
+    file_name = write_source(tmp_path, 'Jmp #0\n')
+    with pytest.raises(Exception, match='Branch target out of range'):
+        create_cpu(address_len=ADDRESS_SPACE, program=file_name)
+
+
+@pytest.mark.parametrize('engine', ['interpreter', 'verbose', 'jit', 'pipeline'])
+def test_store_into_code_keeps_branch_targets(tmp_path, engine):
+    # 数据写到代码段的最后一个字：代码不移动，被覆盖的Add变为空操作，跳转目标不变
+    cpu = make_cpu(64, [])
+    run_engine(cpu, write_source(tmp_path, 'Store r0, #15\nJmp #L2\nL2: Add r0, r0, r0\n'), engine)
+    assert (cpu.PC.read_int(), cpu.cycles) == (16, 3)
+
+
+@pytest.mark.parametrize('engine', ['interpreter', 'verbose', 'jit', 'pipeline'])
+def test_loop_growing_data_segment(tmp_path, engine):
+    # 循环每一轮都把数据写到更高的地址，直到紧挨代码段的字
+    source = '''Load r1, #0
+Load r2, #1
+loop: Add r3, r3, r2
+Store r3, #50
+Store r3, #51
+Store r3, #52
+Cmp r3, r1
+Blt #loop
+'''
+    cpu = make_cpu(256, [5, 1])
+    run_engine(cpu, write_source(tmp_path, source), engine)
+    assert cpu.memory.program_index == 256 - 8 * 4
+    assert [cpu.memory.get_word(index) for index in (50, 51, 52, 53)] == [5, 5, 5, 0]
+    assert cpu.PC.read_int() == 64
+    assert cpu.cycles == 2 + 6 * 5
+
+
+@pytest.mark.parametrize('engine', ['interpreter', 'verbose', 'jit', 'pipeline'])
+def test_random_branch_programs_agree(tmp_path, engine):
+    rng = random.Random(25)
+    for trial in range(40):
+        file_name = write_source(tmp_path, random_program(rng, rng.randrange(3, 40)), 'random%d.txt' % trial)
+        data = random_data(rng, 12)
+        expected = make_cpu(256, data)
+        predictor = expected.attach_predictor(make_predictor('btb'))
+        expected.run(file_name)
+        cpu = make_cpu(256, data)
+        other = cpu.attach_predictor(make_predictor('btb'))
+        run_engine(cpu, file_name, engine)
+        assert cpu_state(cpu) == cpu_state(expected), trial
+        assert other.report() == predictor.report(), trial
+
+
+def test_vector_lanes_match_interpreter(tmp_path):
+    pytest.importorskip('numpy')
+    from project1.vector import VectorCPU
+    rng = random.Random(10)
+    for trial in range(20):
+        file_name = write_source(tmp_path, random_program(rng, rng.randrange(3, 40)), 'random%d.txt' % trial)
+        lanes = [random_data(rng, 12) for _ in range(3)]
+        vector = VectorCPU(len(lanes), 256)
+        vector.load_program(file_name)
+        for lane, data in enumerate(lanes):
+            vector.words[lane, :len(data)] = data
+        vector.run()
+        for lane, data in enumerate(lanes):
+            cpu = make_cpu(256, data)
+            cpu.run(file_name)
+            assert [int(value) for value in vector.GR[lane]] == list(cpu.GR.data), (trial, lane)
+            assert (int(vector.PC[lane]), int(vector.cycles[lane])) == (cpu.PC.read_int(), cpu.cycles)
+            assert bytes(vector.memory[lane]) == cpu.memory.read_bytes(0, 256)
+
+
+@pytest.mark.parametrize('policy, mispredictions', [('taken', 1), ('not_taken', 9), ('btfn', 1)])
+def test_static_predictor_on_loop(tmp_path, policy, mispredictions):
+    cpu = make_cpu(256, [10, 1])
+    predictor = cpu.attach_predictor(make_predictor('static', policy=policy))
+    cpu.run(write_source(tmp_path, COUNT_DOWN))
+    report = predictor.report()
+    assert (report['branches'], report['taken'], report['mispredictions']) == (10, 9, mispredictions)
+    assert report['penalty_cycles'] == 2 * mispredictions
+
+
+@pytest.mark.parametrize('kind', sorted(PREDICTORS))
+def test_pipeline_flushes_on_mispredictions(tmp_path, kind):
+    file_name = write_source(tmp_path, COUNT_DOWN)
+    cpu = make_cpu(256, [10, 1])
+    predictor = cpu.attach_predictor(make_predictor(kind))
+    report = cpu.run(file_name, pipeline=True)
+    assert report['branches'] == predictor.branches == 10
+    assert report['mispredictions'] == predictor.mispredictions
+    assert cpu.memory.get_word(2) == 55
+
+
+def test_two_bit_predictor_learns_loop(tmp_path):
+    cpu = make_cpu(256, [10, 1])
+    predictor = cpu.attach_predictor(make_predictor('2bit'))
+    cpu.run(write_source(tmp_path, COUNT_DOWN))
+    # 第一次跳转时计数器为弱不跳转，最后一次退出循环，共两次误预测
+    assert predictor.mispredictions == 2
+    assert predictor.direction_misses == 2
+
+
+def test_unknown_predictor():
+    with pytest.raises(Exception, match='Unknown branch predictor'):
+        make_predictor('perceptron')
+
+
+@pytest.mark.parametrize('hot_threshold', [None, 0, 16])
+def test_cycle_budget_stops_endless_loop(tmp_path, hot_threshold):
+    file_name = write_source(tmp_path, 'Add r1, r1, r2\nloop: Add r3, r3, r2\nJmp #loop\n')
+    cpu = create_cpu(address_len=256, program=file_name)
+    cpu.GR.write_int(1, 2)
+    if hot_threshold is not None:
+        BlockEngine(cpu, hot_threshold=hot_threshold).run(max_cycles=101)
+    else:
+        cpu.execute(max_cycles=101)
+    assert cpu.cycles == 101
+    assert cpu.GR.read_int(3) == 50
+    assert cpu.PC.read_int() == 62  # 停在下一条要执行的指令(循环开头)处
@@ -0,0 +1,78 @@
+# *******************************************************
+# 简介：缓存模拟器(project1.cache)的测试：命中/缺失与替换统计、
+#      写回与写直达，以及接入缓存后各执行方式都经过缓存访存。
+# *******************************************************
+
+import pytest
+
+from project1.cache import Cache, CacheHierarchy
+from project1.jit import BlockEngine
+from project1.project1 import create_cpu
+
+LOAD_STORE = 'Load r1, #0\nLoad r2, #1\nAdd r3, r1, r2\nStore r3, #2\nLoad r4, #16\n'
+
+
+def make_hierarchy(memory, **options):
+    return CacheHierarchy(memory, [Cache('L1', 64, line_size=16, **options)])
+
+
+def test_direct_mapped_conflicts():
+    cache = Cache('L1', 64, line_size=16)  # 4组，每组1路
+    assert [cache.access(address)[0] for address in (0, 4, 64, 0, 16)] == [False, True, False, False, False]
+    report = cache.report()
+    assert (report['hits'], report['misses'], report['evictions']) == (1, 4, 2)
+
+
+def test_lru_keeps_recently_used_line():
+    cache = Cache('L1', 32, line_size=16, associativity=2)  # 1组，2路
+    for address in (0, 16, 0, 32):  # 32替换最久未用的16
+        cache.access(address)
+    assert cache.access(0)[0] and not cache.access(16)[0]
+
+
+def test_write_back_and_write_through():
+    back = Cache('L1', 16, line_size=16)
+    back.access(0, write=True)
+    assert back.access(16)[2] == [0]  # 替换出的脏行写回下一级
+    through = Cache('L1', 16, line_size=16, write_back=False)
+    assert through.access(0, write=True) == (False, None, [0])  # 写直达且不分配
+
+
+def test_invalid_configuration():
+    with pytest.raises(Exception):
+        Cache('L1', 48, line_size=16, associativity=2)
+    with pytest.raises(Exception):
+        Cache('L1', 64, replacement='mru')
+
+
+@pytest.mark.parametrize('jit', [False, True])
+def test_program_results_unchanged(tmp_path, jit):
+    source = tmp_path / 'program.txt'
+    source.write_text(LOAD_STORE)
+    cpu = create_cpu(program=str(source), init_memory=True)
+    hierarchy = cpu.attach_cache(make_hierarchy(cpu.memory))
+    if jit:
+        BlockEngine(cpu, hot_threshold=0).run()
+    else:
+        cpu.execute()
+    assert cpu.memory.get_word(2) == 25
+    level = hierarchy.report()['levels'][0]
+    assert (level['reads'], level['writes'], level['hits'], level['misses']) == (3, 1, 2, 2)
+
+
+def test_blocks_translated_before_attach_use_cache(tmp_path):
+    source = tmp_path / 'program.txt'
+    source.write_text(LOAD_STORE)
+    cpu = create_cpu(program=str(source), init_memory=True)
+    engine = BlockEngine(cpu, hot_threshold=0)
+    engine.run()
+    assert engine.translated == 1
+    hierarchy = cpu.attach_cache(make_hierarchy(cpu.memory))
+    cpu.PC_instruction_init()
+    engine.run()  # 原有的基本块直接读写内存，须重新翻译
+    assert engine.translated == 2
+    assert hierarchy.accesses == 4
+    cpu.attach_cache(None)
+    cpu.PC_instruction_init()
+    engine.run()
+    assert engine.translated == 3 and hierarchy.accesses == 4
@@ -0,0 +1,66 @@
+# *******************************************************
+# 简介：Cardiac(根目录下的test.py)处理器的测试：内存以整数保存，
+#      指令按数字分派，子类覆盖的内存访问与取指在 run() 中同样生效。
+# *******************************************************
+
+import pytest
+
+import test as cardiac
+from test_cardiac_io import ADD_DECK
+
+
+class Recording(cardiac.Cardiac):
+    """ 记录全部内存读写与取指的仿真器 """
+
+    def __init__(self):
+        self.reads, self.writes, self.fetched = [], [], []
+        cardiac.Cardiac.__init__(self)
+
+    def get_memint(self, data):
+        self.reads.append(data)
+        return cardiac.Cardiac.get_memint(self, data)
+
+    def set_memint(self, data, value):
+        self.writes.append((data, value))
+        cardiac.Cardiac.set_memint(self, data, value)
+
+    def fetch(self):
+        self.fetched.append(self.pc)
+        cardiac.Cardiac.fetch(self)
+
+
+@pytest.mark.parametrize('compiled', [False, True])
+def test_overrides_are_used_by_run(compiled, capsys):
+    c = Recording()
+    c.read_deck(ADD_DECK)
+    c.run(compiled=compiled)
+    assert capsys.readouterr().out == 'Output:\n007\n'
+    assert c.fetched[:3] == [0, 1, 2] and c.fetched[-1] == 16
+    assert (30, 3) in c.writes and (31, 4) in c.writes  # 输入指令也经过 set_memint
+    assert (32, 7) in c.writes
+    assert 30 in c.reads and 31 in c.reads
+
+
+def test_input_keeps_three_digits():
+    c = cardiac.Cardiac()
+    c.mem[0], c.mem[1] = 30, 31  # INP 30, INP 31
+    c.read_deck(['1234', '-2345'])
+    c.process()
+    c.process()
+    assert (c.mem[30], c.mem[31]) == (234, -345)
+
+
+def test_invalid_opcode_name():
+    class Broken(cardiac.Cardiac):
+        def opcode_x(self, data):
+            pass
+
+    with pytest.raises(NameError, match='invalid opcode: x'):
+        Broken()
+
+
+def test_negative_instruction_is_rejected():
+    c = cardiac.Cardiac()
+    c.mem[0] = -1
+    with pytest.raises(ValueError, match='Invalid instruction -1 at 0'):
+        c.run()
@@ -0,0 +1,92 @@
+# *******************************************************
+# 简介：Cardiac(根目录下的test.py)预编译执行(DeckCompiler)的测试：
+#      经引导程序载入的卡片在跳转目标处进入编译后的程序，自修改代码
+#      回到解释执行，结果与解释执行一致。
+# *******************************************************
+
+import pytest
+
+import test as cardiac
+from benchmarks import workloads
+from test_cardiac_io import ADD_DECK
+
+# 自修改程序：把20号单元的 '521' 写到12号单元，再执行它，输出21号单元
+SELF_MODIFYING_DECK = ['002', '800',
+                       '010', '120', '011', '612', '012', '000', '013', '900',
+                       '020', '521', '021', '042',
+                       '810']
+
+
+def run_deck(cards, compiled, capsys):
+    c = cardiac.Cardiac()
+    c.read_deck(cards)
+    c.run(compiled=compiled)
+    return c, capsys.readouterr().out
+
+
+@pytest.mark.parametrize('cards', [ADD_DECK, SELF_MODIFYING_DECK])
+def test_output_matches_interpreter(cards, capsys):
+    _, expected = run_deck(cards, False, capsys)
+    _, output = run_deck(cards, True, capsys)
+    assert output == expected
+
+
+def test_compiled_code_runs_after_bootstrap(capsys, monkeypatch):
+    entries = []
+    lookup = cardiac.DeckCompiler.lookup
+
+    def spy(compiler, entry):
+        program = lookup(compiler, entry)
+        entries.append((entry, program is not None))
+        return program
+
+    monkeypatch.setattr(cardiac.DeckCompiler, 'lookup', spy)
+    c, output = run_deck(ADD_DECK, True, capsys)
+    assert output == 'Output:\n007\n'
+    assert (10, True) in entries  # 引导程序跳转到10之后执行的是编译后的程序
+    assert c.compiler.programs[10][1] is not None
+
+
+def test_bootstrap_loader_is_not_recompiled(capsys):
+    # 引导程序每读一张卡片都改写自己，超过 RECOMPILE_LIMIT 次后只解释执行
+    c, _ = run_deck(ADD_DECK, True, capsys)
+    assert c.compiler.programs[0][1] is None
+    assert c.compiler.recompiled[0] == cardiac.RECOMPILE_LIMIT + 1
+
+
+def test_self_modifying_code_returns_to_interpreter(capsys):
+    c, output = run_deck(SELF_MODIFYING_DECK, True, capsys)
+    assert output == 'Output:\n042\n'
+    assert c.mem[12] == 521
+
+
+@pytest.mark.parametrize('workload', sorted(workloads.CARDIAC_WORKLOADS))
+def test_workloads_match_interpreter(workload, capsys):
+    cards, _ = workloads.CARDIAC_WORKLOADS[workload](200)
+    states = []
+    for compiled in (False, True):
+        c, output = run_deck(cards, compiled, capsys)
+        c.run(workloads.CARDIAC_CODE_BASE, compiled=compiled)
+        states.append((output + capsys.readouterr().out, list(c.mem)))
+    assert states[0] == states[1]
+
+
+def test_add_and_subtract_are_folded():
+    c = cardiac.Cardiac()
+    compiler = cardiac.DeckCompiler(c)
+    code = {10: (1, 90), 11: (2, 91), 12: (7, 91), 13: (2, 92), 14: (2, 92), 15: (9, 0)}
+    assert compiler.translate_block(10, code, {10}, None) == ['acc = mem[90] + 2 * mem[92]', 'return 0, acc, True']
+    code = {10: (2, 91), 11: (7, 91), 12: (9, 0)}
+    assert compiler.translate_block(10, code, {10}, None) == ['return 0, acc, True']
+
+
+def test_replaced_memory_is_interpreted(capsys):
+    class Traced(cardiac.Cardiac):
+        def get_memint(self, data):
+            return self.mem[data]
+
+    c = Traced()
+    c.read_deck(ADD_DECK)
+    c.run(compiled=True)
+    assert capsys.readouterr().out == 'Output:\n007\n'
+    assert c.compiler is None  # 逐条调用 process(), 不编译
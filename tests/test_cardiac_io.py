@@ -0,0 +1,81 @@
+# *******************************************************
+# 简介：Cardiac(根目录下的test.py)输入输出设备的测试：读卡器按需读取
+#      卡片，输出可以留在内存或分块写入流，以及每个实例的内存占用。
+# *******************************************************
+
+import io
+
+import pytest
+
+import test as cardiac
+from benchmarks import footprint
+
+# 引导程序载入的程序：读入两个数，输出它们的和
+ADD_DECK = ['002', '800',  # 引导程序
+            '010', '030', '011', '031', '012', '130', '013', '231',  # 地址, 内容
+            '014', '632', '015', '532', '016', '900',
+            '810',  # 跳转到10执行
+            '3', '4']  # 数据
+
+
+def test_cards_are_read_on_demand():
+    consumed = []
+
+    def cards():
+        for card in ADD_DECK:
+            consumed.append(card)
+            yield card + '\n'
+
+    reader = cardiac.CardReader(cards())
+    assert consumed == []  # 装入卡片时不读取
+    assert reader.read() == '002' and consumed == ['002']
+
+
+def test_file_is_opened_at_first_read(tmp_path):
+    reader = cardiac.CardReader(str(tmp_path / 'missing.txt'))
+    with pytest.raises(FileNotFoundError):
+        reader.read()
+
+
+def test_empty_reader_raises_eof():
+    with pytest.raises(EOFError, match='Card reader is empty'):
+        cardiac.CardReader().read()
+
+
+def test_run_deck_in_memory(capsys):
+    c = cardiac.Cardiac()
+    c.read_deck(ADD_DECK)
+    c.run()
+    assert capsys.readouterr().out == 'Output:\n007\n'
+    assert c.format_output() == ''  # 打印后清空
+
+
+def test_output_is_streamed_in_chunks():
+    stream = io.StringIO()
+    sink = cardiac.OutputSink(stream, chunk_size=3)
+    for value in range(5):
+        sink.write(cardiac.pad(value))
+    assert stream.getvalue() == '000\n001\n002\n'
+    assert sink.getvalue() == '003\n004'
+    sink.close()
+    assert stream.getvalue() == '000\n001\n002\n003\n004\n'
+
+
+def test_open_output_file(tmp_path):
+    path = tmp_path / 'out.txt'
+    c = cardiac.Cardiac()
+    c.read_deck(ADD_DECK)
+    c.open_output(str(path))
+    c.run()
+    c.output.close()
+    assert path.read_text() == '007\n'
+
+
+def test_devices_are_lazy():
+    c = cardiac.Cardiac()
+    assert c.reader.cards is None and c.output.lines is None
+
+
+def test_footprint_target():
+    result = footprint.measure('cardiac', 20)
+    assert result['bytes_per_simulated_byte'] <= footprint.TARGETS['cardiac']
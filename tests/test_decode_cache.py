@@ -0,0 +1,64 @@
+# *******************************************************
+# 简介：预译码指令缓存(DecodeCache)的测试：按PC缓存译码结果，写入
+#      代码段的地址立即失效，自修改代码与逐条取指的结果一致。
+# *******************************************************
+
+from project1.project1 import AddInstruction, DecodeCache, create_cpu, make_machine_code
+
+LOOP = 'Load r1, #0\nLoad r2, #1\nloop: Add r3, r3, r1\nSub r1, r1, r2\nCmp r1, r0\nBne #loop\n'
+
+
+def test_entries_are_reused(tmp_path):
+    source = tmp_path / 'loop.txt'
+    source.write_text(LOOP)
+    cpu = create_cpu(program=str(source))
+    cpu.memory.write_word(0, 50)
+    cpu.memory.write_word(1, 1)
+    cpu.execute()
+    assert len(cpu.decode_cache.entries) == 6  # 循环体只译码一次
+    assert cpu.cycles == 2 + 4 * 50
+
+
+def test_write_invalidates_entry():
+    cpu = create_cpu(address_len=64)
+    cache = cpu.decode_cache
+    cpu.memory.write_word(15, make_machine_code(AddInstruction.instruction_code, 1, 1, 1), is_program=True)
+    handler, des, src1, src2, is_branch = cache.lookup(15)
+    assert (des, src1, src2, is_branch) == (1, 1, 1, False)
+    assert cache.lookup(14) is None and 14 not in cache.entries  # 全0不是合法的指令
+    cpu.memory.write_word(15, 0)
+    assert 15 not in cache.entries
+    cpu.memory.write_word(15, make_machine_code(AddInstruction.instruction_code, 2, 1, 1))
+    assert cache.lookup(15)[1] == 2
+
+
+def test_bulk_write_clears_cache():
+    cpu = create_cpu(address_len=64)
+    cpu.memory.write_word(15, make_machine_code(AddInstruction.instruction_code, 1, 1, 1), is_program=True)
+    cpu.decode_cache.lookup(15)
+    cpu.memory.write_bytes(0, bytes(4))
+    assert not cpu.decode_cache.entries
+
+
+def test_close_unregisters_listener():
+    cpu = create_cpu(address_len=64)
+    cache = DecodeCache(cpu.memory, cpu.instructions)
+    assert cache.invalidate in cpu.memory.write_listeners
+    cache.close()
+    assert cache.invalidate not in cpu.memory.write_listeners
+
+
+def test_self_modifying_code_matches_uncached(tmp_path):
+    # Store把r1写到最后一条指令上：r1为Add r3, r3, r3的机器码
+    source = tmp_path / 'smc.txt'
+    source.write_text('Load r1, #0\nAdd r3, r3, r2\nStore r1, #15\nAdd r4, r4, r2\n')
+    results = []
+    for trace in (None, lambda event, source, *args: None):  # 有跟踪器时逐条取指，不使用缓存
+        cpu = create_cpu(address_len=64, trace=trace)
+        cpu.memory.write_word(0, make_machine_code(AddInstruction.instruction_code, 3, 3, 3))
+        cpu.GR.write_int(5, 2)
+        cpu.load_program(str(source))
+        cpu.execute()
+        results.append((list(cpu.GR.data), cpu.cycles))
+    assert results[0] == results[1]
+    assert results[0][0][3] == 10 and results[0][0][4] == 0
@@ -0,0 +1,77 @@
+# *******************************************************
+# 简介：指令分派表的测试：按操作码与助记符查找指令，重复的操作码或
+#      助记符被拒绝，无法识别的机器码按空操作跳过。
+# *******************************************************
+
+import pytest
+
+from project1.project1 import (ISA, ALUInstruction, AddInstruction, Instruction, create_cpu, isa_tables,
+                               make_machine_code)
+
+
+def test_tables_cover_registered_instructions():
+    by_code, by_name = isa_tables()
+    assert len(by_code) == len(by_name) == len(ISA)
+    for instruction_class in ISA:
+        assert by_code[int(instruction_class.instruction_code, 2)] is instruction_class
+        assert by_name[instruction_class.instruction_name] is instruction_class
+
+
+def test_lookup_by_code_and_name():
+    instructions = create_cpu().instructions
+    add = instructions.get_by_code(int(AddInstruction.instruction_code, 2))
+    assert isinstance(add, AddInstruction)
+    assert instructions.get_by_name('Add') is add  # 同一个指令对象
+    assert instructions.get_by_code(0) is None and instructions.get_by_name('Mul') is None
+
+
+def test_duplicate_instruction_is_rejected():
+    instructions = create_cpu().instructions
+
+    class Twin(ALUInstruction):
+        """与Add操作码相同的指令"""
+        instruction_name = "Twin"
+        instruction_code = AddInstruction.instruction_code
+        alu_operation = 'add'
+
+    twin = Twin(instructions.memory, instructions.MDR, instructions.MAR, instructions.GR)
+    with pytest.raises(Exception, match='Duplicate instruction code'):
+        instructions.add_instruction(twin)
+    twin.instruction_code = '11111101'
+    twin.instruction_name = 'Add'
+    with pytest.raises(Exception, match='Duplicate instruction name'):
+        instructions.add_instruction(twin)
+
+
+def test_added_instruction_is_dispatched(tmp_path):
+    cpu = create_cpu()
+
+    class Double(Instruction):
+        """r[des] <- 2 * r[src1]"""
+        instruction_name = "Double"
+        instruction_code = "11111101"
+
+        def encode(self, operands):
+            return make_machine_code(self.instruction_code, int(operands[0][1:]), int(operands[1][1:]), 0)
+
+        def execute(self, operands):
+            self.GR.write_int(self.GR.read_int(operands[1]) * 2, operands[0])
+
+    cpu.instructions.add_instruction(Double(cpu.memory, cpu.MDR, cpu.MAR, cpu.GR))
+    source = tmp_path / 'double.txt'
+    source.write_text('Double r2, r1\n')
+    cpu.GR.write_int(21, 1)
+    cpu.load_program(str(source))
+    cpu.execute()
+    assert cpu.GR.read_int(2) == 42
+
+
+def test_unknown_machine_code_is_skipped():
+    cpu = create_cpu(address_len=16)
+    cpu.memory.write_word(2, 0x01020304, is_program=True)  # 未注册的操作码1
+    cpu.memory.write_word(3, make_machine_code(AddInstruction.instruction_code, 1, 1, 1), is_program=True)
+    cpu.memory.program_index = 8
+    cpu.GR.write_int(3, 1)
+    cpu.PC_instruction_init()
+    cpu.execute()
+    assert cpu.cycles == 2 and cpu.GR.read_int(1) == 6
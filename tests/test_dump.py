@@ -0,0 +1,66 @@
+# *******************************************************
+# 简介：内存转储(project1.dump)的测试：各格式与逐字节格式化的参照实现
+#      一致，分块输出与整体输出相同，以及CPU.show_memory的输出。
+# *******************************************************
+
+import io
+
+import pytest
+
+from project1.dump import dump, format_chunk, iter_dump
+from project1.project1 import MyMemory, create_cpu
+
+DATA = bytes(range(256)) + b'Hello, world!\n'
+
+
+def reference(data, address, mode, width=16):
+    """逐字节格式化的参照实现"""
+    lines = []
+    for offset in range(0, len(data), width):
+        row = data[offset:offset + width]
+        text = ''.join(chr(byte) if 0x20 <= byte < 0x7F else '.' for byte in row)
+        if mode == 'hex':
+            body = ' '.join('%02x' % byte for byte in row)
+            lines.append('%08x  %-*s  |%s|' % (address + offset, width * 3 - 1, body, text))
+        elif mode == 'bin':
+            lines.append('%08x  %s' % (address + offset, ' '.join('{:08b}'.format(byte) for byte in row)))
+        else:
+            lines.append('%08x  %s' % (address + offset, text))
+    return ''.join(line + '\n' for line in lines)
+
+
+@pytest.mark.parametrize('mode', ['hex', 'bin', 'ascii'])
+@pytest.mark.parametrize('width', [16, 8])
+def test_matches_reference(mode, width):
+    assert format_chunk(DATA, 0x100, mode, width) == reference(DATA, 0x100, mode, width)
+
+
+def test_cells_match_show_memory_format():
+    memory = MyMemory(32)
+    memory.write_word(1, 0x01020304)
+    expected = ''.join(memory.read_cell(address) + ('\n\n' if address % 4 == 3 else '\n') for address in range(32))
+    assert dump(memory, mode='cells') == expected
+    assert format_chunk(memory.read_bytes(2, 5), 2, 'cells') == expected[2 * 9:2 * 9 + 5 * 9 + 1]
+
+
+@pytest.mark.parametrize('mode', ['hex', 'bin', 'ascii', 'cells'])
+def test_chunks_do_not_change_output(mode):
+    memory = MyMemory(1024)
+    memory.write_bytes(100, DATA)
+    whole = format_chunk(memory.read_bytes(0, 1024), 0, mode)
+    assert ''.join(iter_dump(memory, mode=mode, chunk_size=100)) == whole
+
+
+def test_dump_to_file(tmp_path):
+    path = tmp_path / 'memory.txt'
+    dump(DATA, mode='hex', file=str(path))
+    assert path.read_text() == reference(DATA, 0, 'hex')
+    with pytest.raises(Exception, match='Unknown dump mode'):
+        dump(DATA, mode='octal')
+
+
+def test_show_memory():
+    cpu = create_cpu(address_len=64, init_memory=True)
+    out = io.StringIO()
+    cpu.show_memory(0, 8, file=out)
+    assert out.getvalue() == '00001010\n00000000\n00000000\n00000000\n\n00001111\n00000000\n00000000\n00000000\n\n'
@@ -0,0 +1,82 @@
+# *******************************************************
+# 简介：IEEE-754编码(根目录下的int2float_with_bits.py)的测试：与struct
+#      及NumPy的float32转换逐位一致，包括就近舍入、偶数优先、非规格化
+#      数、溢出为无穷大与NaN，以及批量编码与解码。
+# *******************************************************
+
+import math
+import random
+import struct
+from array import array
+
+import pytest
+
+from int2float_with_bits import decode_array, encode_array, encode_bytes, float2int, int2float
+
+
+def struct_bits(value):
+    """struct按float32编码的位模式，超出float32范围时抛出OverflowError"""
+    return struct.unpack('<I', struct.pack('<f', value))[0]
+
+
+@pytest.mark.parametrize('value, bits', [
+    (176.0625, 0x43301000),
+    (0.0, 0x00000000),
+    (-0.0, 0x80000000),
+    (1.0, 0x3F800000),
+    (-2.5, 0xC0200000),
+    (0.1, 0x3DCCCCCD),  # 舍入进位
+    (1.4e-45, 0x00000001),  # 最小的非规格化数
+    (7e-46, 0x00000000),  # 恰好不到最小非规格化数的一半，舍入为0
+    (1e-50, 0x00000000),
+    (1.0 + 2 ** -24, 0x3F800000),  # 恰好一半，偶数优先
+    (1.0 + 3 * 2 ** -24, 0x3F800002),
+    (3.4028235677973366e38, 0x7F800000),  # 舍入后溢出
+    (1e39, 0x7F800000),
+    (-math.inf, 0xFF800000),
+])
+def test_known_values(value, bits):
+    assert int2float(value) == bits
+
+
+def test_matches_struct():
+    rng = random.Random(16)
+    values = [rng.uniform(-1e30, 1e30) for _ in range(2000)] + [rng.uniform(-1e-38, 1e-38) for _ in range(2000)]
+    for value in values:
+        assert int2float(value) == struct_bits(value), value
+
+
+def test_matches_numpy_on_random_bit_patterns():
+    np = pytest.importorskip('numpy')
+    rng = random.Random(17)
+    values = [struct.unpack('<d', struct.pack('<Q', rng.getrandbits(64)))[0] for _ in range(5000)]
+    values = [value for value in values if not math.isnan(value)]
+    with np.errstate(over='ignore'):
+        expected = np.array(values).astype(np.float32).view(np.uint32)
+    assert [int2float(value) for value in values] == [int(bits) for bits in expected]
+
+
+def test_nan_and_round_trip():
+    assert math.isnan(float2int(int2float(math.nan)))
+    for value in (0.1, -123.456, 5e-324, 1.7976931348623157e308):
+        assert float2int(int2float(value, 64), 64) == value
+    assert float2int(0x43301000) == 176.0625
+    with pytest.raises(ValueError):
+        int2float(1.0, 16)
+
+
+def test_bulk_encoding():
+    values = array('d', [176.0625, 0.1, -2.5, 1e-45])
+    words = encode_array(values)
+    assert list(words) == [int2float(value) for value in values]
+    assert list(encode_array(values, 64)) == [int2float(value, 64) for value in values]
+    assert list(decode_array(words)) == [float2int(word) for word in words]
+    assert encode_bytes(values)[:4] == struct.pack('<I', 0x43301000)
+
+
+def test_bulk_encoding_numpy():
+    np = pytest.importorskip('numpy')
+    values = np.array([176.0625, 0.1, -2.5, 1e-45])
+    words = encode_array(values)
+    assert words.dtype == np.uint32 and list(words) == [int2float(value) for value in values]
+    assert encode_bytes(values) == encode_bytes(array('d', values))
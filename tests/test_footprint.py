@@ -0,0 +1,39 @@
+# *******************************************************
+# 简介：仿真器对象模型的内存占用测试：核心类使用__slots__，实例没有
+#      __dict__；每个仿真器实例的占用不超过benchmarks.footprint的目标，
+#      超出目标时命令行返回非0。
+# *******************************************************
+
+import pytest
+
+from benchmarks import footprint
+from project1.alu import ALU
+from project1.assignment1 import Simulation
+from project1.project1 import ISA, Cell, MyMemory, Register, create_cpu
+
+
+def test_core_objects_have_no_dict():
+    cpu = create_cpu()
+    objects = [Cell(8), Register('PC'), MyMemory(256), ALU()]
+    objects += [cpu.instructions.get_by_name(instruction_class.instruction_name) for instruction_class in ISA]
+    for item in objects:
+        assert not hasattr(item, '__dict__'), type(item).__name__
+
+
+@pytest.mark.parametrize('name', ['project1', 'assignment1'])
+def test_footprint_targets(name):
+    result = footprint.measure(name, 20)
+    assert result['bytes_per_simulated_byte'] <= footprint.TARGETS[name]
+
+
+def test_assignment1_registers_have_no_dict():
+    simulation = Simulation()
+    registers = [value for value in vars(simulation).values() if type(value).__name__ == 'Register']
+    assert registers and all(not hasattr(register, '__dict__') for register in registers)
+
+
+def test_command_line_reports_targets(capsys, monkeypatch):
+    assert footprint.main(['-s', 'project1', '-n', '5']) == 0
+    assert '"simulator": "project1"' in capsys.readouterr().out
+    monkeypatch.setitem(footprint.TARGETS, 'project1', 0.001)
+    assert footprint.main(['-s', 'project1', '-n', '5']) == 1
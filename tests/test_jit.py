@@ -0,0 +1,138 @@
+# *******************************************************
+# 简介：基本块翻译引擎(project1.jit)与解释执行的差分测试。自修改的
+#      随机程序可能不再结束，两种执行方式都限制相同的指令周期数。
+# *******************************************************
+
+import random
+
+import pytest
+
+from programs import cpu_state, random_data, random_instruction_words, random_program
+from project1.jit import BlockEngine
+from project1.project1 import create_cpu, make_machine_code
+
+
+def run_both(source_file, data, address_len, max_cycles=None, **engine_options):
+    """
+    分别解释执行与翻译执行同一程序，返回两者的最终状态；执行出错时只返回异常类型，
+    因为出错的基本块不会更新PC与指令周期数。默认首次遇到即翻译
+    """
+    engine_options.setdefault('hot_threshold', 0)
+    states = []
+    for jit in (False, True):
+        cpu = create_cpu(address_len=address_len)
+        for index, value in enumerate(data):
+            cpu.memory.write_word(index, value)
+        cpu.load_program(source_file)
+        try:
+            if jit:
+                engine = BlockEngine(cpu, **engine_options)
+                engine.run(max_cycles)
+                engine.close()
+            else:
+                cpu.execute(max_cycles)
+        except Exception as exception:
+            states.append(type(exception).__name__)
+        else:
+            states.append(cpu_state(cpu))
+    return states
+
+
+def test_flags_survive_store_exit(tmp_path):
+    # Store改写了本基本块中的Cmp，基本块在Store之后提前返回，此前第一条Cmp的标志位必须已经写入
+    source = tmp_path / 'exit.txt'
+    source.write_text('Load r1, #0\nLoad r2, #1\nCmp r1, r2\nStore r0, #12\nCmp r0, r0\nBlt #15\n'
+                      'Add r3, r3, r2\nAdd r4, r4, r2\n')
+    interpreted, translated = run_both(str(source), [1, 2], 64)
+    assert interpreted[1:3] == (16, 7)
+    assert interpreted[0][3:5] == (0, 2)
+    assert translated == interpreted
+
+
+def test_random_programs(tmp_path):
+    rng = random.Random(2020)
+    source = tmp_path / 'random.txt'
+    for _ in range(300):
+        source.write_text(random_program(rng, rng.randrange(1, 30)))
+        interpreted, translated = run_both(str(source), random_data(rng, 12), 256)
+        assert translated == interpreted, source.read_text()
+
+
+def test_random_self_modifying_programs(tmp_path):
+    rng = random.Random(2021)
+    source = tmp_path / 'random.txt'
+    modified = exhausted = 0
+    for _ in range(600):
+        # 40字的内存中Store可以写到任何地址，包括代码段与正在执行的基本块；
+        # 数据区的一半是随机机器码，被Load再Store进代码段后即被执行
+        length = rng.randrange(1, 30)
+        source.write_text(random_program(rng, length, max_store_address=40))
+        data = random_data(rng, 6) + random_instruction_words(rng, 6)
+        interpreted, translated = run_both(str(source), data, 160, max_cycles=500)
+        assert translated == interpreted, source.read_text()
+        if isinstance(interpreted, str):
+            continue
+        original = create_cpu(address_len=160, program=str(source)).memory.read_bytes(160 - length * 4, length * 4)
+        modified += interpreted[5][160 - length * 4:] != original
+        exhausted += interpreted[2] == 500
+    assert modified > 200  # 确实覆盖了对代码段的写入
+    assert exhausted  # 改写出的向后跳转使程序不再结束
+
+
+def test_out_of_range_register_is_interpreted(tmp_path):
+    source = tmp_path / 'register.txt'
+    source.write_text('Add r1, r1, r1\nAdd r2, r2, r2\n')
+    cpu = create_cpu(program=str(source))
+    cpu.GR.write_int(3, 1)
+    cpu.memory.write_word(63, make_machine_code('10000011', 40, 1, 1), is_program=True)  # Add r40, r1, r1
+    engine = BlockEngine(cpu, hot_threshold=0)
+    engine.run()
+    assert cpu.cycles == 2 and engine.interpreted == 1
+    assert cpu.GR.read_int(1) == 6
+
+
+def test_assembler_rejects_register_out_of_range(tmp_path):
+    source = tmp_path / 'register.txt'
+    source.write_text('Add r32, r1, r1\n')
+    with pytest.raises(Exception, match='Register out of range: r32'):
+        create_cpu(program=str(source))
+
+
+def test_hot_threshold_falls_back_to_interpreter(tmp_path):
+    rng = random.Random(7)
+    source = tmp_path / 'hot.txt'
+    for _ in range(50):
+        source.write_text(random_program(rng, rng.randrange(1, 30)))
+        interpreted, translated = run_both(str(source), random_data(rng, 12), 256, hot_threshold=2)
+        assert translated == interpreted
+
+
+def test_program_write_invalidates_block(tmp_path):
+    source = tmp_path / 'smc.txt'
+    source.write_text('Load r1, #0\nAdd r3, r1, r1\n')
+    cpu = create_cpu(init_memory=True)
+    cpu.load_program(str(source))
+    engine = BlockEngine(cpu, hot_threshold=0)
+    engine.run()
+    assert cpu.GR.read_int(3) == 20 and engine.blocks
+    cpu.memory.write_word(63, 0x81010004, is_program=True)  # 改写为 Load r4, #1
+    assert not engine.blocks
+    cpu.PC_instruction_init()
+    engine.run()
+    assert cpu.GR.read_int(4) == 15
+
+
+def test_default_threshold_translates_only_hot_code(tmp_path):
+    source = tmp_path / 'loop.txt'
+    source.write_text('Load r1, #0\nLoad r2, #1\nloop: Sub r1, r1, r2\nCmp r1, r0\nBne #loop\nAdd r3, r3, r2\n')
+    cpu = create_cpu()
+    cpu.memory.write_word(0, 10)  # 循环10次，未达到翻译阈值
+    cpu.memory.write_word(1, 1)
+    cpu.load_program(str(source))
+    engine = BlockEngine(cpu)
+    engine.run()
+    assert engine.translated == 0 and engine.interpreted == cpu.cycles == 33
+    cpu.memory.write_word(0, 100)
+    cpu.PC_instruction_init()
+    engine.run()
+    assert engine.translated == 1 and cpu.GR.read_int(1) == 0  # 只有循环体被翻译
@@ -0,0 +1,64 @@
+# *******************************************************
+# 简介：MyMemory分页稀疏内存的测试：寻址范围、小端序、写时复制，
+#      以及数据写入不会移动代码段(写入代码段即为自修改代码)。
+# *******************************************************
+
+import pytest
+
+from project1.project1 import ADDRESS_SPACE, PAGE_SIZE, MyMemory, create_cpu
+
+
+def test_full_address_space_is_sparse():
+    memory = MyMemory(ADDRESS_SPACE)
+    memory.write_word(ADDRESS_SPACE // 4 - 1, 0x12345678)
+    assert memory.get_word(ADDRESS_SPACE // 4 - 1) == 0x12345678
+    assert memory.get_word(12345) == 0  # 未分配的页读出全0
+    assert memory.resident_size() == PAGE_SIZE
+
+
+def test_words_are_little_endian():
+    memory = MyMemory(256)
+    memory.write_word(2, 0x11223344)
+    assert memory.read_bytes(8, 4) == b'\x44\x33\x22\x11'
+    assert memory.read_cell(8) == '01000100'
+
+
+def test_address_range():
+    memory = MyMemory(100)  # 最后一页只分配到寻址长度为止
+    memory.write_word(24, 1)
+    for access in (lambda: memory.write_word(25, 1), lambda: memory.get_word(25), lambda: memory.get_word(-1)):
+        with pytest.raises(IndexError):
+            access()
+    assert memory.address_len == 100
+    with pytest.raises(Exception):
+        MyMemory(ADDRESS_SPACE + 1)
+
+
+def test_shared_pages_are_copied_on_write():
+    memory = MyMemory(PAGE_SIZE * 2)
+    memory.write_word(0, 1)
+    shared = memory.share_pages()
+    memory.write_word(0, 2)
+    assert bytes(shared[0][:4]) == b'\x01\x00\x00\x00'
+    assert memory.get_word(0) == 2
+
+
+def test_store_into_code_does_not_move_it(tmp_path):
+    # 16个字的内存，代码位于13~15号字；Store写入15号字(Add)后该处为0(空操作)，程序照常结束
+    source = tmp_path / 'store.txt'
+    source.write_text('Store r0, #15\nJmp #L2\nL2: Add r0, r0, r0\n')
+    cpu = create_cpu(address_len=64, program=str(source))
+    cpu.execute()
+    assert (cpu.PC.read_int(), cpu.cycles, cpu.memory.address_len) == (16, 3, 64)
+    assert cpu.memory.get_word(15) == 0
+
+
+def test_store_into_code_is_self_modifying(tmp_path):
+    source = tmp_path / 'smc.txt'
+    source.write_text('Load r1, #0\nStore r1, #15\nAdd r3, r3, r3\n')
+    cpu = create_cpu(address_len=64)
+    cpu.memory.write_word(0, 0x81010004)  # Load r4, #1
+    cpu.memory.write_word(1, 77)
+    cpu.load_program(str(source))
+    cpu.execute()
+    assert cpu.GR.read_int(4) == 77 and cpu.cycles == 3
@@ -0,0 +1,106 @@
+# *******************************************************
+# 简介：目标文件(project1.objfile)的测试：序列化往返、数据段与代码段
+#      基址、损坏文件的检测、缓存命中，以及注册新指令后指令集指纹变化，
+#      缓存的目标文件随之失效。
+# *******************************************************
+
+import pytest
+
+from project1 import objfile, project1
+from project1.project1 import AddInstruction, ALUInstruction, create_cpu, make_machine_code, register_instruction
+
+SOURCE = 'Load r1, #0\nLoad r2, #1\nloop: Add r3, r3, r1\nSub r1, r1, r2\nCmp r1, r0\nBne #loop\nStore r3, #2\n'
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / 'program.txt'
+    path.write_text(SOURCE)
+    return str(path)
+
+
+class MulInstruction(ALUInstruction):
+    """测试用的Mul指令类，只在测试中临时注册"""
+
+    __slots__ = ()
+    instruction_name = "Mul"  # 指令名称
+    instruction_code = "11111110"  # 指令代码
+    alu_operation = 'add'
+
+
+def test_round_trip(source_file, tmp_path):
+    obj = objfile.assemble(source_file)
+    path = str(tmp_path / 'program.p1o')
+    obj.save(path)
+    loaded = objfile.ObjectFile.load(path)
+    assert loaded.machine_codes() == obj.machine_codes()
+    assert loaded.symbols == obj.symbols and loaded.symbols['loop'] == (objfile.SECTION_CODE, 64 - 5)
+
+
+def test_cache_is_reused(source_file, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    first = objfile.assemble_cached(source_file, cache_dir)
+    assert len(list((tmp_path / 'cache').iterdir())) == 1
+    second = objfile.assemble_cached(source_file, cache_dir)
+    assert second.machine_codes() == first.machine_codes()
+    objfile.assemble_cached(source_file, cache_dir, address_len=512)
+    assert len(list((tmp_path / 'cache').iterdir())) == 2  # 内存大小不同，布局不同
+
+
+def test_fingerprint_follows_registered_instructions(source_file, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    before = objfile.isa_fingerprint()
+    objfile.assemble_cached(source_file, cache_dir)
+    register_instruction(MulInstruction)
+    try:
+        after = objfile.isa_fingerprint()
+        assert after != before and after.endswith(b';Mul=11111110')
+        objfile.assemble_cached(source_file, cache_dir)  # 指令集变化，缓存失效
+        assert len(list((tmp_path / 'cache').iterdir())) == 2
+    finally:
+        project1.ISA.remove(MulInstruction)
+        project1._isa_tables = None
+    assert objfile.isa_fingerprint() == before
+
+
+def test_loaded_program_runs(source_file):
+    cpu = create_cpu(program=source_file)
+    cpu.memory.write_word(0, 10)
+    cpu.memory.write_word(1, 1)
+    cpu.execute()
+    assert cpu.memory.get_word(2) == 55
+
+
+def test_object_with_data_and_base(tmp_path):
+    add = make_machine_code(AddInstruction.instruction_code, 3, 1, 2)  # Add r3, r1, r2
+    obj = objfile.ObjectFile.from_machine_codes([add], data=(7).to_bytes(4, 'little') * 2, data_base=4, code_base=10)
+    path = str(tmp_path / 'add.p1o')
+    obj.save(path)
+    cpu = create_cpu(program=objfile.ObjectFile.load(path))
+    assert (cpu.memory.get_word(4), cpu.memory.get_word(5), cpu.PC.read_int()) == (7, 7, 10)
+    cpu.GR.write_int(2, 1)
+    cpu.GR.write_int(3, 2)
+    cpu.step()
+    assert cpu.GR.read_int(3) == 5
+
+
+def test_rejects_bad_files(tmp_path):
+    with pytest.raises(Exception, match='Not a version'):
+        objfile.ObjectFile.from_buffer(SOURCE.encode('utf-8'))
+    with pytest.raises(Exception, match='truncated'):
+        objfile.ObjectFile.from_buffer(objfile.ObjectFile(b'\0' * 8).to_bytes()[:-4])
+    with pytest.raises(Exception, match='word aligned'):
+        objfile.ObjectFile(b'\0' * 3)
+
+
+def test_run_with_cache(source_file):
+    cpu = create_cpu()
+    cpu.memory.write_word(0, 4)
+    cpu.memory.write_word(1, 1)
+    cpu.run(source_file, cache=True)
+    assert cpu.memory.get_word(2) == 10
+    again = create_cpu()
+    again.memory.write_word(0, 4)
+    again.memory.write_word(1, 1)
+    again.run(source_file, cache=True)  # 第二次直接载入缓存的目标文件
+    assert again.memory.get_word(2) == 10
@@ -0,0 +1,72 @@
+# *******************************************************
+# 简介：5级流水线模型(project1.pipeline)的测试：无相关时每周期完成一条
+#      指令，load-use与关闭转发时的停顿数，自修改代码的冲刷，以及功能
+#      结果与串行执行一致。
+# *******************************************************
+
+import random
+
+import pytest
+
+from programs import cpu_state, random_data, random_program
+from project1.pipeline import Pipeline
+from project1.project1 import create_cpu
+
+
+def run_pipeline(tmp_path, source, forwarding=True, data=(10, 15)):
+    path = tmp_path / 'program.txt'
+    path.write_text(source)
+    cpu = create_cpu(program=str(path))
+    for index, value in enumerate(data):
+        cpu.memory.write_word(index, value)
+    pipeline = Pipeline(cpu, forwarding)
+    pipeline.run()
+    pipeline.close()
+    return cpu, pipeline.report()
+
+
+def test_independent_instructions(tmp_path):
+    cpu, report = run_pipeline(tmp_path, 'Add r1, r2, r3\nAdd r4, r5, r6\nAdd r7, r8, r9\n')
+    assert (report['instructions'], report['cycles'], report['stalls']) == (3, 3 + 4, 0)
+    assert cpu.cycles == 3
+
+
+@pytest.mark.parametrize('forwarding, stalls', [(True, 1), (False, 2)])
+def test_load_use(tmp_path, forwarding, stalls):
+    cpu, report = run_pipeline(tmp_path, 'Load r1, #0\nAdd r2, r1, r1\n', forwarding)
+    assert report['stalls'] == stalls and report['cycles'] == 2 + 4 + stalls
+    assert cpu.GR.read_int(2) == 20
+
+
+@pytest.mark.parametrize('forwarding, stalls, forwards', [(True, 0, 2), (False, 3, 0)])
+def test_alu_dependencies(tmp_path, forwarding, stalls, forwards):
+    cpu, report = run_pipeline(tmp_path, 'Load r1, #0\nAdd r9, r9, r9\nAdd r2, r1, r1\nAdd r3, r2, r2\n',
+                               forwarding)
+    assert (report['stalls'], report['forwards']) == (stalls, forwards)
+    assert cpu.GR.read_int(3) == 40
+
+
+def test_store_into_fetched_code_flushes(tmp_path):
+    # r1为0，Store把紧随其后、已取入IF的Add r2, r2, r3改写为空操作
+    cpu, report = run_pipeline(tmp_path, 'Store r1, #62\nAdd r4, r4, r4\nAdd r2, r2, r3\nAdd r5, r5, r5\n')
+    assert report['flushes'] == 1 and report['flushed'] == 2
+    assert report['instructions'] == 4 and cpu.GR.read_int(2) == 0
+
+
+def test_random_programs_match_serial_execution(tmp_path):
+    rng = random.Random(12)
+    path = tmp_path / 'random.txt'
+    for trial in range(60):
+        path.write_text(random_program(rng, rng.randrange(1, 30)))
+        data = random_data(rng, 12)
+        expected = create_cpu(program=str(path))
+        pipelined = create_cpu(program=str(path))
+        for index, value in enumerate(data):
+            expected.memory.write_word(index, value)
+            pipelined.memory.write_word(index, value)
+        expected.execute()
+        pipeline = Pipeline(pipelined)
+        pipeline.run()
+        pipeline.close()
+        assert cpu_state(pipelined) == cpu_state(expected), trial
+        assert pipeline.report()['instructions'] == expected.cycles
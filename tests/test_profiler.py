@@ -0,0 +1,61 @@
+# *******************************************************
+# 简介：指令级性能剖析器(project1.profiler)的测试：按指令类与按PC的
+#      计数、时间与访存字节数，热点排序，报告与折叠栈输出。计时函数
+#      替换为每次调用加1微秒的假时钟，结果可以精确断言。
+# *******************************************************
+
+import itertools
+
+import pytest
+
+from project1.profiler import Profiler
+from project1.project1 import create_cpu
+
+LOOP = 'Load r1, #0\nLoad r2, #1\nloop: Add r3, r3, r1\nSub r1, r1, r2\nCmp r1, r0\nBne #loop\nStore r3, #2\n'
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    source = tmp_path / 'loop.txt'
+    source.write_text(LOOP)
+    ticks = itertools.count(0, 1000)
+    profiler = Profiler(clock=lambda: next(ticks))  # 每条指令恰好1000纳秒
+    cpu = create_cpu()
+    cpu.memory.write_word(0, 5)
+    cpu.memory.write_word(1, 1)
+    cpu.run(str(source), trace=profiler)
+    assert cpu.memory.get_word(2) == 15
+    return profiler
+
+
+def test_counts_by_class_and_pc(profiler):
+    assert profiler.total_count == 2 + 4 * 5 + 1
+    assert profiler.total_time == profiler.total_count * 1000
+    add = profiler.by_opcode['AddInstruction']
+    assert (add.name, add.count, add.time) == ('Add', 5, 5000)
+    assert profiler.by_pc[64 - 5].count == 5  # loop: Add r3, r3, r1
+
+
+def test_memory_traffic(profiler):
+    load, store = profiler.by_opcode['LoadInstruction'], profiler.by_opcode['StoreInstruction']
+    assert (load.read_bytes, load.write_bytes) == (8, 0)
+    assert (store.read_bytes, store.write_bytes) == (0, 4)
+    assert profiler.by_opcode['AddInstruction'].read_bytes == 0
+
+
+def test_hotspots_and_report(profiler):
+    hottest = [entry.name for _, entry in profiler.hotspots('opcode', 'count')[:4]]
+    assert sorted(hottest) == ['Add', 'Bne', 'Cmp', 'Sub']
+    report = profiler.report(top=3)
+    assert report.startswith('Instructions: 23, host time: 0.023 ms')
+    assert 'By instruction class:' in report and 'By PC:' in report
+
+
+def test_collapsed_stacks(profiler, tmp_path):
+    lines = profiler.collapsed('count')
+    assert len(lines) == 7 and 'program;AddInstruction;59 Add 5' in lines
+    path = tmp_path / 'loop.folded'
+    profiler.write_collapsed(str(path))
+    assert path.read_text().splitlines()[0] == 'program;LoadInstruction;57 Load 1000'
+    profiler.reset()
+    assert profiler.total_count == 0 and profiler.collapsed() == []
@@ -0,0 +1,51 @@
+# *******************************************************
+# 简介：寄存器与内存单元的测试：数据以整数保存，2进制字符串只在读写
+#      字符串接口时构建，两种接口的结果一致，超出位数的部分被截断。
+# *******************************************************
+
+import pytest
+
+from project1.project1 import Cell, MyMemory, Register, create_cpu, int2binstr
+
+
+def test_cell_string_and_integer_views():
+    cell = Cell(8)
+    cell.write('10100101')
+    assert cell.read_int() == 0xA5 and cell.read() == '10100101'
+    cell.write_int(0x1FF)  # 截断为8位
+    assert cell.read() == '11111111'
+    with pytest.raises(AssertionError):
+        cell.write('101')
+
+
+def test_register_file():
+    gr = Register('GR', cells=32)
+    gr.write_int(-1, 3)
+    assert gr.read_int(3) == 0xFFFFFFFF and gr.read(3) == '1' * 32
+    gr.write(int2binstr(5, 32), 31)
+    assert gr.read_int(31) == 5
+    assert gr.read_int(32) is None  # 越界的编号读出None，写入被忽略
+    gr.write_int(7, 32)
+    assert list(gr.data).count(0) == 30
+
+
+def test_single_cell_register_ignores_index():
+    pc = Register('PC')
+    pc.write_int(1 << 32 | 9, 5)
+    assert pc.read_int() == 9 and pc.read(7) == int2binstr(9, 32)
+
+
+def test_memory_string_interface():
+    memory = MyMemory(256)
+    memory.write_data(3, '0' * 24 + '11110000')
+    assert memory.get_word(3) == 0xF0 and memory.get_data(3) == '0' * 24 + '11110000'
+    assert memory.read_cell(12) == '11110000'
+
+
+def test_example_program(tmp_path):
+    source = tmp_path / 'codes.txt'
+    source.write_text('Load r1, #0\nLoad r2, #1\nAdd r3, r1, r2\nStore r3, #3\n')
+    cpu = create_cpu(program=str(source), init_memory=True)
+    cpu.execute()
+    assert cpu.memory.get_word(3) == 25
+    assert cpu.GR.read(3) == int2binstr(25, 32)
@@ -0,0 +1,87 @@
+# *******************************************************
+# 简介：快照与恢复(project1.snapshot)的测试：同一快照反复恢复后执行
+#      结果相同，内存页写时复制，预译码缓存在恢复后失效，以及快照
+#      文件的序列化与损坏检测。
+# *******************************************************
+
+import pytest
+
+from programs import cpu_state
+from project1.jit import BlockEngine
+from project1.project1 import ADDRESS_SPACE, PAGE_SIZE, create_cpu
+from project1.snapshot import Snapshot
+
+SUM = 'Load r1, #0\nLoad r2, #1\nloop: Add r3, r3, r1\nSub r1, r1, r2\nCmp r1, r0\nBne #loop\nStore r3, #2\n'
+
+
+@pytest.fixture
+def cpu(tmp_path):
+    source = tmp_path / 'sum.txt'
+    source.write_text(SUM)
+    cpu = create_cpu(program=str(source))
+    cpu.memory.write_word(0, 10)
+    cpu.memory.write_word(1, 1)
+    return cpu
+
+
+def test_restore_repeats_run(cpu):
+    snapshot = cpu.snapshot()
+    cpu.execute()
+    first = cpu_state(cpu)
+    assert cpu.memory.get_word(2) == 55
+    for _ in range(3):
+        cpu.restore(snapshot)
+        assert cpu.memory.get_word(2) == 0 and cpu.cycles == 0
+        cpu.execute()
+        assert cpu_state(cpu) == first
+
+
+def test_pages_are_copied_on_write(cpu):
+    snapshot = cpu.snapshot()
+    assert cpu.memory.pages[0] is snapshot.pages[0]  # 拍快照后共享同一页
+    cpu.memory.write_word(5, 7)
+    assert cpu.memory.pages[0] is not snapshot.pages[0] and snapshot.pages[0][20] == 0
+
+
+def test_restore_invalidates_translated_code(cpu):
+    snapshot = cpu.snapshot()
+    engine = BlockEngine(cpu, hot_threshold=0)
+    engine.run()
+    cpu.restore(snapshot)
+    cpu.memory.write_word(0, 4)
+    engine.run()
+    assert cpu.memory.get_word(2) == 10
+    engine.close()
+
+
+def test_mid_run_snapshot(cpu):
+    cpu.execute(max_cycles=9)
+    snapshot = cpu.snapshot()
+    cpu.execute()
+    expected = cpu_state(cpu)
+    cpu.restore(snapshot)
+    assert cpu.cycles == 9
+    cpu.execute()
+    assert cpu_state(cpu) == expected
+
+
+def test_serialization(cpu, tmp_path):
+    cpu.execute(max_cycles=9)
+    path = str(tmp_path / 'state.p1s')
+    cpu.snapshot().save(path)
+    loaded = Snapshot.load(path)
+    other = create_cpu()
+    other.restore(loaded)
+    assert cpu_state(other) == cpu_state(cpu)
+    assert loaded.flags == tuple(getattr(cpu.ALU, name) for name in ('carry', 'overflow', 'zero', 'negative'))
+    with pytest.raises(Exception, match='Not a version'):
+        Snapshot.from_bytes(b'P1OB\x01\x00\x00\x00')
+
+
+def test_sparse_memory_snapshot_is_small():
+    cpu = create_cpu(address_len=ADDRESS_SPACE)
+    cpu.memory.write_word(ADDRESS_SPACE // 4 - 1, 1)
+    data = cpu.snapshot().to_bytes()
+    assert len(data) < PAGE_SIZE  # 只保存写过的页并压缩
+    restored = Snapshot.from_bytes(data)
+    assert restored.address_len == ADDRESS_SPACE and len(restored.pages) == 1
@@ -0,0 +1,51 @@
+# *******************************************************
+# 简介：project1包启动开销的测试：导入包本身不导入任何子模块，常用名称
+#      按需导入，指令对象在第一次用到时才创建，create_cpu不打印任何信息。
+#      导入相关的检查在新的子进程中进行，不受本进程已导入模块的影响。
+# *******************************************************
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from project1.project1 import create_cpu
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # 仓库根目录
+
+
+def run_python(code):
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT, universal_newlines=True, timeout=60)
+    return json.loads(output)
+
+
+def test_import_package_loads_no_submodules():
+    loaded = run_python('import sys, json, project1\n'
+                        'print(json.dumps(sorted(name for name in sys.modules if name.startswith("project1."))))')
+    assert loaded == []
+
+
+def test_exports_are_resolved_on_demand():
+    loaded = run_python('import sys, json, project1\n'
+                        'project1.create_cpu\n'
+                        'print(json.dumps(sorted(name for name in sys.modules if name.startswith("project1."))))')
+    assert loaded == ['project1.alu', 'project1.project1']  # 不导入jit/vector/NumPy等
+
+
+def test_unknown_export():
+    import project1
+    with pytest.raises(AttributeError, match='no attribute'):
+        project1.Missing
+
+
+def test_instructions_are_created_lazily(tmp_path, capsys):
+    cpu = create_cpu()
+    assert capsys.readouterr().out == ''
+    assert cpu.instructions.opcode_table == {}
+    source = tmp_path / 'program.txt'
+    source.write_text('Load r1, #0\nAdd r1, r1, r1\n')
+    cpu.load_program(str(source))
+    assert sorted(instruction.instruction_name for instruction in cpu.instructions.opcode_table.values()) == \
+        ['Add', 'Load']
@@ -0,0 +1,80 @@
+# *******************************************************
+# 简介：运行模式与跟踪器的测试：静默运行不产生任何输出，逐条打印与
+#      原先的输出格式一致，自定义跟踪器按事件名收到各个事件。
+# *******************************************************
+
+import pytest
+
+from project1.project1 import TRACE_QUIET, TRACE_VERBOSE, Tracer, VerboseTracer, create_cpu, make_tracer
+
+SOURCE = 'Load r1, #0\nLoad r2, #1\nAdd r3, r1, r2\nStore r3, #3\n'
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / 'codes.txt'
+    path.write_text(SOURCE)
+    return str(path)
+
+
+class Recorder(Tracer):
+    """按顺序记录事件名，只实现部分事件"""
+
+    def __init__(self):
+        self.events = []
+
+    def on_compile_line(self, translater, code_line):
+        self.events.append('line')
+
+    def on_fetch(self, cpu):
+        self.events.append('fetch')
+
+    def on_executed(self, cpu, instruction, operands):
+        self.events.append(instruction.instruction_name)
+
+    def on_end(self, cpu):
+        self.events.append('end')
+
+
+def test_quiet_run_prints_nothing(source_file, capsys):
+    cpu = create_cpu(init_memory=True)
+    cpu.run(source_file)
+    assert capsys.readouterr().out == ''
+    assert cpu.memory.get_word(3) == 25 and cpu.cycles == 4
+
+
+def test_verbose_run(source_file, capsys):
+    cpu = create_cpu(init_memory=True)
+    cpu.run(source_file, trace=TRACE_VERBOSE)
+    out = capsys.readouterr().out
+    assert out.startswith('Compile Codes:\n' + SOURCE)
+    assert out.count('Run Code:') == 4 and out.count('PC寄存器自增:') == 4
+    assert out.rstrip().endswith('Program End!\n' + '-' * 76)
+    assert cpu.memory.get_word(3) == 25
+
+
+def test_custom_tracer(source_file):
+    recorder = Recorder()
+    cpu = create_cpu(init_memory=True)
+    cpu.run(source_file, trace=recorder)
+    assert recorder.events == ['line'] * 4 + ['fetch', 'Load', 'fetch', 'Load', 'fetch', 'Add', 'fetch', 'Store',
+                                              'end']
+
+
+def test_make_tracer():
+    assert make_tracer(None) is None and make_tracer(TRACE_QUIET) is None
+    assert isinstance(make_tracer(TRACE_VERBOSE), VerboseTracer)
+    events = []
+    tracer = make_tracer(lambda event, source, *args: events.append(event))
+    tracer('start', None)
+    assert events == ['start']
+    with pytest.raises(Exception, match='Invalid trace'):
+        make_tracer('loud')
+
+
+def test_trace_and_quiet_agree(source_file, capsys):
+    quiet, verbose = create_cpu(init_memory=True), create_cpu(init_memory=True)
+    quiet.run(source_file)
+    verbose.run(source_file, trace=TRACE_VERBOSE)
+    capsys.readouterr()
+    assert list(quiet.GR.data) == list(verbose.GR.data) and quiet.PC.read_int() == verbose.PC.read_int()
@@ -0,0 +1,63 @@
+# *******************************************************
+# 简介：向量化锁步仿真(project1.vector)的测试：各通道的结果与逐个
+#      解释执行一致，跳转使PC分歧后重新汇合，以及不支持的写入。
+#      未安装NumPy时跳过。
+# *******************************************************
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from project1.project1 import create_cpu  # noqa: E402
+from project1.vector import VectorCPU  # noqa: E402
+
+SUM = 'Load r1, #0\nLoad r2, #1\nloop: Add r3, r3, r1\nSub r1, r1, r2\nCmp r1, r0\nBne #loop\nStore r3, #2\n'
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / 'sum.txt'
+    path.write_text(SUM)
+    return str(path)
+
+
+def test_lanes_diverge_and_reconverge(source_file):
+    counts = [5, 1, 9, 5]
+    vector = VectorCPU(len(counts))
+    vector.set_word(0, counts)
+    vector.set_word(1, 1)
+    vector.load_program(source_file)
+    vector.run()
+    assert list(vector.get_word(2)) == [n * (n + 1) // 2 for n in counts]
+    assert list(vector.cycles) == [2 + 4 * n + 1 for n in counts]
+    assert vector.divergences >= 1 and vector.reconvergences >= 1
+    for lane, count in enumerate(counts):
+        cpu = create_cpu(program=source_file)
+        cpu.memory.write_word(0, count)
+        cpu.memory.write_word(1, 1)
+        cpu.execute()
+        assert [int(value) for value in vector.GR[lane]] == list(cpu.GR.data)
+
+
+def test_uniform_lanes_never_diverge(source_file):
+    vector = VectorCPU(8)
+    vector.set_word(0, 6)
+    vector.set_word(1, 1)
+    vector.load_program(source_file)
+    vector.run()
+    assert vector.divergences == 0 and vector.uniform_pc == 64
+    assert (vector.get_word(2) == 21).all()
+
+
+def test_store_into_code_is_rejected(tmp_path):
+    source = tmp_path / 'smc.txt'
+    source.write_text('Store r1, #63\n')
+    vector = VectorCPU(2)
+    vector.load_program(str(source))
+    with pytest.raises(Exception, match='does not support writing to the code segment'):
+        vector.run()
+
+
+def test_address_length_must_be_aligned():
+    with pytest.raises(Exception, match='word aligned'):
+        VectorCPU(2, address_len=250)